@@ -2,6 +2,9 @@ import time
 import random
 from uuid import uuid4
 
+# The weakest fighter has a chance to win if it has at least this share of the stronger fighter's total stats
+UPSET_THRESHOLD = 0.8
+
 
 class PokemonBattleSimulatorException(Exception):
     """Exception for the PokemonBattleSimulator."""
@@ -42,7 +45,7 @@ class PokemonBattleSimulator:
         pre_winner_id, pre_opponent_id = sorted(total_stats, key=total_stats.get, reverse=True)
 
         # Determine if randomness applies (the weakest has >= 80% of the stats of the stronger)
-        if total_stats[pre_opponent_id] >= total_stats[pre_winner_id] * 0.8:
+        if total_stats[pre_opponent_id] >= total_stats[pre_winner_id] * UPSET_THRESHOLD:
             # The weakest has a chance to win
             winner = random.choice([pre_winner_id, pre_opponent_id])
             opponent = pre_winner_id if pre_winner_id != winner else pre_opponent_id
@@ -1,28 +1,80 @@
-from typing import Union
+import os
+import json
+import time
+from enum import Enum
+from itertools import islice
+from typing import Annotated, List, Optional, Union
+from uuid import uuid4
+
+import boto3
 
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.event_handler.exceptions import NotFoundError
 from aws_lambda_powertools.event_handler.openapi.exceptions import RequestValidationError
 from aws_lambda_powertools.event_handler import APIGatewayRestResolver, Response, content_types
+from aws_lambda_powertools.event_handler.openapi.params import Query
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
-from db_models import BattleModel
+from db_models import LEADERBOARD, BattleModel, PokemonSummaryModel
 from data_validation_ext import ExceptionHandlers
+from cache.serializers import MsgPackSerializer
 from poke_api.client import PokeAPIClient
-from poke_cache_utils import get_cache_client, fetch_pokemon_data_with_caching
+from poke_api.resilience import CircuitBreaker, PokeAPIUnavailableError, TokenBucket
+from poke_api.snapshot import load_snapshot
+from poke_cache_utils import get_cache_client, fetch_many_pokemon_data_with_caching
 
 from battle_simulator import PokemonBattleSimulator
+from vectorized_battle_simulator import VectorizedBattleSimulator, win_probability
+from tournament import Tournament, TournamentFormat, count_battles, write_ndjson_chunks_to_s3
+from pagination import decode_next_token, encode_next_token, paginate
 
 
 # --------------------------------------------------------------- Application & clients
 logger = Logger()
 app = APIGatewayRestResolver(enable_validation=True)
 exception_handlers = ExceptionHandlers(app=app, logger=logger)
-# Initialize client for Cache based on DynamoDB table
-cache_cli = get_cache_client(db_type="dynamodb")
-# Initialize client for PokeAPI
-poke_cli = PokeAPIClient()
+# Initialize client for Cache based on DynamoDB table, with in-process cache shared by warm invocations
+# and compact binary values (entries stored as JSON are still readable)
+cache_cli = get_cache_client(db_type="dynamodb", l1_cache=True, serializer=MsgPackSerializer(compress=True))
+# Initialize client for PokeAPI, failing fast while PokeAPI is unavailable,
+# the circuit breaker state is shared by all containers through the cache table
+poke_cli = PokeAPIClient(
+    rate_limiter=TokenBucket(rate=20, capacity=50),
+    circuit_breaker=CircuitBreaker(name="pokeapi", cache_cli=cache_cli),
+)
+# Open the offline Pokédex snapshot shipped in the Data Layer (if it was built),
+# Pokémon missing in it are read from the cache or fetched from PokeAPI
+snapshot = load_snapshot()
+# Initialize client for S3, tournament results are streamed to the bucket in NDJSON chunks
+s3_client = boto3.client("s3")
+S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME")
+# Battles can be saved asynchronously (write-behind): they are enqueued to SQS and saved by the SQS trigger
+# in batches, so the DynamoDB write latency is not part of battle responses
+sqs_client = boto3.client("sqs")
+SQS_QUEUE_URL = os.environ.get("SQS_QUEUE_URL")
+BATTLE_WRITE_BEHIND = os.environ.get("BATTLE_WRITE_BEHIND", "false").lower() == "true"
+# Battles are searched in the sharded GSIs once 'winner_shard' is backfilled, in the legacy GSIs until then
+BATTLE_SHARDED_INDEXES = os.environ.get("BATTLE_SHARDED_INDEXES", "true").lower() == "true"
+# Maximum number of messages in a SendMessageBatch request
+SQS_MAX_BATCH_SIZE = 10
+# Pagination of battle searches, pages are also cut before they exceed the size budget,
+# which is far below the 6 MB limit of Lambda responses
+SEARCH_DEFAULT_LIMIT = 25
+SEARCH_MAX_LIMIT = 100
+SEARCH_MAX_RESPONSE_SIZE = 1_000_000
+# Battles after a timestamp within this window (in seconds) are searched by the timestamp first
+SEARCH_RECENT_WINDOW = 86400
+# Attributes of battles returned by the API, the sharded GSI keys are internal
+BATTLE_ATTRIBUTES = set(BattleModel.get_attributes()) - {"winner_shard", "day_shard"}
+LEADERBOARD_DEFAULT_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 100
+# Tournaments are simulated synchronously, within the function timeout raised to the 29s limit of API Gateway
+# (and 1 GB of memory) in the template, so their size is limited by the number of battles:
+# e.g. a round robin of 1024 fighters would have ~523k battles
+TOURNAMENT_MAX_BATTLES = 50_000
+# Battles simulated at once to estimate the odds, all of them are held in memory
+ODDS_MAX_SAMPLES = 1_000_000
 
 
 # --------------------------------------------------------------- Pydantic validation Models
@@ -47,6 +99,53 @@ class Fighters(BaseModel):
         return v
 
 
+class FightersBatch(BaseModel):
+    battles: List[Fighters] = Field(min_length=1, max_length=500)
+
+
+class TournamentRequest(BaseModel):
+    roster: List[Union[str, int]] = Field(min_length=2, max_length=1024)
+    format: TournamentFormat = TournamentFormat.ROUND_ROBIN
+    rounds: Optional[int] = Field(default=None, gt=0)
+    seed: Optional[int] = None
+
+    @field_validator("roster")  # noqa
+    @classmethod
+    def lowercase_if_str(cls, v):
+        """
+        Ensures every roster entry is converted to lowercase if it is a string.
+
+        Args:
+            v (list): The value of the roster field.
+
+        Returns:
+            The roster with string entries converted to lowercase.
+        """
+        return [pokemon.lower() if isinstance(pokemon, str) else pokemon for pokemon in v]
+
+    @model_validator(mode="after")
+    def limit_battles(self):
+        """
+        Ensures the tournament can be simulated within the API timeout.
+
+        Returns:
+            The validated tournament request.
+        """
+        battles_count = count_battles(len(self.roster), self.format, self.rounds)
+
+        if battles_count > TOURNAMENT_MAX_BATTLES:
+            raise ValueError(f"Tournament has {battles_count} battles, at most {TOURNAMENT_MAX_BATTLES} are allowed")
+
+        return self
+
+
+class LeaderboardSort(str, Enum):
+    """Orders of the leaderboard, each served by an index of the summary table."""
+
+    WINS = "wins"
+    WIN_RATE = "win_rate"
+
+
 # --------------------------------------------------------------- Validation error handlers
 @app.exception_handler(RequestValidationError)
 def handle_invalid_params_wrapper(exc: RequestValidationError):
@@ -58,28 +157,220 @@ def handle_not_found_error(exc):
     return exception_handlers.not_found(exc)
 
 
+@app.exception_handler(PokeAPIUnavailableError)
+def handle_poke_api_unavailable_error(exc):
+    logger.info(f"PokeAPI client metrics: {poke_cli.metrics}")
+    return exception_handlers.service_unavailable(exc)
+
+
+# --------------------------------------------------------------- Helpers
+def fetch_fighters_data(pokemon_ids):
+    """
+    Fetches battle data for every distinct Pokémon ID/name exactly once, concurrently.
+
+    Args:
+        pokemon_ids (Iterable[str]): Pokémon IDs or names, duplicates are allowed.
+
+    Returns:
+        dict: A dictionary with the requested Pokémon ID/name as keys and their battle data as values.
+    """
+    return fetch_many_pokemon_data_with_caching(
+        cache_cli=cache_cli, poke_cli=poke_cli, pokemon_ids=pokemon_ids, snapshot=snapshot
+    )
+
+
+def simulate_battle(pokemon1_data, pokemon2_data):
+    """
+    Runs the battle simulator for a single pair of fighters.
+
+    Args:
+        pokemon1_data (dict): Battle data of the first Pokémon.
+        pokemon2_data (dict): Battle data of the second Pokémon.
+
+    Returns:
+        dict: Battle result, including winner, opponent, and their stats.
+    """
+    fighters_data = {pokemon_data["name"]: pokemon_data for pokemon_data in (pokemon1_data, pokemon2_data)}
+    return PokemonBattleSimulator(fighters_data=fighters_data).result()
+
+
+def save_battles(battle_results):
+    """
+    Saves battle results to DynamoDB, or enqueues them to SQS in write-behind mode.
+    Battles, which could not be enqueued (failed entries or a failed request), are saved synchronously,
+    so none is lost.
+
+    Args:
+        battle_results (list): Battle results to save.
+    """
+    if BATTLE_WRITE_BEHIND:
+        failed_results = []
+
+        for start in range(0, len(battle_results), SQS_MAX_BATCH_SIZE):
+            chunk = battle_results[start : start + SQS_MAX_BATCH_SIZE]
+            # Battles are independent, a message group per battle doesn't order them, and the battle ID
+            # deduplicates retried sends
+            try:
+                response = sqs_client.send_message_batch(
+                    QueueUrl=SQS_QUEUE_URL,
+                    Entries=[
+                        {
+                            "Id": str(index),
+                            "MessageBody": json.dumps(battle_result),
+                            "MessageGroupId": battle_result["id"],
+                            "MessageDeduplicationId": battle_result["id"],
+                        }
+                        for index, battle_result in enumerate(chunk)
+                    ],
+                )
+            except Exception as e:
+                # The whole chunk failed (throttling, network), it is saved synchronously
+                logger.exception(f"Battles could not be enqueued, error: {str(e)}")
+                failed_results.extend(chunk)
+                continue
+
+            failed_results.extend(chunk[int(failed["Id"])] for failed in response.get("Failed", []))
+
+        if not failed_results:
+            return
+
+        logger.warning(f"Battles could not be enqueued, saving {len(failed_results)} synchronously")
+        battle_results = failed_results
+
+    if len(battle_results) == 1:
+        BattleModel(**battle_results[0]).save()
+        return
+
+    # Saving all battle entries to DynamoDB with a single batch write (chunked by PynamoDB)
+    with BattleModel.batch_write() as batch:
+        for battle_result in battle_results:
+            batch.save(BattleModel(**battle_result))
+
+
 # --------------------------------------------------------------- API Resources
 @app.post("/v1/battle")
 def generate_battle(fighters: Fighters):
-    fighters_data = {}
+    pokemon_ids = [str(fighters.pokemon1), str(fighters.pokemon2)]
+    fighters_data = fetch_fighters_data(pokemon_ids=pokemon_ids)
+
+    battle_result = simulate_battle(*(fighters_data[pokemon_id] for pokemon_id in pokemon_ids))
+
+    # Saving the new battle entry to DynamoDB (or enqueuing it in write-behind mode)
+    save_battles([battle_result])
+
+    return Response(
+        status_code=200,
+        content_type=content_types.APPLICATION_JSON,
+        body={"battle_result": battle_result},
+    )
+
 
-    for _, fighter in fighters:
-        pokemon_data = fetch_pokemon_data_with_caching(cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id=str(fighter))
-        pokemon = pokemon_data["name"]
-        fighters_data[pokemon] = pokemon_data
+@app.post("/v1/battles:batch")
+def generate_battles_batch(fighters_batch: FightersBatch):
+    pairs = [(str(fighters.pokemon1), str(fighters.pokemon2)) for fighters in fighters_batch.battles]
+    # Each distinct Pokémon is fetched (cache or PokeAPI) only once for the whole batch
+    fighters_data = fetch_fighters_data(pokemon_ids=[pokemon_id for pair in pairs for pokemon_id in pair])
+    # A Pokémon can't fight itself, also when it is requested by ID and by name,
+    # so all pairs are validated before any battle is simulated
+    invalid_pairs = [
+        {"loc": ("body", "battles", index), "msg": f"A Pokemon can't battle itself: {pokemon1}, {pokemon2}"}
+        for index, (pokemon1, pokemon2) in enumerate(pairs)
+        if fighters_data[pokemon1]["name"] == fighters_data[pokemon2]["name"]
+    ]
 
-    battle_result = PokemonBattleSimulator(fighters_data=fighters_data).result()
+    if invalid_pairs:
+        raise RequestValidationError(invalid_pairs)
 
-    # Creating an instance of the BattleModel with the battle result
-    battle_entry = BattleModel(**battle_result)
+    battle_results = [
+        simulate_battle(fighters_data[pokemon1], fighters_data[pokemon2]) for pokemon1, pokemon2 in pairs
+    ]
 
-    # Saving the new battle entry to DynamoDB
-    battle_entry.save()
+    save_battles(battle_results)
 
     return Response(
         status_code=200,
         content_type=content_types.APPLICATION_JSON,
-        body={"battle_result": battle_result},
+        body={"battle_results": battle_results},
+    )
+
+
+@app.post("/v1/tournament")
+def simulate_tournament(tournament_request: TournamentRequest):
+    fighters_data = fetch_fighters_data(pokemon_ids=[str(pokemon) for pokemon in tournament_request.roster])
+    # The same Pokémon could be requested by ID and by name, the simulator keys fighters by name
+    fighters_data = {pokemon_data["name"]: pokemon_data for pokemon_data in fighters_data.values()}
+
+    if len(fighters_data) < 2:
+        raise RequestValidationError([{"loc": ("body", "roster"), "msg": "At least two distinct Pokemon are required"}])
+
+    tournament_id = uuid4().hex
+    tournament = Tournament(
+        fighters_data=fighters_data,
+        tournament_format=tournament_request.format,
+        rounds=tournament_request.rounds,
+        seed=tournament_request.seed,
+    )
+    # Battles are generated lazily and written in chunks, the full result list is never held in memory
+    s3_keys = write_ndjson_chunks_to_s3(
+        s3_client=s3_client,
+        bucket_name=S3_BUCKET_NAME,
+        prefix=f"tournaments/{tournament_id}",
+        battles=tournament.battles(),
+    )
+
+    return Response(
+        status_code=200,
+        content_type=content_types.APPLICATION_JSON,
+        body={
+            "tournament": {
+                "id": tournament_id,
+                "format": tournament.tournament_format.value,
+                "battles_count": sum(tournament.standings.values()),
+                "champion": tournament.champion,
+                "standings": dict(tournament.standings.most_common()),
+                "s3_keys": s3_keys,
+            }
+        },
+    )
+
+
+@app.get("/v1/battle/odds")
+def fetch_battle_odds(
+    pokemon1: Annotated[str, Query(min_length=1)],
+    pokemon2: Annotated[str, Query(min_length=1)],
+    samples: Annotated[Optional[int], Query(gt=0, le=ODDS_MAX_SAMPLES)] = None,
+):
+    pokemon_ids = [pokemon1.lower(), pokemon2.lower()]
+    fighters_data = fetch_fighters_data(pokemon_ids=pokemon_ids)
+    pokemon1_data, pokemon2_data = (fighters_data[pokemon_id] for pokemon_id in pokemon_ids)
+    total_stats1, total_stats2 = (sum(data["stats"].values()) for data in (pokemon1_data, pokemon2_data))
+
+    if samples:
+        # Empirical win rate of battles simulated with the vectorized engine, ready for rule sets
+        # without a closed-form solution, the fighters are keyed by position as they may be the same Pokemon
+        simulator = VectorizedBattleSimulator(fighters_data={"pokemon1": pokemon1_data, "pokemon2": pokemon2_data})
+        pokemon1_wins = simulator.outcomes(pokemon_ids1=["pokemon1"] * samples, pokemon_ids2=["pokemon2"])
+        pokemon1_win_probability = float(pokemon1_wins.mean())
+    else:
+        # Closed-form solution under the current rules, calculated from total stats
+        pokemon1_win_probability = float(win_probability(total_stats1, total_stats2))
+
+    # Nothing is saved, odds are calculated without generating battle entries
+    return Response(
+        status_code=200,
+        content_type=content_types.APPLICATION_JSON,
+        body={
+            "odds": {
+                "pokemon1": pokemon1_data["name"],
+                "pokemon2": pokemon2_data["name"],
+                "pokemon1_total_stats": total_stats1,
+                "pokemon2_total_stats": total_stats2,
+                "pokemon1_win_probability": pokemon1_win_probability,
+                "pokemon2_win_probability": 1 - pokemon1_win_probability,
+                "method": "simulation" if samples else "closed_form",
+                "samples": samples,
+            }
+        },
     )
 
 
@@ -91,10 +382,14 @@ def fetch_battle_data(battle_id: str):
         if not battle_data:
             raise NotFoundError
 
+        battle_result = {
+            name: value for name, value in battle_data.attribute_values.items() if name in BATTLE_ATTRIBUTES
+        }
+
         return Response(
             status_code=200,
             content_type=content_types.APPLICATION_JSON,
-            body={"battle_result": battle_data.attribute_values},
+            body={"battle_result": battle_result},
         )
 
     except Exception as e:
@@ -102,36 +397,151 @@ def fetch_battle_data(battle_id: str):
         return Response(status_code=500)
 
 
+def plan_battle_search(opponent=None, timestamp=None):
+    """
+    Chooses the access path of a battle search by winner: the index, the key condition evaluated on the index
+    and the filter condition evaluated by DynamoDB on the read items, before they are returned.
+    Filters by 'opponent' name ('starts with') and 'timestamp' ('greater than or equal to') are both key
+    conditions of an index, so when both are given, the more selective one is the key condition:
+    the 'timestamp' for recent battles only, the 'opponent' otherwise.
+
+    Args:
+        opponent (str, optional): The prefix of the opponent name.
+        timestamp (int, optional): The timestamp after which to search for battles.
+
+    Returns:
+        tuple: The index, key condition, filter condition (both can be None) and the description of the access path.
+    """
+    is_recent = timestamp is not None and time.time() - timestamp <= SEARCH_RECENT_WINDOW
+
+    if BATTLE_SHARDED_INDEXES:
+        opponent_index, timestamp_index = BattleModel.winner_opponent_index, BattleModel.winner_timestamp_index
+    else:
+        opponent_index = BattleModel.unsharded_winner_opponent_index
+        timestamp_index = BattleModel.unsharded_winner_timestamp_index
+
+    if opponent and (timestamp is None or not is_recent):
+        index = opponent_index
+        range_key_condition = BattleModel.opponent.startswith(opponent)
+        key_condition = "begins_with(opponent, :opponent)"
+        filter_condition = BattleModel.timestamp >= timestamp if timestamp is not None else None
+        filter_expression = "timestamp >= :timestamp" if timestamp is not None else None
+    else:
+        index = timestamp_index
+        range_key_condition = BattleModel.timestamp >= timestamp if timestamp is not None else None
+        key_condition = "timestamp >= :timestamp" if timestamp is not None else None
+        filter_condition = BattleModel.opponent.startswith(opponent) if opponent else None
+        filter_expression = "begins_with(opponent, :opponent)" if opponent else None
+
+    # Every shard of the winner is queried, results are merged in the order of the range key
+    access_path = {
+        "index": index.Meta.index_name,
+        "key_condition": " AND ".join(filter(None, [f"{index.hash_key_name} = :{index.hash_key_name}", key_condition])),
+        "filter_condition": filter_expression,
+        "shards": index.shards,
+    }
+
+    return index, range_key_condition, filter_condition, access_path
+
+
 @app.get("/v1/battle/search_by_winner/<name>")
-def search_battles_by_winner(name: str):
-    opponent_filter: str = app.current_event.get_query_string_value(name="opponent")
-    timestamp_filter: str = app.current_event.get_query_string_value(name="timestamp")
+def search_battles_by_winner(
+    name: str,
+    opponent: Annotated[Optional[str], Query(min_length=1)] = None,
+    timestamp: Annotated[Optional[int], Query(ge=0)] = None,
+    limit: Annotated[int, Query(gt=0, le=SEARCH_MAX_LIMIT)] = SEARCH_DEFAULT_LIMIT,
+    next_token: Annotated[Optional[str], Query(min_length=1)] = None,
+    attributes: Annotated[Optional[str], Query(min_length=1)] = None,
+    explain: Annotated[bool, Query()] = False,
+):
+    # Both filters are evaluated by DynamoDB, only matching battles are returned by the query
+    index, range_key_condition, filter_condition, access_path = plan_battle_search(opponent, timestamp)
+    index_name = index.Meta.index_name
+    logger.info(f"Search battles by winner, access path: {access_path}")
+    # Key attributes are always read, the next page starts after the key of the last returned item
+    key_attributes = {"id", index.hash_key_name, index.range_key}
+    requested_attributes = set(attributes.split(",")) if attributes else None
+
+    if requested_attributes and not requested_attributes <= BATTLE_ATTRIBUTES:
+        unknown_attributes = ", ".join(sorted(requested_attributes - BATTLE_ATTRIBUTES))
+        raise RequestValidationError(
+            [{"loc": ("query", "attributes"), "msg": f"Unknown attributes: {unknown_attributes}"}]
+        )
+
+    try:
+        last_evaluated_key = (
+            decode_next_token(next_token, index_name=index_name, key_attributes=key_attributes, shards=index.shards)
+            if next_token
+            else None
+        )
+        battles = index.query(
+            name,
+            range_key_condition,
+            filter_condition=filter_condition,
+            limit=limit,
+            last_evaluated_key=last_evaluated_key,
+            attributes_to_get=sorted(requested_attributes | key_attributes) if requested_attributes else None,
+        )
+    except ValueError as e:
+        raise RequestValidationError([{"loc": ("query", "next_token"), "msg": str(e)}])
+
+    try:
+        battles_data, last_evaluated_key = paginate(
+            results=battles,
+            limit=limit,
+            max_response_size=SEARCH_MAX_RESPONSE_SIZE,
+            attributes=requested_attributes or BATTLE_ATTRIBUTES,
+        )
+        body = {
+            "battles": battles_data,
+            "next_token": encode_next_token(index_name=index_name, last_evaluated_key=last_evaluated_key),
+        }
+
+        if explain:
+            body["access_path"] = access_path
+
+        return Response(status_code=200, content_type=content_types.APPLICATION_JSON, body=body)
+
+    except Exception as e:
+        logger.exception(f"Search battle battle data, error: {str(e)}")
+        return Response(status_code=500)
+
+
+@app.get("/v1/leaderboard")
+def fetch_leaderboard(
+    limit: Annotated[int, Query(gt=0, le=LEADERBOARD_MAX_LIMIT)] = LEADERBOARD_DEFAULT_LIMIT,
+    sort_by: Annotated[LeaderboardSort, Query()] = LeaderboardSort.WINS,
+):
+    # Aggregates are maintained from the battle stream, so the top Pokémon are read from an index
+    # (the top of every shard, merged) instead of scanning battles
+    if sort_by == LeaderboardSort.WIN_RATE:
+        index = PokemonSummaryModel.leaderboard_win_rate
+    else:
+        index = PokemonSummaryModel.leaderboard_wins
 
     try:
-        if opponent_filter:
-            # Filtering by 'opponent' name using 'starts with'
-            battles = BattleModel.winner_opponent_index.query(name, BattleModel.opponent.startswith(opponent_filter))
-
-            if timestamp_filter:
-                # Apply second level filtering by 'timestamp'
-                battles = [battle for battle in battles if battle.timestamp >= int(timestamp_filter)]
-        elif timestamp_filter:
-            # Filtering by 'timestamp' using 'greater than or equal to'
-            battles = BattleModel.winner_timestamp_index.query(name, BattleModel.timestamp >= int(timestamp_filter))
-        else:
-            # Querying only with the 'winner' name
-            battles = BattleModel.winner_timestamp_index.query(name)
-
-        battles_data = [battle.attribute_values for battle in battles]
+        summaries = islice(index.query(LEADERBOARD, scan_index_forward=False, limit=limit), limit)
+        leaderboard = [
+            {
+                "rank": rank,
+                "pokemon": summary.pokemon,
+                "wins": summary.wins,
+                "losses": summary.losses,
+                "battles": summary.battles,
+                "win_rate": summary.win_rate,
+                "last_battle_at": summary.last_battle_at,
+            }
+            for rank, summary in enumerate(summaries, start=1)
+        ]
 
         return Response(
             status_code=200,
             content_type=content_types.APPLICATION_JSON,
-            body={"battles": battles_data},
+            body={"leaderboard": leaderboard, "sort_by": sort_by.value},
         )
 
     except Exception as e:
-        logger.exception(f"Search battle battle data, error: {str(e)}")
+        logger.exception(f"Fetch leaderboard, error: {str(e)}")
         return Response(status_code=500)
 
 
@@ -0,0 +1,144 @@
+import json
+import base64
+import binascii
+
+
+def encode_next_token(index_name, last_evaluated_key):
+    """
+    Encodes the last evaluated key of a query into an opaque pagination token.
+
+    Args:
+        index_name (str): The name of the queried index, the token is valid only for queries of the same index.
+        last_evaluated_key (dict): The DynamoDB key of the last returned item.
+
+    Returns:
+        str: The URL-safe token, or None if there are no more items.
+    """
+    if not last_evaluated_key:
+        return None
+
+    token = json.dumps({"index": index_name, "key": last_evaluated_key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def is_dynamodb_key(key, key_attributes=None):
+    """
+    Checks that a value is a DynamoDB key in the attribute-value format of the low-level API,
+    e.g. {"id": {"S": "..."}, "timestamp": {"N": "1"}}.
+
+    Args:
+        key: The value to check.
+        key_attributes (Iterable[str], optional): The names of the key attributes, any names by default.
+
+    Returns:
+        bool: True if the value is a key with string, number or binary attributes.
+    """
+    if not isinstance(key, dict) or not key:
+        return False
+
+    if key_attributes is not None and set(key) != set(key_attributes):
+        return False
+
+    for value in key.values():
+        if not isinstance(value, dict) or len(value) != 1:
+            return False
+
+        attribute_type, attribute_value = next(iter(value.items()))
+
+        if attribute_type not in ("S", "N", "B") or not isinstance(attribute_value, str):
+            return False
+
+        if attribute_type == "N":
+            try:
+                float(attribute_value)
+            except ValueError:
+                return False
+
+    return True
+
+
+def decode_next_token(next_token, index_name, key_attributes=None, shards=None):
+    """
+    Decodes a pagination token into the key, from which the query continues.
+    The key is validated, so that a tampered token is rejected before it is sent to DynamoDB.
+
+    Args:
+        next_token (str): The token returned with the previous page.
+        index_name (str): The name of the queried index.
+        key_attributes (Iterable[str], optional): The names of the key attributes of the index items.
+        shards (int, optional): The number of shards of a sharded index, whose key maps every shard
+            (as a string) to the key of its query or None, a single DynamoDB key by default.
+
+    Returns:
+        dict: The DynamoDB key of the last item of the previous page (by shard for a sharded index).
+
+    Raises:
+        ValueError: If the token is malformed or was returned by a query of another index.
+    """
+    try:
+        token = json.loads(base64.urlsafe_b64decode(next_token + "=" * (-len(next_token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Malformed pagination token.") from e
+
+    if not isinstance(token, dict) or token.get("index") != index_name:
+        raise ValueError("Pagination token does not match the query.")
+
+    key = token.get("key")
+
+    if shards is None:
+        valid = is_dynamodb_key(key, key_attributes)
+    else:
+        valid = (
+            isinstance(key, dict)
+            and bool(key)
+            and set(key) <= {str(shard) for shard in range(shards)}
+            and all(shard_key is None or is_dynamodb_key(shard_key, key_attributes) for shard_key in key.values())
+        )
+
+    if not valid:
+        raise ValueError("Pagination token does not match the query.")
+
+    return key
+
+
+def paginate(results, limit, max_response_size, attributes=None):
+    """
+    Reads a page of items from a PynamoDB result iterator, stopping at the limit or before the page exceeds
+    the response-size budget, whichever comes first. Items are read lazily, page by page, as they are needed.
+
+    Args:
+        results (ResultIterator): The result iterator of a query, its `last_evaluated_key` points to
+            the last item read from it.
+        limit (int): The maximum number of items on the page.
+        max_response_size (int): The maximum total size of the JSON-serialized items in bytes.
+            The first item is always returned, so that the pagination makes progress.
+        attributes (Iterable[str], optional): The names of the attributes to return, all by default.
+
+    Returns:
+        tuple: The list of items (dicts of attribute values) and the key of the last returned item,
+            or None if there are no more items.
+    """
+    items = []
+    response_size = 0
+    last_evaluated_key = None
+
+    for result in results:
+        item = result.attribute_values
+
+        if attributes is not None:
+            item = {name: value for name, value in item.items() if name in attributes}
+
+        item_size = len(json.dumps(item, default=str))
+
+        if items and response_size + item_size > max_response_size:
+            # The item is not returned, the next page starts with it
+            return items, last_evaluated_key
+
+        items.append(item)
+        response_size += item_size
+        last_evaluated_key = results.last_evaluated_key
+
+        if len(items) >= limit:
+            return items, last_evaluated_key
+
+    return items, results.last_evaluated_key
@@ -0,0 +1,226 @@
+import json
+import math
+from enum import Enum
+from collections import Counter
+
+import numpy as np
+
+from battle_simulator import PokemonBattleSimulatorException
+from vectorized_battle_simulator import VectorizedBattleSimulator
+
+
+class TournamentFormat(str, Enum):
+    """Supported tournament formats."""
+
+    ROUND_ROBIN = "round_robin"
+    SINGLE_ELIMINATION = "single_elimination"
+    SWISS = "swiss"
+
+
+def count_battles(fighters_count, tournament_format, rounds=None):
+    """
+    Counts the battles of a tournament before it is simulated, e.g. to reject tournaments too large to simulate.
+
+    Args:
+        fighters_count (int): Number of fighters.
+        tournament_format (str | TournamentFormat): The format of the tournament.
+        rounds (int, optional): Number of rounds for Swiss format, log2(N) rounded up by default.
+
+    Returns:
+        int: Number of battles of the tournament.
+    """
+    tournament_format = TournamentFormat(tournament_format)
+
+    if tournament_format == TournamentFormat.ROUND_ROBIN:
+        return fighters_count * (fighters_count - 1) // 2
+    if tournament_format == TournamentFormat.SINGLE_ELIMINATION:
+        return max(fighters_count - 1, 0)
+
+    rounds = rounds or math.ceil(math.log2(max(fighters_count, 1)))
+    return rounds * (fighters_count // 2)
+
+
+class Tournament:
+    """
+    A class to simulate a whole tournament in-process, round by round.
+
+    Battles are generated lazily, so results can be streamed out without keeping
+    the full result list in memory (round-robin of N fighters has N*(N-1)/2 battles).
+
+    Attributes:
+        tournament_format (TournamentFormat): The format of the tournament.
+        standings (Counter): Number of wins of every fighter, updated as battles are generated.
+        champion (str): The tournament winner, available after all battles are generated.
+    """
+
+    def __init__(self, fighters_data, tournament_format, rounds=None, seed=None):
+        """
+        Initializes the tournament with fighters data.
+
+        Args:
+            fighters_data (dict): A dictionary with pokemon ID/name as keys
+                and their battle data as values.
+            tournament_format (str | TournamentFormat): The format of the tournament.
+            rounds (int, optional): Number of rounds for Swiss format, log2(N) rounded up by default.
+            seed (int, optional): Seed for reproducible brackets and battle outcomes.
+        """
+        self.simulator = VectorizedBattleSimulator(fighters_data=fighters_data)
+        self.tournament_format = TournamentFormat(tournament_format)
+        self.rounds = rounds or math.ceil(math.log2(len(self.simulator.fighters)))
+        self.rng = np.random.default_rng(seed)
+        self.standings = Counter(dict.fromkeys(self.simulator.fighters, 0))
+        self.champion = None
+        self._round_winners = []
+
+    def battles(self):
+        """
+        Simulates the tournament.
+
+        Yields:
+            dict: Battle result in the PokemonBattleSimulator format, with the tournament 'round'.
+        """
+        rounds = {
+            TournamentFormat.ROUND_ROBIN: self._round_robin,
+            TournamentFormat.SINGLE_ELIMINATION: self._single_elimination,
+            TournamentFormat.SWISS: self._swiss,
+        }[self.tournament_format]()
+
+        for round_number, pairs in enumerate(rounds, start=1):
+            self._round_winners = []
+
+            for battle_result in self.simulator.results(pairs=pairs, seed=self.rng):
+                self.standings[battle_result["winner"]] += 1
+                self._round_winners.append(battle_result["winner"])
+                yield {**battle_result, "round": round_number}
+
+        if self.tournament_format != TournamentFormat.SINGLE_ELIMINATION:
+            self.champion = self.standings.most_common(1)[0][0]
+
+    def _round_robin(self):
+        """
+        Pairs every fighter with every other using the circle method, N-1 rounds of N/2 battles.
+
+        Yields:
+            list: Pairs of Pokemon IDs/names for each round.
+        """
+        fighters = list(self.simulator.fighters)
+        if len(fighters) % 2:
+            fighters.append(None)  # Bye
+
+        for _ in range(len(fighters) - 1):
+            half = len(fighters) // 2
+            yield [
+                (pokemon1, pokemon2)
+                for pokemon1, pokemon2 in zip(fighters[:half], reversed(fighters[half:]))
+                if pokemon1 is not None and pokemon2 is not None
+            ]
+            # Keep the first fighter in place and rotate the others
+            fighters.insert(1, fighters.pop())
+
+    def _single_elimination(self):
+        """
+        Pairs fighters in a randomly seeded knockout bracket, an odd fighter out gets a bye.
+
+        Yields:
+            list: Pairs of Pokemon IDs/names for each round.
+        """
+        remaining = [self.simulator.fighters[index] for index in self.rng.permutation(len(self.simulator.fighters))]
+
+        while len(remaining) > 1:
+            pairs = list(zip(remaining[0::2], remaining[1::2]))
+            bye = remaining[-1:] if len(remaining) % 2 else []
+
+            yield pairs
+
+            # Winners of this round (in bracket order) advance, together with the fighter who had a bye
+            remaining = self._round_winners + bye
+
+        self.champion = remaining[0]
+
+    def _swiss(self):
+        """
+        Pairs fighters with similar scores each round, avoiding rematches where possible.
+        With an odd number of fighters, the lowest ranked fighter without a bye yet gets one.
+
+        Yields:
+            list: Pairs of Pokemon IDs/names for each round.
+        """
+        played = set()
+        byes = set()
+
+        for _ in range(self.rounds):
+            ranking = sorted(self.simulator.fighters, key=lambda pokemon_id: -self.standings[pokemon_id])
+
+            if len(ranking) % 2:
+                bye = next((pokemon_id for pokemon_id in reversed(ranking) if pokemon_id not in byes), ranking[-1])
+                byes.add(bye)
+                ranking.remove(bye)
+
+            pairs = []
+            while ranking:
+                pokemon1 = ranking.pop(0)
+                opponent_index = next(
+                    (index for index, pokemon2 in enumerate(ranking) if frozenset((pokemon1, pokemon2)) not in played),
+                    0,
+                )
+                pokemon2 = ranking.pop(opponent_index)
+                played.add(frozenset((pokemon1, pokemon2)))
+                pairs.append((pokemon1, pokemon2))
+
+            yield pairs
+
+
+def ndjson_lines(battles):
+    """
+    Serializes battle results as newline-delimited JSON.
+
+    Args:
+        battles (Iterable[dict]): Battle results.
+
+    Yields:
+        str: One JSON document per line.
+    """
+    for battle in battles:
+        yield json.dumps(battle) + "\n"
+
+
+def write_ndjson_chunks_to_s3(s3_client, bucket_name, prefix, battles, chunk_size=10000):
+    """
+    Streams battle results to S3 as NDJSON files of at most `chunk_size` battles each.
+
+    Args:
+        s3_client: The boto3 S3 client.
+        bucket_name (str): The name of the S3 bucket.
+        prefix (str): The key prefix for the chunk files.
+        battles (Iterable[dict]): Battle results.
+        chunk_size (int): Maximum number of battles per file.
+
+    Returns:
+        list: S3 keys of the written chunk files.
+    """
+    if chunk_size < 1:
+        raise PokemonBattleSimulatorException("Chunk size must be positive.")
+
+    keys = []
+    chunk = []
+
+    def flush():
+        key = f"{prefix}/part-{len(keys):05d}.ndjson"
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=key,
+            Body="".join(chunk).encode(),
+            ContentType="application/x-ndjson",
+        )
+        keys.append(key)
+        chunk.clear()
+
+    for line in ndjson_lines(battles):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    return keys
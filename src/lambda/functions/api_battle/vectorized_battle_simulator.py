@@ -0,0 +1,151 @@
+import time
+from uuid import uuid4
+from functools import cached_property
+
+import numpy as np
+
+from battle_simulator import UPSET_THRESHOLD, PokemonBattleSimulatorException
+
+# Base stats returned by PokeAPI, in the column order of the stats matrix
+STATS = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+
+
+def win_probability(stats1, stats2):
+    """
+    Calculates the exact probability of the first fighter beating the second one.
+    Works with single total stats as well as with arrays of them.
+
+    Args:
+        stats1 (int | np.ndarray): Total stats of the first fighters.
+        stats2 (int | np.ndarray): Total stats of the second fighters, broadcastable against stats1.
+
+    Returns:
+        np.ndarray: Win probabilities with values 0, 0.5 or 1.
+    """
+    upset = np.minimum(stats1, stats2) >= np.maximum(stats1, stats2) * UPSET_THRESHOLD
+    return np.where(upset, 0.5, np.greater(stats1, stats2).astype(np.float64))
+
+
+class VectorizedBattleSimulator:
+    """
+    A class to simulate many Pokemon battles at once using NumPy array operations.
+
+    Follows the same rules as PokemonBattleSimulator: the fighter with the higher total stats wins,
+    unless the weakest has >= 80% of the stats of the stronger, in which case both have a 50% chance.
+
+    Attributes:
+        fighters (list): Pokemon ID/name of every fighter, in the row order of the stats matrix.
+        stats_matrix (np.ndarray): Base stats with one row per fighter and one column per stat.
+    """
+
+    def __init__(self, fighters_data):
+        """
+        Initializes the simulator with fighters data.
+
+        Args:
+            fighters_data (dict): A dictionary with pokemon ID/name as keys
+                and their battle data as values.
+        """
+        if len(fighters_data) < 2:
+            raise PokemonBattleSimulatorException("At least two fighters are required.")
+
+        self.fighters = list(fighters_data)
+        self.fighter_index = {pokemon_id: index for index, pokemon_id in enumerate(self.fighters)}
+        self.stats_matrix = np.array(
+            [[fighter["stats"].get(stat, 0) for stat in STATS] for fighter in fighters_data.values()],
+            dtype=np.uint16,
+        )
+
+    @cached_property
+    def total_stats(self):
+        """
+        Total stats of every fighter.
+
+        Returns:
+            np.ndarray: Sum of the base stats, one value per row of the stats matrix.
+        """
+        return self.stats_matrix.sum(axis=1, dtype=np.int64)
+
+    def _indices(self, pokemon_ids):
+        """
+        Maps Pokemon IDs/names to rows of the stats matrix.
+
+        Args:
+            pokemon_ids (Iterable[str] | None): Pokemon IDs/names, all fighters if None.
+
+        Returns:
+            np.ndarray: Row indices of the requested fighters.
+        """
+        if pokemon_ids is None:
+            return np.arange(len(self.fighters))
+
+        try:
+            return np.array([self.fighter_index[pokemon_id] for pokemon_id in pokemon_ids], dtype=np.intp)
+        except KeyError as e:
+            raise PokemonBattleSimulatorException(f"Unknown fighter: {e.args[0]}")
+
+    def win_probabilities(self, pokemon_ids1=None, pokemon_ids2=None):
+        """
+        Calculates the exact probability of every row fighter beating every column fighter.
+
+        Args:
+            pokemon_ids1 (Iterable[str], optional): Row fighters, all fighters by default.
+            pokemon_ids2 (Iterable[str], optional): Column fighters, all fighters by default.
+
+        Returns:
+            np.ndarray: N×M matrix with values 0, 0.5 or 1.
+        """
+        row_stats = self.total_stats[self._indices(pokemon_ids1)][:, np.newaxis]
+        column_stats = self.total_stats[self._indices(pokemon_ids2)][np.newaxis, :]
+        return win_probability(row_stats, column_stats)
+
+    def outcomes(self, pokemon_ids1=None, pokemon_ids2=None, seed=None):
+        """
+        Simulates every row fighter against every column fighter.
+
+        Args:
+            pokemon_ids1 (Iterable[str], optional): Row fighters, all fighters by default.
+            pokemon_ids2 (Iterable[str], optional): Column fighters, all fighters by default.
+            seed (int | np.random.Generator, optional): Seed or generator for reproducible results.
+
+        Returns:
+            np.ndarray: N×M boolean matrix, True where the row fighter wins.
+        """
+        probabilities = self.win_probabilities(pokemon_ids1, pokemon_ids2)
+        rng = np.random.default_rng(seed)
+        return rng.random(probabilities.shape) < probabilities
+
+    def results(self, pairs, seed=None):
+        """
+        Simulates a list of battles and builds results in the PokemonBattleSimulator format.
+
+        Args:
+            pairs (Iterable[tuple]): Pairs of Pokemon IDs/names to fight each other.
+            seed (int | np.random.Generator, optional): Seed or generator for reproducible results.
+
+        Returns:
+            list: Battle results, including winner, opponent, and their stats.
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return []
+
+        rows, columns = (self._indices(pokemon_ids) for pokemon_ids in zip(*pairs))
+        probabilities = win_probability(self.total_stats[rows], self.total_stats[columns])
+        row_wins = np.random.default_rng(seed).random(len(pairs)) < probabilities
+
+        winners = np.where(row_wins, rows, columns)
+        opponents = np.where(row_wins, columns, rows)
+        timestamp = int(time.time())
+
+        return [
+            {
+                "id": uuid4().hex,
+                "winner": self.fighters[winner],
+                "opponent": self.fighters[opponent],
+                "timestamp": timestamp,
+                "winner_total_stats": int(self.total_stats[winner]),
+                "opponent_total_stats": int(self.total_stats[opponent]),
+            }
+            for winner, opponent in zip(winners.tolist(), opponents.tolist())
+        ]
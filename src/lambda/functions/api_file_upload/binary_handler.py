@@ -1,9 +1,11 @@
 import json
 import boto3
-import base64
+import binascii
 import logging
 from uuid import uuid4
 
+from streaming import S3StreamingUpload, iter_base64_chunks
+
 BUCKET_NAME = "YourBucketName"
 SUPPORTED_MEDIA_TYPES = {
     "image/png": "png",
@@ -48,19 +50,16 @@ def validate_request(event: dict):
 
 def decode_file_content(body: str):
     """
-    Decode the file content from the request body.
+    Decode the file content from the request body in chunks, so the whole file is never in memory.
 
     Args:
         body: The base64-encoded body of the request.
 
     Returns:
-        bytes: The decoded file content.
+        Iterator[bytes]: Decoded chunks of the file content,
+            binascii.Error is raised while iterating if the body is not valid base64.
     """
-    try:
-        return base64.b64decode(body, validate=True)
-    except Exception as error:
-        logger.exception(f"Error decoding file content: {error}")
-        return None
+    return iter_base64_chunks(body)
 
 
 def lambda_handler(event, context):  # noqa pylint: disable=unused-argument
@@ -77,24 +76,27 @@ def lambda_handler(event, context):  # noqa pylint: disable=unused-argument
             "body": json.dumps(f"Unsupported media type: {content_type}"),
         }
 
-    # Decode the file content
-    file_content = decode_file_content(body=event["body"])
+    # Decode the file content and upload it to S3 chunk by chunk
+    s3_key = f"{uuid4().hex}.{SUPPORTED_MEDIA_TYPES[content_type]}"
+    upload = S3StreamingUpload(s3_client=s3_client, bucket_name=BUCKET_NAME, key=s3_key, content_type=content_type)
+
+    try:
+        for chunk in decode_file_content(body=event["body"]):
+            upload.write(chunk)
 
-    if file_content is None:
+        file_size = upload.complete()
+    except binascii.Error as error:
+        logger.exception(f"Error decoding file content: {error}")
+        upload.abort()
         return {
             "statusCode": 400,
             "body": json.dumps("Error decoding file content."),
         }
+    except Exception:
+        upload.abort()
+        raise
 
-    # Upload the file to S3
-    s3_key = f"{uuid4().hex}.{SUPPORTED_MEDIA_TYPES[content_type]}"
-    s3_client.put_object(
-        Bucket=BUCKET_NAME,
-        Key=s3_key,
-        Body=file_content,
-        ContentType=SUPPORTED_MEDIA_TYPES[content_type],
-    )
-    logger.info(f"File uploaded successfully with Key: {s3_key}")
+    logger.info(f"File uploaded successfully with Key: {s3_key}, size: {file_size}")
 
     return {
         "statusCode": 201,
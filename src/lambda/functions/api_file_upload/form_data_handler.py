@@ -1,12 +1,12 @@
-import base64
-import cgi
-import io
 import json
+import binascii
 import logging
 from uuid import uuid4
 
 import boto3
 
+from streaming import MultipartParser, S3StreamingUpload, iter_base64_chunks, parse_header_params
+
 BUCKET_NAME = "YourBucketName"
 SUPPORTED_MEDIA_TYPES = {
     "image/png": "png",
@@ -49,28 +49,75 @@ def validate_request(event: dict):
     return content_type, None
 
 
-def get_file_from_request_body(content_type: str, body: str):
+def upload_file_from_request_body(content_type: str, body: str):
     """
-    Get the file from the request body.
+    Upload the file from the request body to S3. The body is decoded and parsed in chunks
+    and the file is uploaded as it is parsed, so the whole file is never in memory.
+    The upload is completed only after the whole body was parsed, otherwise it is aborted.
 
     Args:
-        content_type: The content type of the file.
+        content_type: The content type of the request, with the multipart boundary.
         body: The base64-encoded body of the request.
 
     Returns:
-        FieldStorage: The file item from the request body.
+        tuple: A tuple containing the S3 key of the uploaded file and an error response.
     """
-    try:
-        fp = io.BytesIO(base64.b64decode(body))
-        environ = {"REQUEST_METHOD": "POST"}
-        headers = {
-            "content-type": content_type,
-        }
+    upload = None
+    is_file_part = False
+    completed = False
 
-        fs = cgi.FieldStorage(fp=fp, environ=environ, headers=headers)
-        return fs["file"]
-    except Exception as error:
+    try:
+        parser = MultipartParser.from_content_type(content_type)
+
+        for chunk in iter_base64_chunks(body):
+            for event, value in parser.feed(chunk):
+                if event == "part":
+                    disposition = parse_header_params(value.get("content-disposition", ""), "content-disposition")
+                    field_name = disposition.get_param("name", header="content-disposition")
+                    # Only the first 'file' field is uploaded
+                    is_file_part = upload is None and field_name == "file"
+
+                    if not is_file_part:
+                        continue
+
+                    file_type = value.get("content-type")
+
+                    if file_type not in SUPPORTED_MEDIA_TYPES:
+                        return None, {
+                            "statusCode": 400,
+                            "body": json.dumps(f"Unsupported media type: {file_type}"),
+                        }
+
+                    upload = S3StreamingUpload(
+                        s3_client=s3_client,
+                        bucket_name=BUCKET_NAME,
+                        key=f"{uuid4().hex}.{SUPPORTED_MEDIA_TYPES[file_type]}",
+                        content_type=file_type,
+                    )
+                elif event == "data" and is_file_part:
+                    upload.write(value)
+                elif event == "end":
+                    is_file_part = False
+
+        # A truncated body is rejected, even if the file part ended before it
+        parser.close()
+
+        if upload is not None:
+            file_size = upload.complete()
+            completed = True
+            logger.info(f"File uploaded successfully with Key: {upload.key}, size: {file_size}")
+            return upload.key, None
+    except (binascii.Error, ValueError) as error:
         logger.exception(f"Error decoding file content: {error}")
+    finally:
+        # Parts of an upload, which was not completed, are not kept (and billed)
+        if upload is not None and not completed:
+            upload.abort()
+
+    return None, {
+        "statusCode": 400,
+        "body": json.dumps("No file content found in the request"),
+    }
 
 
 def lambda_handler(event, context):  # noqa pylint: disable=unused-argument
@@ -80,29 +127,11 @@ def lambda_handler(event, context):  # noqa pylint: disable=unused-argument
     if error_response:
         return error_response
 
-    # Verify the media type and get the file item
-    file_item = get_file_from_request_body(content_type=content_type, body=event["body"])
-
-    if file_item is None:
-        return {
-            "statusCode": 400,
-            "body": json.dumps("No file content found in the request"),
-        }
-    if file_item.type not in SUPPORTED_MEDIA_TYPES:
-        return {
-            "statusCode": 400,
-            "body": json.dumps(f"Unsupported media type: {file_item.type}"),
-        }
+    # Verify the media type and upload the file to S3 while it is parsed
+    s3_key, error_response = upload_file_from_request_body(content_type=content_type, body=event["body"])
 
-    # Upload the file to S3
-    s3_key = f"{uuid4().hex}.{SUPPORTED_MEDIA_TYPES[file_item.type]}"
-    s3_client.put_object(
-        Bucket=BUCKET_NAME,
-        Key=s3_key,
-        Body=file_item.file.read(),
-        ContentType=file_item.type,
-    )
-    logger.info(f"File uploaded successfully with Key: {s3_key}")
+    if error_response:
+        return error_response
 
     return {
         "statusCode": 201,
@@ -0,0 +1,276 @@
+import base64
+from email.message import Message
+
+# Number of base64 characters decoded at once (a multiple of 4), i.e. 48 KiB of file content
+BASE64_CHUNK_SIZE = 64 * 1024
+# Size of parts of S3 multipart uploads, the minimum allowed by S3 (except the last part)
+PART_SIZE = 5 * 1024 * 1024
+# Maximum size of the headers of a multipart/form-data part
+MAX_HEADERS_SIZE = 16 * 1024
+
+
+def iter_base64_chunks(body, chunk_size=BASE64_CHUNK_SIZE):
+    """
+    Decodes a base64-encoded body in chunks, so the whole decoded content is never in memory.
+    Whitespace (e.g. line breaks of MIME base64) is removed from every chunk before it is decoded.
+
+    Args:
+        body (str): The base64-encoded body.
+        chunk_size (int): The number of base64 characters decoded at once, a multiple of 4.
+
+    Yields:
+        bytes: Decoded chunks of the body.
+
+    Raises:
+        binascii.Error: If the body is not valid base64.
+    """
+    pending = ""
+
+    for start in range(0, len(body), chunk_size):
+        pending += "".join(body[start : start + chunk_size].split())
+        # Characters after the last complete quantum of 4 are decoded with the next chunk
+        length = len(pending) - len(pending) % 4
+
+        if length:
+            yield base64.b64decode(pending[:length], validate=True)
+            pending = pending[length:]
+
+    if pending:
+        yield base64.b64decode(pending, validate=True)
+
+
+def parse_header_params(value, header="content-type"):
+    """
+    Parses a header with parameters, e.g. 'multipart/form-data; boundary=xyz'.
+
+    Returns:
+        Message: The message with the header, its parameters are read with `get_param`.
+    """
+    message = Message()
+    message[header] = value
+    return message
+
+
+class MultipartParser:
+    """
+    Streaming multipart/form-data parser: chunks of the body are fed as they are decoded and the parser
+    emits parts with their content in chunks, so a file part is never buffered whole. Only the end
+    of the data, which can be the beginning of a split delimiter, is kept between chunks.
+    """
+
+    PREAMBLE = "preamble"
+    DELIMITER = "delimiter"
+    HEADERS = "headers"
+    BODY = "body"
+    EPILOGUE = "epilogue"
+
+    def __init__(self, boundary):
+        """
+        Args:
+            boundary (str): The boundary of the parts, from the Content-Type header.
+        """
+        self.delimiter = b"--" + boundary.encode()
+        self.body_delimiter = b"\r\n" + self.delimiter
+        self.buffer = bytearray()
+        self.state = self.PREAMBLE
+
+    @classmethod
+    def from_content_type(cls, content_type):
+        """
+        Creates a parser for a request with a given Content-Type header.
+
+        Raises:
+            ValueError: If the content type is not multipart/form-data with a boundary.
+        """
+        message = parse_header_params(content_type)
+        boundary = message.get_param("boundary")
+
+        if message.get_content_type() != "multipart/form-data" or not boundary:
+            raise ValueError(f"Not a multipart/form-data content type: {content_type}")
+
+        return cls(boundary=boundary)
+
+    def _take(self, length, skip=0):
+        data = bytes(self.buffer[:length])
+        del self.buffer[: length + skip]
+        return data
+
+    def feed(self, chunk):
+        """
+        Parses a chunk of the body.
+
+        Args:
+            chunk (bytes): The next chunk of the body.
+
+        Returns:
+            list: Events of the chunk: ('part', headers) at the start of a part, with a dict of lower-case header
+                names and values, ('data', bytes) for every chunk of its content and ('end', None) at its end.
+
+        Raises:
+            ValueError: If the body is not valid multipart/form-data.
+        """
+        self.buffer += chunk
+        events = []
+
+        while True:
+            if self.state == self.PREAMBLE:
+                index = self.buffer.find(self.delimiter)
+
+                if index < 0:
+                    # The end of the buffer can be the beginning of the first delimiter
+                    self._take(max(len(self.buffer) - len(self.delimiter) + 1, 0))
+                    return events
+
+                self._take(0, skip=index + len(self.delimiter))
+                self.state = self.DELIMITER
+
+            elif self.state == self.DELIMITER:
+                if len(self.buffer) < 2:
+                    return events
+
+                if self.buffer.startswith(b"--"):
+                    self.state = self.EPILOGUE
+                elif self.buffer.startswith(b"\r\n"):
+                    self._take(0, skip=2)
+                    self.state = self.HEADERS
+                else:
+                    raise ValueError("Malformed multipart delimiter.")
+
+            elif self.state == self.HEADERS:
+                index = self.buffer.find(b"\r\n\r\n")
+
+                if index < 0:
+                    if len(self.buffer) > MAX_HEADERS_SIZE:
+                        raise ValueError("Multipart part headers are too large.")
+                    return events
+
+                headers = {}
+
+                for line in self._take(index, skip=4).decode("utf-8", errors="replace").split("\r\n"):
+                    name, separator, value = line.partition(":")
+
+                    if not separator:
+                        raise ValueError(f"Malformed multipart part header: {line}")
+
+                    headers[name.strip().lower()] = value.strip()
+
+                events.append(("part", headers))
+                self.state = self.BODY
+
+            elif self.state == self.BODY:
+                index = self.buffer.find(self.body_delimiter)
+
+                if index < 0:
+                    # The end of the buffer can be the beginning of the delimiter, the rest is content
+                    length = len(self.buffer) - len(self.body_delimiter) + 1
+
+                    if length > 0:
+                        events.append(("data", self._take(length)))
+                    return events
+
+                if index:
+                    events.append(("data", self._take(index)))
+
+                self._take(0, skip=len(self.body_delimiter))
+                events.append(("end", None))
+                self.state = self.DELIMITER
+
+            else:
+                self.buffer.clear()
+                return events
+
+    def close(self):
+        """
+        Checks that the whole body was parsed.
+
+        Raises:
+            ValueError: If the body ended before the closing delimiter.
+        """
+        if self.state != self.EPILOGUE:
+            raise ValueError("Multipart body is incomplete.")
+
+
+class S3StreamingUpload:
+    """
+    Upload of a file to S3 from chunks of its content. The content is buffered up to a part, which is uploaded
+    with S3 multipart upload, so the memory is bounded by the part size, not by the file size.
+    Files smaller than a part are uploaded with a single request.
+    """
+
+    def __init__(self, s3_client, bucket_name, key, content_type, part_size=PART_SIZE):
+        """
+        Args:
+            s3_client: The boto3 S3 client.
+            bucket_name (str): The name of the S3 bucket.
+            key (str): The S3 key of the file.
+            content_type (str): The media type of the file.
+            part_size (int): The size of the uploaded parts, at least 5 MiB.
+        """
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+        self.size = 0
+
+    def _upload_part(self, data):
+        if self.upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, ContentType=self.content_type
+            )
+            self.upload_id = response["UploadId"]
+
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=data
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def write(self, data):
+        """
+        Adds a chunk of the content, uploading the buffered parts.
+
+        Args:
+            data (bytes): The next chunk of the content.
+        """
+        self.buffer += data
+        self.size += len(data)
+
+        while len(self.buffer) >= self.part_size:
+            part = bytes(self.buffer[: self.part_size])
+            del self.buffer[: self.part_size]
+            self._upload_part(part)
+
+    def complete(self):
+        """
+        Uploads the rest of the content and completes the upload.
+
+        Returns:
+            int: The size of the file in bytes.
+        """
+        if self.upload_id is None:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name, Key=self.key, Body=bytes(self.buffer), ContentType=self.content_type
+            )
+        else:
+            if self.buffer:
+                self._upload_part(bytes(self.buffer))
+
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts}
+            )
+
+        self.buffer.clear()
+        return self.size
+
+    def abort(self):
+        """Aborts the upload, so the uploaded parts are not kept (and billed)."""
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id)
+            self.upload_id = None
+
+        self.buffer.clear()
@@ -5,7 +5,10 @@ from aws_lambda_powertools.event_handler import APIGatewayRestResolver, Response
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
 from data_validation_ext import ExceptionHandlers
+from cache.serializers import MsgPackSerializer
 from poke_api.client import PokeAPIClient
+from poke_api.resilience import CircuitBreaker, PokeAPIUnavailableError, TokenBucket
+from poke_api.snapshot import load_snapshot
 from poke_cache_utils import get_cache_client, fetch_pokemon_data_with_caching
 
 
@@ -13,10 +16,18 @@ from poke_cache_utils import get_cache_client, fetch_pokemon_data_with_caching
 logger = Logger()
 app = APIGatewayRestResolver()
 exception_handlers = ExceptionHandlers(app=app, logger=logger)
-# Initialize client for Cache based on DynamoDB table
-cache_cli = get_cache_client(db_type="dynamodb")
-# Initialize client for PokeAPI
-poke_cli = PokeAPIClient()
+# Initialize client for Cache based on DynamoDB table, with in-process cache shared by warm invocations
+# and compact binary values (entries stored as JSON are still readable)
+cache_cli = get_cache_client(db_type="dynamodb", l1_cache=True, serializer=MsgPackSerializer(compress=True))
+# Initialize client for PokeAPI, failing fast while PokeAPI is unavailable,
+# the circuit breaker state is shared by all containers through the cache table
+poke_cli = PokeAPIClient(
+    rate_limiter=TokenBucket(rate=20, capacity=50),
+    circuit_breaker=CircuitBreaker(name="pokeapi", cache_cli=cache_cli),
+)
+# Open the offline Pokédex snapshot shipped in the Data Layer (if it was built),
+# Pokémon missing in it are read from the cache or fetched from PokeAPI
+snapshot = load_snapshot()
 
 
 # --------------------------------------------------------------- Validation error handlers
@@ -30,10 +41,18 @@ def handle_not_found_error(exc):
     return exception_handlers.not_found(exc)
 
 
+@app.exception_handler(PokeAPIUnavailableError)
+def handle_poke_api_unavailable_error(exc):
+    logger.info(f"PokeAPI client metrics: {poke_cli.metrics}")
+    return exception_handlers.service_unavailable(exc)
+
+
 # --------------------------------------------------------------- API Resources
 @app.get("/v1/pokemon/<pokemon_id>")
 def fetch_pokemon_data(pokemon_id):
-    pokemon_data = fetch_pokemon_data_with_caching(cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id=str(pokemon_id))
+    pokemon_data = fetch_pokemon_data_with_caching(
+        cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id=str(pokemon_id), snapshot=snapshot
+    )
     logger.info(f"{pokemon_data=}")
 
     return Response(
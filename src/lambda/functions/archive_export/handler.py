@@ -0,0 +1,153 @@
+import io
+import os
+import json
+import logging
+from datetime import datetime, timedelta, UTC
+
+import boto3
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from db_models import DAY_SHARDS, BattleModel
+from parallel_scan import AdaptiveCapacityLimiter, ParallelScan
+from poke_cache_utils import get_cache_client
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME")
+# Battles are archived by day in Hive-style partitions: <prefix>/date=YYYY-MM-DD/part-<segment>-<part>.parquet
+ARCHIVE_PREFIX = "archive/battles"
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("timestamp", pa.int64()),
+        ("winner", pa.string()),
+        ("opponent", pa.string()),
+        ("winner_total_stats", pa.int64()),
+        ("opponent_total_stats", pa.int64()),
+    ]
+)
+# Battles of a day are read from the shards of the day GSI, each shard by its own worker. Query pages are limited
+# to 1 MB by DynamoDB, so pages are buffered as compact rows until they fill a Parquet part of PART_SIZE battles,
+# which keeps the number of files low, while the buffers of all shards fit in the memory of the function
+QUERY_PAGE_SIZE = 10_000
+PART_SIZE = int(os.environ.get("ARCHIVE_PART_SIZE", "200000"))
+# Maximum read capacity units consumed per second by the export, unlimited if not set
+READ_RATE_LIMIT = float(os.environ["ARCHIVE_READ_RATE_LIMIT"]) if os.environ.get("ARCHIVE_READ_RATE_LIMIT") else None
+# Progress of an interrupted export is stored in the cache table, so the next run resumes from it
+CHECKPOINT_KEY = "archive#battles#{date}"
+CHECKPOINT_TTL = 7 * 86400
+# The run stops before the Lambda timeout, leaving enough time to write the current parts
+STOP_BEFORE_TIMEOUT_MS = 120_000
+
+s3_client = boto3.client("s3")
+cache_cli = get_cache_client(db_type="dynamodb")
+
+
+def archive_row(battle):
+    """
+    Converts a battle to a row of the archive, a tuple is much smaller than the model instance while it is buffered.
+
+    Args:
+        battle (BattleModel): The battle.
+
+    Returns:
+        tuple: The values of the columns of ARCHIVE_SCHEMA.
+    """
+    return tuple(getattr(battle, name) for name in ARCHIVE_SCHEMA.names)
+
+
+def write_part(date, segment, part, rows):
+    """
+    Writes battles to S3 as a compressed Parquet file.
+
+    Args:
+        date (str): The day of the battles.
+        segment (int): The shard of the day GSI, from which the battles were read.
+        part (int): The number of the part of the shard.
+        rows (list): The battles as rows of the archive (see `archive_row`).
+
+    Returns:
+        str: The S3 key of the file.
+    """
+    key = f"{ARCHIVE_PREFIX}/date={date}/part-{segment:03d}-{part:05d}.parquet"
+    columns = dict(zip(ARCHIVE_SCHEMA.names, map(list, zip(*rows))))
+    buffer = io.BytesIO()
+    pq.write_table(pa.table(columns, schema=ARCHIVE_SCHEMA), buffer, compression="zstd")
+    s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=buffer.getvalue())
+    return key
+
+
+def export_battles(date, should_stop):
+    """
+    Exports battles of a day to S3 as Parquet files. Every shard of the day GSI is read with its own query,
+    pages are buffered until they fill a part, after which the key from which the shard continues is checkpointed,
+    so an interrupted export resumes from the last written part (pages read again are written as the same part).
+
+    Args:
+        date (str): The day of the battles.
+        should_stop (callable): Returns True when the export has to stop.
+
+    Returns:
+        dict: The result of the parallel scan, with the number of exported battles as 'written'.
+    """
+    scan = ParallelScan(
+        model=BattleModel,
+        transform=archive_row,
+        total_segments=DAY_SHARDS,
+        page_size=QUERY_PAGE_SIZE,
+        rate_limiter=AdaptiveCapacityLimiter(rate=READ_RATE_LIMIT) if READ_RATE_LIMIT else None,
+        cache_cli=cache_cli,
+        checkpoint_key=CHECKPOINT_KEY.format(date=date),
+        checkpoint_ttl=CHECKPOINT_TTL,
+        checkpoint_interval=0,
+        query=lambda segment: {
+            "IndexName": BattleModel.day_shard_timestamp_index.Meta.index_name,
+            "KeyConditionExpression": "day_shard = :day_shard",
+            "ExpressionAttributeValues": {":day_shard": {"S": f"{date}#{segment}"}},
+        },
+        writer=lambda segment, part, rows: write_part(date, segment, part, rows),
+        part_size=PART_SIZE,
+    )
+    return scan.run(should_stop=should_stop)
+
+
+def lambda_handler(event, context):
+    """
+    Exports battles of a day (the previous day by default, or the 'date' of the event) to the archive.
+    The function runs on a schedule, runs after a completed export do nothing.
+    """
+    date = event.get("date") or (datetime.now(UTC) - timedelta(days=1)).strftime("%Y-%m-%d")
+    checkpoint = cache_cli.get(key=CHECKPOINT_KEY.format(date=date))
+
+    if checkpoint and checkpoint["completed"]:
+        logger.info(f"Battles of {date} are already archived")
+        return {"statusCode": 200, "body": json.dumps({"date": date, "completed": True})}
+
+    logger.info(f"Archiving battles of {date}")
+    result = export_battles(
+        date=date,
+        should_stop=lambda: context.get_remaining_time_in_millis() < STOP_BEFORE_TIMEOUT_MS,
+    )
+
+    if result["completed"]:
+        # Marks the partition as complete for readers, files starting with '_' are ignored by query engines
+        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=f"{ARCHIVE_PREFIX}/date={date}/_SUCCESS", Body=b"")
+
+    logger.info(
+        f"Archived {result['written']} battles of {date} in {result['elapsed_seconds']}s, "
+        f"completed: {result['completed']}"
+    )
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps(
+            {
+                "date": date,
+                "exported_count": result["written"],
+                "elapsed_seconds": result["elapsed_seconds"],
+                "completed": result["completed"],
+            }
+        ),
+    }
@@ -0,0 +1,72 @@
+import os
+import json
+import logging
+
+from db_models import BattleModel, day_shard_key, winner_shard_key
+from parallel_scan import AdaptiveCapacityLimiter, ParallelScan
+from poke_cache_utils import get_cache_client
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# The battle table is scanned in segments, each by its own worker
+TOTAL_SEGMENTS = 8
+# Capacity units consumed per second by the backfill, it slows down when DynamoDB throttles it
+INITIAL_CAPACITY_RATE = float(os.environ.get("BACKFILL_INITIAL_CAPACITY_RATE", "50"))
+MAX_CAPACITY_RATE = float(os.environ.get("BACKFILL_MAX_CAPACITY_RATE", "200"))
+# Progress of an interrupted backfill is stored in the cache table, so the next run resumes from it
+CHECKPOINT_KEY = "backfill#shard_keys"
+# The run stops before the Lambda timeout, leaving enough time to write the current pages
+STOP_BEFORE_TIMEOUT_MS = 60_000
+
+cache_cli = get_cache_client(db_type="dynamodb")
+
+
+def add_shard_keys(battle):
+    """
+    Sets the sharded GSI keys of a battle created before the sharded GSIs (or before the number of shards
+    was changed).
+
+    Args:
+        battle (BattleModel): The scanned battle.
+
+    Returns:
+        BattleModel: The battle with 'winner_shard' and 'day_shard', or None if it already has the right keys.
+    """
+    shard_keys = {
+        "winner_shard": winner_shard_key(battle.winner, battle.id),
+        "day_shard": day_shard_key(battle.timestamp, battle.id),
+    }
+
+    if all(getattr(battle, name) == shard_key for name, shard_key in shard_keys.items()):
+        return None
+
+    for name, shard_key in shard_keys.items():
+        setattr(battle, name, shard_key)
+    return battle
+
+
+def lambda_handler(event, context):
+    """
+    Backfills 'winner_shard' and 'day_shard' of existing battles, so they appear in the sharded GSIs.
+    It is invoked until the result is completed, every run resumes from the checkpoint of the previous one.
+    Battles created during the backfill already have the keys, the backfill skips them.
+    """
+    checkpoint = cache_cli.get(key=CHECKPOINT_KEY)
+
+    # A completed backfill is not run again, unless it is forced (e.g. after WINNER_SHARDS was changed)
+    if checkpoint and checkpoint["completed"] and not event.get("force"):
+        logger.info("Backfill of shard keys is already completed")
+        return {"statusCode": 200, "body": json.dumps({"completed": True})}
+
+    scan = ParallelScan(
+        model=BattleModel,
+        transform=add_shard_keys,
+        total_segments=TOTAL_SEGMENTS,
+        rate_limiter=AdaptiveCapacityLimiter(rate=INITIAL_CAPACITY_RATE, max_rate=MAX_CAPACITY_RATE),
+        cache_cli=cache_cli,
+        checkpoint_key=CHECKPOINT_KEY,
+    )
+    result = scan.run(should_stop=lambda: context.get_remaining_time_in_millis() < STOP_BEFORE_TIMEOUT_MS)
+
+    return {"statusCode": 200, "body": json.dumps(result)}
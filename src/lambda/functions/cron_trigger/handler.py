@@ -1,12 +1,131 @@
+import os
 import json
+import time
 import logging
 from datetime import datetime, UTC
+from concurrent.futures import ThreadPoolExecutor
+
+from cache.serializers import MsgPackSerializer
+from poke_api.client import PokeAPIClient
+from poke_api.resilience import CircuitBreaker, PokeAPIUnavailableError, TokenBucket
+from poke_cache_utils import get_cache_client, cache_pokemon_entries, fetch_pokemon_cache_entry, resolve_pokemon_keys
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Number of Pokémon fetched and written to the cache per page
+PAGE_SIZE = 100
+# Maximum number of concurrent requests to PokeAPI
+MAX_WORKERS = 8
+# Maximum number of requests per second to PokeAPI
+REQUESTS_PER_SECOND = 20
+# Progress of an interrupted run is stored in the cache table, so the next run resumes from it
+CHECKPOINT_KEY = "prewarm#checkpoint"
+CHECKPOINT_TTL = 86400
+# The run stops before the Lambda timeout, leaving enough time to finish the current page
+STOP_BEFORE_TIMEOUT_MS = 60_000
+# Optional JSON file with the list of Pokémon IDs/names to pre-warm, instead of the whole PokeAPI list
+MANIFEST_PATH = os.environ.get("PREWARM_MANIFEST_PATH")
+
+# Initialize client for Cache based on DynamoDB table, with compact binary values
+cache_cli = get_cache_client(db_type="dynamodb", serializer=MsgPackSerializer(compress=True))
+# Initialize client for PokeAPI, with requests spaced evenly and a circuit breaker shared with the API functions
+poke_cli = PokeAPIClient(
+    rate_limiter=TokenBucket(rate=REQUESTS_PER_SECOND, capacity=1, max_wait=60),
+    circuit_breaker=CircuitBreaker(name="pokeapi", cache_cli=cache_cli),
+)
+
+
+def iter_pages(offset):
+    """
+    Iterates over pages of Pokémon IDs/names to pre-warm, starting from the offset.
+
+    Args:
+        offset (int): The number of Pokémon to skip.
+
+    Yields:
+        tuple: The offset of the page and the list of Pokémon IDs/names on it.
+
+    """
+    if MANIFEST_PATH:
+        with open(MANIFEST_PATH) as manifest:
+            pokemon_ids = [str(pokemon_id) for pokemon_id in json.load(manifest)]
+
+        for page_offset in range(offset, len(pokemon_ids), PAGE_SIZE):
+            yield page_offset, pokemon_ids[page_offset : page_offset + PAGE_SIZE]
+        return
+
+    while True:
+        page = poke_cli.list_pokemon(limit=PAGE_SIZE, offset=offset)
+
+        if page is None:
+            raise RuntimeError(f"Pokemon list could not be fetched, offset: {offset}")
+
+        yield offset, [pokemon["name"] for pokemon in page["results"]]
+
+        if not page["next"]:
+            return
+
+        offset += PAGE_SIZE
+
 
 def lambda_handler(event, context):
     now = datetime.now(UTC).strftime("%m/%d/%Y, %H:%M:%S")
     logger.info(f"Event received at {now}")
-    return {"statusCode": 200, "body": json.dumps("Event processed.")}
+
+    checkpoint = cache_cli.get(key=CHECKPOINT_KEY) or {"offset": 0, "completed": True}
+    offset = 0 if checkpoint["completed"] else checkpoint["offset"]
+    logger.info(f"Pre-warming Pokemon cache from offset: {offset}")
+
+    def fetch(pokemon_id, cached_entry):
+        return fetch_pokemon_cache_entry(poke_cli=poke_cli, pokemon_id=pokemon_id, cached_entry=cached_entry)
+
+    started_at = time.monotonic()
+    warmed_count = 0
+    completed = True
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        try:
+            for page_offset, pokemon_ids in iter_pages(offset=offset):
+                # Cached Pokémon are revalidated with conditional requests, so unchanged data is not downloaded again
+                keys = resolve_pokemon_keys(cache_cli, pokemon_ids)
+                cached_entries = cache_cli.get_many_entries(keys=keys.values())
+                page_entries = [cached_entries.get(keys[pokemon_id]) for pokemon_id in pokemon_ids]
+                entries = [entry for entry in executor.map(fetch, pokemon_ids, page_entries) if entry]
+                # Pokémon data is cached by name, IDs are added to the alias index
+                cache_pokemon_entries(cache_cli=cache_cli, entries=entries)
+
+                warmed_count += len(entries)
+                offset = page_offset + len(pokemon_ids)
+                cache_cli.set(key=CHECKPOINT_KEY, value={"offset": offset, "completed": False}, ttl=CHECKPOINT_TTL)
+
+                if context.get_remaining_time_in_millis() < STOP_BEFORE_TIMEOUT_MS:
+                    completed = False
+                    break
+        except PokeAPIUnavailableError as e:
+            # The checkpoint of the last cached page is kept, so the next run resumes from it
+            logger.warning(f"Pre-warming stopped, PokeAPI is unavailable: {str(e)}")
+            completed = False
+
+    cache_cli.set(key=CHECKPOINT_KEY, value={"offset": offset, "completed": completed}, ttl=CHECKPOINT_TTL)
+
+    elapsed = time.monotonic() - started_at
+    throughput = warmed_count / elapsed if elapsed else 0.0
+    logger.info(
+        f"Pre-warmed {warmed_count} Pokemon in {elapsed:.1f}s ({throughput:.1f} Pokemon/s), "
+        f"offset: {offset}, completed: {completed}, PokeAPI client: {poke_cli.metrics}"
+    )
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps(
+            {
+                "warmed_count": warmed_count,
+                "elapsed_seconds": round(elapsed, 1),
+                "pokemon_per_second": round(throughput, 1),
+                "offset": offset,
+                "completed": completed,
+                "poke_api": poke_cli.metrics,
+            }
+        ),
+    }
@@ -0,0 +1,82 @@
+import os
+import json
+import logging
+
+from db_models import BattleModel
+from parallel_scan import AdaptiveCapacityLimiter, ParallelScan
+from poke_cache_utils import get_cache_client
+
+from handler import add_battle_to_summaries
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# The battle table is scanned in segments, each by its own worker, workers adding battles of the same Pokémon
+# conflict, so there are fewer of them than in the backfill of shard keys and they retry more often
+TOTAL_SEGMENTS = 4
+SUMMARY_UPDATE_ATTEMPTS = 10
+# Capacity units consumed per second by the scan, it slows down when DynamoDB throttles it
+INITIAL_CAPACITY_RATE = float(os.environ.get("BACKFILL_INITIAL_CAPACITY_RATE", "50"))
+MAX_CAPACITY_RATE = float(os.environ.get("BACKFILL_MAX_CAPACITY_RATE", "200"))
+# Progress of an interrupted backfill is stored in the cache table, so the next run resumes from it
+CHECKPOINT_KEY = "backfill#summaries#{before}"
+# The run stops before the Lambda timeout, leaving enough time to write the current pages
+STOP_BEFORE_TIMEOUT_MS = 60_000
+
+cache_cli = get_cache_client(db_type="dynamodb")
+
+
+def battle_adder(before):
+    """
+    Builds the transform of the scan, which adds battles created before the stream trigger to the summaries.
+    Their markers are kept forever, as no other run adds them, so the backfill can be run again at any time.
+
+    Args:
+        before (int): The timestamp of the deployment of the stream trigger, newer battles are skipped.
+
+    Returns:
+        callable: The transform, which adds a scanned battle and writes nothing to the battle table.
+    """
+
+    def add_battle(battle):
+        if battle.timestamp < before:
+            add_battle_to_summaries(
+                {"id": battle.id, "timestamp": battle.timestamp, "winner": battle.winner, "opponent": battle.opponent},
+                marker_ttl=None,
+                attempts=SUMMARY_UPDATE_ATTEMPTS,
+            )
+        return None
+
+    return add_battle
+
+
+def lambda_handler(event, context):
+    """
+    Backfills the summaries with battles created before the stream trigger was deployed, which counts only
+    the battles inserted since then. It is invoked with the same 'before' timestamp until the result
+    is completed, every run resumes from the checkpoint of the previous one.
+    Battles already added (by a previous run, or by the trigger within the TTL of its markers) are skipped.
+    """
+    before = event.get("before")
+
+    if not isinstance(before, int) or before <= 0:
+        return {"statusCode": 400, "body": json.dumps({"message": "'before' must be a positive timestamp."})}
+
+    checkpoint_key = CHECKPOINT_KEY.format(before=before)
+    checkpoint = cache_cli.get(key=checkpoint_key)
+
+    if checkpoint and checkpoint["completed"]:
+        logger.info(f"Backfill of summaries before {before} is already completed")
+        return {"statusCode": 200, "body": json.dumps({"completed": True})}
+
+    scan = ParallelScan(
+        model=BattleModel,
+        transform=battle_adder(before),
+        total_segments=TOTAL_SEGMENTS,
+        rate_limiter=AdaptiveCapacityLimiter(rate=INITIAL_CAPACITY_RATE, max_rate=MAX_CAPACITY_RATE),
+        cache_cli=cache_cli,
+        checkpoint_key=checkpoint_key,
+    )
+    result = scan.run(should_stop=lambda: context.get_remaining_time_in_millis() < STOP_BEFORE_TIMEOUT_MS)
+
+    return {"statusCode": 200, "body": json.dumps(result)}
@@ -1,15 +1,155 @@
 import json
 import logging
+from datetime import timedelta
+
+from pynamodb.connection import Connection
+from pynamodb.exceptions import TransactWriteError
+from pynamodb.transactions import TransactWrite
+
+from db_models import PokemonSummaryModel, leaderboard_shard_key
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Markers of battles added to the aggregates live longer than records in the stream (24 hours), so that
+# a retried batch never adds a battle twice
+BATTLE_MARKER_TTL = timedelta(days=2)
+# Attempts to add a battle to summaries changed by concurrent battles
+SUMMARY_UPDATE_ATTEMPTS = 3
+
+connection = Connection()
+
+
+def summary_aggregates(summary, won):
+    """
+    Computes the aggregates of a Pokémon after a battle.
+
+    Args:
+        summary (PokemonSummaryModel): The current summary of the Pokémon, None if it has no battles yet.
+        won (bool): Whether the Pokémon won the battle.
+
+    Returns:
+        dict: The new 'wins', 'losses', 'battles' and 'win_rate'.
+    """
+    wins = ((summary.wins or 0) if summary else 0) + int(won)
+    losses = ((summary.losses or 0) if summary else 0) + int(not won)
+    battles = ((summary.battles or 0) if summary else 0) + 1
+
+    return {"wins": wins, "losses": losses, "battles": battles, "win_rate": round(wins / battles, 4)}
+
+
+def add_battle_to_summaries(battle, marker_ttl=BATTLE_MARKER_TTL, attempts=SUMMARY_UPDATE_ATTEMPTS):
+    """
+    Adds a battle to the aggregates of its winner and opponent in a single transaction, together with
+    a marker of the battle, which makes it idempotent: a battle, which was already added, is skipped.
+    The aggregates, including the win rate, are written as values computed from the current summaries,
+    on condition that the summaries were not changed in the meantime, otherwise the transaction is retried.
+    The last battle is kept if the added battle is older, e.g. when past battles are backfilled.
+
+    Args:
+        battle (dict): The battle with 'id', 'timestamp', 'winner' and 'opponent'.
+        marker_ttl (timedelta, optional): Time the marker of the battle is kept, forever if None.
+        attempts (int): Attempts to add the battle to summaries changed by concurrent battles.
+
+    Returns:
+        bool: True if the battle was added, False if it had been added before.
+
+    Raises:
+        TransactWriteError: If the transaction failed, or the summaries kept changing over all attempts.
+    """
+    for attempt in range(1, attempts + 1):
+        summaries = {
+            summary.pokemon: summary
+            for summary in PokemonSummaryModel.batch_get([battle["winner"], battle["opponent"]], consistent_read=True)
+        }
+
+        try:
+            with TransactWrite(connection=connection) as transaction:
+                transaction.save(
+                    PokemonSummaryModel(pokemon=f"battle#{battle['id']}", ttl=marker_ttl),
+                    condition=PokemonSummaryModel.pokemon.does_not_exist(),
+                )
+
+                for pokemon, won in ((battle["winner"], True), (battle["opponent"], False)):
+                    summary = summaries.get(pokemon)
+                    aggregates = summary_aggregates(summary, won)
+                    actions = [
+                        PokemonSummaryModel.board.set(leaderboard_shard_key(pokemon)),
+                        PokemonSummaryModel.wins.set(aggregates["wins"]),
+                        PokemonSummaryModel.losses.set(aggregates["losses"]),
+                        PokemonSummaryModel.battles.set(aggregates["battles"]),
+                        PokemonSummaryModel.win_rate.set(aggregates["win_rate"]),
+                    ]
+
+                    if not summary or summary.last_battle_at is None or battle["timestamp"] >= summary.last_battle_at:
+                        actions += [
+                            PokemonSummaryModel.last_battle_at.set(battle["timestamp"]),
+                            PokemonSummaryModel.last_battle_id.set(battle["id"]),
+                        ]
+
+                    transaction.update(
+                        PokemonSummaryModel(pokemon=pokemon),
+                        actions=actions,
+                        condition=(
+                            PokemonSummaryModel.battles == summary.battles
+                            if summary and summary.battles is not None
+                            else PokemonSummaryModel.battles.does_not_exist()
+                        ),
+                    )
+        except TransactWriteError as e:
+            codes = [reason.code if reason else None for reason in e.cancellation_reasons or []]
+
+            if codes and codes[0] == "ConditionalCheckFailed":
+                logger.info(f"Battle already added to summaries: {battle['id']}")
+                return False
+
+            # A summary was changed by a concurrent battle, the aggregates are computed again
+            if attempt < attempts and {"ConditionalCheckFailed", "TransactionConflict"} & set(codes):
+                logger.info(f"Summaries changed concurrently, retrying battle: {battle['id']}")
+                continue
+            raise
+
+        return True
+
+
+def parse_battle(new_image):
+    """
+    Parses a battle from the new image of a stream record.
+
+    Returns:
+        dict: The battle with 'id', 'timestamp', 'winner' and 'opponent'.
+    """
+    return {
+        "id": new_image["id"]["S"],
+        "timestamp": int(new_image["timestamp"]["N"]),
+        "winner": new_image["winner"]["S"],
+        "opponent": new_image["opponent"]["S"],
+    }
+
 
 def lambda_handler(event, context):
+    """
+    Maintains win/loss aggregates of Pokémon from new battles. Records are processed in order, if one fails,
+    it is reported as the first failed item of the batch, so Lambda retries the batch from it.
+    """
+    updated_pokemon = set()
+    batch_item_failures = []
+
     for record in event["Records"]:
-        event_name = record["eventName"]
-        dynamodb_record = record["dynamodb"]
-        logger.info(f"Event name: {event_name}")
-        logger.info(f"DynamoDB Record: {json.dumps(dynamodb_record)}")
+        # Battles are immutable, only new ones change the aggregates
+        if record["eventName"] != "INSERT":
+            continue
+
+        try:
+            battle = parse_battle(record["dynamodb"]["NewImage"])
+
+            if add_battle_to_summaries(battle):
+                updated_pokemon.update([battle["winner"], battle["opponent"]])
+        except Exception as e:
+            logger.exception(f"Battle could not be added to summaries, error: {str(e)}")
+            batch_item_failures.append({"itemIdentifier": record["dynamodb"]["SequenceNumber"]})
+            break
+
+    logger.info(f"Summaries updated for {len(updated_pokemon)} Pokemon, failures: {json.dumps(batch_item_failures)}")
 
-    return {"statusCode": 200, "body": json.dumps("Event processed.")}
+    return {"batchItemFailures": batch_item_failures}
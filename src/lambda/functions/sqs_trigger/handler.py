@@ -1,13 +1,109 @@
 import json
+import time
 import logging
 
+import boto3
+
+from db_models import BattleModel
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb_client = boto3.client("dynamodb")
+# Maximum number of items in a BatchWriteItem request
+MAX_BATCH_WRITE_SIZE = 25
+# Unprocessed items are retried with exponential backoff, then their messages are returned to the queue
+MAX_BATCH_WRITE_ATTEMPTS = 3
+BATCH_WRITE_BACKOFF = 0.1
+
+
+def parse_battle(message_body):
+    """
+    Parses a battle result enqueued by the battle API into a DynamoDB item.
+
+    Args:
+        message_body (str): The JSON-serialized battle result.
+
+    Returns:
+        tuple: The battle ID and the item with DynamoDB attribute values.
+
+    Raises:
+        ValueError: If the message is not a valid battle result.
+    """
+    try:
+        battle_entry = BattleModel(**json.loads(message_body))
+        return battle_entry.id, battle_entry.serialize()
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid battle result: {str(e)}") from e
+
+
+def write_battles(items):
+    """
+    Writes battles to the battle table with BatchWriteItem requests. Battles are put by their ID,
+    so writing a battle again (e.g. from a redelivered message) overwrites it with the same item.
+
+    Args:
+        items (dict): Items of the battles, keyed by the battle ID.
+
+    Returns:
+        set: IDs of the battles, which could not be written.
+    """
+    table_name = BattleModel.Meta.table_name
+    failed_ids = set()
+    battle_ids = list(items)
+
+    for start in range(0, len(battle_ids), MAX_BATCH_WRITE_SIZE):
+        write_requests = [
+            {"PutRequest": {"Item": items[battle_id]}} for battle_id in battle_ids[start : start + MAX_BATCH_WRITE_SIZE]
+        ]
+
+        for attempt in range(MAX_BATCH_WRITE_ATTEMPTS):
+            if attempt:
+                time.sleep(BATCH_WRITE_BACKOFF * 2 ** (attempt - 1))
+
+            try:
+                response = dynamodb_client.batch_write_item(RequestItems={table_name: write_requests})
+            except Exception as e:
+                logger.exception(f"Battles could not be written, error: {str(e)}")
+                continue
+
+            write_requests = response.get("UnprocessedItems", {}).get(table_name, [])
+
+            if not write_requests:
+                break
+
+        failed_ids.update(write_request["PutRequest"]["Item"]["id"]["S"] for write_request in write_requests)
+
+    return failed_ids
+
 
 def lambda_handler(event, context):
+    """
+    Saves battle results enqueued by the battle API (write-behind) to the battle table.
+    Messages of battles, which could not be saved, are reported as batch item failures,
+    so only they are received again (and moved to the dead-letter queue after the maximum receive count).
+    """
+    items = {}
+    message_ids = {}
+    batch_item_failures = []
+
     for record in event["Records"]:
-        message_body = record["body"]
-        logger.info(f"Received SQS message: {message_body}")
+        try:
+            battle_id, item = parse_battle(record["body"])
+        except ValueError as e:
+            logger.error(f"Received SQS message: {record['body']}, error: {str(e)}")
+            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+            continue
+
+        # A battle is written once, even if it was enqueued more than once
+        items[battle_id] = item
+        message_ids.setdefault(battle_id, []).append(record["messageId"])
+
+    failed_ids = write_battles(items) if items else set()
+
+    for battle_id in failed_ids:
+        batch_item_failures.extend({"itemIdentifier": message_id} for message_id in message_ids[battle_id])
+
+    logger.info(f"Battles saved: {len(items) - len(failed_ids)}, failed messages: {len(batch_item_failures)}")
 
-    return {"statusCode": 200, "body": json.dumps("Messages processed.")}
+    return {"batchItemFailures": batch_item_failures}
@@ -0,0 +1,141 @@
+import io
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("pynamodb")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("rediscluster")
+pq = pytest.importorskip("pyarrow.parquet")
+
+DAY_START = 1723420800  # 2024-08-12T00:00:00Z
+
+
+@pytest.fixture(scope="module")
+def handler(import_module_from_path):
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    sys.path.append(os.path.join(service_root, "src", "layers", "data_layer"))
+    handler_path = os.path.join(service_root, "src", "lambda", "functions", "archive_export", "handler.py")
+
+    with mock.patch("boto3.client"), mock.patch("poke_cache_utils.get_cache_client"):
+        return import_module_from_path("archive_export_handler", handler_path)
+
+
+def battle_item(battle_id, timestamp):
+    return {
+        "id": {"S": battle_id},
+        "timestamp": {"N": str(timestamp)},
+        "winner": {"S": "pikachu"},
+        "opponent": {"S": "eevee"},
+        "winner_total_stats": {"N": "320"},
+        "opponent_total_stats": {"N": "325"},
+    }
+
+
+class FakeDynamoDBClient:
+    """Emulates queries of the day GSI, every shard has its battles on pages of 2 items."""
+
+    def __init__(self, battles_by_shard):
+        self.battles_by_shard = battles_by_shard
+        self.queries = []
+
+    def query(self, TableName, IndexName, KeyConditionExpression, ExpressionAttributeValues, Limit, **kwargs):
+        day_shard = ExpressionAttributeValues[":day_shard"]["S"]
+        self.queries.append((IndexName, day_shard, kwargs.get("ExclusiveStartKey")))
+        battles = self.battles_by_shard.get(int(day_shard.rsplit("#", 1)[1]), [])
+        start = int(kwargs["ExclusiveStartKey"]["id"]["S"]) + 1 if "ExclusiveStartKey" in kwargs else 0
+        items = [battle_item(str(index), battles[index]) for index in range(start, min(start + 2, len(battles)))]
+        response = {"Items": items}
+
+        if start + 2 < len(battles):
+            response["LastEvaluatedKey"] = {"id": items[-1]["id"]}
+
+        return response
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = {**value, "segments": {k: dict(v) for k, v in value["segments"].items()}}
+
+
+def export_battles(handler, client, cache, should_stop=lambda: False):
+    written_parts = {}
+
+    def write_part(date, segment, part, rows):
+        written_parts[(segment, part)] = [row[1] for row in rows]
+
+    with mock.patch.object(handler, "write_part", write_part), mock.patch.object(handler, "cache_cli", cache):
+        with mock.patch("parallel_scan.boto3.client", return_value=client):
+            result = handler.export_battles(date="2024-08-12", should_stop=should_stop)
+
+    return result, written_parts
+
+
+class TestArchiveExport:
+    """Tests for the export of battles of a day from the day GSI to Parquet files."""
+
+    def test_shards_of_the_day_are_exported_in_parts(self, handler):
+        client = FakeDynamoDBClient({0: [DAY_START + offset for offset in range(1, 6)], 5: [DAY_START + 6]})
+
+        with mock.patch.object(handler, "PART_SIZE", 3):
+            result, written_parts = export_battles(handler, client, FakeCache())
+
+        assert result["completed"] and result["written"] == 6
+        # Pages of 2 battles are buffered until they fill a part, the last part of a shard is smaller
+        assert written_parts == {
+            (0, 0): [DAY_START + 1, DAY_START + 2, DAY_START + 3, DAY_START + 4],
+            (0, 1): [DAY_START + 5],
+            (5, 0): [DAY_START + 6],
+        }
+        # Only the day GSI is read, one query per shard and page
+        assert {query[:2] for query in client.queries} == {
+            ("day_shard_timestamp_index", f"2024-08-12#{shard}") for shard in range(handler.DAY_SHARDS)
+        }
+
+    def test_interrupted_export_resumes_from_checkpoint(self, handler):
+        client = FakeDynamoDBClient({0: [DAY_START + offset for offset in range(7)]})
+        cache = FakeCache()
+        pages = iter([False, False, False, True])
+
+        with mock.patch.object(handler, "DAY_SHARDS", 1), mock.patch.object(handler, "PART_SIZE", 4):
+            result, first_parts = export_battles(handler, client, cache, should_stop=lambda: next(pages))
+            assert not result["completed"]
+            # The battles buffered when the export stopped are written as a smaller part
+            assert cache.values["archive#battles#2024-08-12"]["segments"]["0"]["parts"] == 2
+            assert cache.values["archive#battles#2024-08-12"]["segments"]["0"]["last_evaluated_key"] == {
+                "id": {"S": "5"}
+            }
+
+            result, next_parts = export_battles(handler, client, cache)
+
+        assert result["completed"]
+        assert first_parts == {
+            (0, 0): [DAY_START + offset for offset in range(4)],
+            (0, 1): [DAY_START + 4, DAY_START + 5],
+        }
+        assert next_parts == {(0, 2): [DAY_START + 6]}
+
+    def test_part_is_written_as_parquet(self, handler):
+        rows = [handler.archive_row(handler.BattleModel.from_raw_data(battle_item("1", DAY_START)))]
+
+        key = handler.write_part("2024-08-12", 1, 2, rows)
+
+        assert key == "archive/battles/date=2024-08-12/part-001-00002.parquet"
+        body = handler.s3_client.put_object.call_args.kwargs["Body"]
+        assert pq.read_table(io.BytesIO(body)).to_pydict() == {
+            "id": ["1"],
+            "timestamp": [DAY_START],
+            "winner": ["pikachu"],
+            "opponent": ["eevee"],
+            "winner_total_stats": [320],
+            "opponent_total_stats": [325],
+        }
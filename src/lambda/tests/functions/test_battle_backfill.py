@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("pynamodb")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("rediscluster")
+
+
+@pytest.fixture(scope="module")
+def handler(import_module_from_path):
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    sys.path.append(os.path.join(service_root, "src", "layers", "data_layer"))
+    handler_path = os.path.join(service_root, "src", "lambda", "functions", "battle_backfill", "handler.py")
+
+    with mock.patch("boto3.client"), mock.patch("poke_cache_utils.get_cache_client"):
+        return import_module_from_path("battle_backfill_handler", handler_path)
+
+
+class TestBattleBackfill:
+    """Tests for the backfill of the sharded GSI key of battles."""
+
+    def test_battles_without_shard_keys_are_updated(self, handler):
+        battle = handler.BattleModel.from_raw_data(
+            {"id": {"S": "battle-1"}, "winner": {"S": "pikachu"}, "opponent": {"S": "eevee"}, "timestamp": {"N": "1"}}
+        )
+
+        assert battle.winner_shard is None and battle.day_shard is None
+        battle = handler.add_shard_keys(battle)
+
+        assert battle.winner_shard == handler.winner_shard_key("pikachu", "battle-1")
+        assert battle.day_shard == handler.day_shard_key(1, "battle-1")
+        # Battles with the keys are not written again
+        assert handler.add_shard_keys(battle) is None
+
+    def test_backfill_resumes_until_completed(self, handler):
+        context = SimpleNamespace(get_remaining_time_in_millis=lambda: 900_000)
+        handler.cache_cli.get.return_value = {"completed": False}
+        scan = mock.Mock(run=mock.Mock(return_value={"scanned": 10, "written": 4, "completed": True}))
+
+        with mock.patch.object(handler, "ParallelScan", return_value=scan) as parallel_scan:
+            result = handler.lambda_handler({}, context)
+
+        assert json.loads(result["body"])["completed"] is True
+        assert parallel_scan.call_args.kwargs["checkpoint_key"] == handler.CHECKPOINT_KEY
+        assert parallel_scan.call_args.kwargs["transform"] is handler.add_shard_keys
+
+    def test_completed_backfill_is_not_run_again(self, handler):
+        handler.cache_cli.get.return_value = {"completed": True}
+
+        with mock.patch.object(handler, "ParallelScan") as parallel_scan:
+            result = handler.lambda_handler({}, None)
+
+        assert json.loads(result["body"]) == {"completed": True}
+        parallel_scan.assert_not_called()
@@ -0,0 +1,120 @@
+import os
+import sys
+
+import pytest
+
+
+def build_fighter(name, total_stats):
+    """Builds minimal battle data with total stats spread over the six base stats."""
+    base_stat, remainder = divmod(total_stats, 6)
+    stats = dict.fromkeys(("hp", "attack", "defense", "special-attack", "special-defense", "speed"), base_stat)
+    stats["hp"] += remainder
+    return {"name": name, "stats": stats}
+
+
+@pytest.fixture(scope="module")
+def api_battle_function_path():
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    function_path = os.path.join(service_root, "src", "lambda", "functions", "api_battle")
+
+    # Add the directory containing the simulators to sys.path
+    sys.path.append(function_path)
+    return function_path
+
+
+@pytest.fixture(scope="module")
+def battle_simulator(import_module_from_path, api_battle_function_path):
+    return import_module_from_path("battle_simulator", os.path.join(api_battle_function_path, "battle_simulator.py"))
+
+
+@pytest.fixture(scope="module")
+def vectorized_battle_simulator(import_module_from_path, api_battle_function_path, battle_simulator):
+    pytest.importorskip("numpy")
+    module_path = os.path.join(api_battle_function_path, "vectorized_battle_simulator.py")
+    return import_module_from_path("vectorized_battle_simulator", module_path)
+
+
+@pytest.fixture
+def fighters_data():
+    return {
+        "mewtwo": build_fighter("mewtwo", 680),
+        "pikachu": build_fighter("pikachu", 320),
+        "raichu": build_fighter("raichu", 485),
+        "jolteon": build_fighter("jolteon", 525),
+    }
+
+
+class TestPokemonBattleSimulator:
+    """Tests for the scalar battle simulator."""
+
+    def test_exactly_two_fighters_required(self, battle_simulator, fighters_data):
+        with pytest.raises(battle_simulator.PokemonBattleSimulatorException):
+            battle_simulator.PokemonBattleSimulator(fighters_data=fighters_data)
+
+    def test_stronger_fighter_always_wins(self, battle_simulator, fighters_data):
+        simulator = battle_simulator.PokemonBattleSimulator(
+            fighters_data={name: fighters_data[name] for name in ("pikachu", "mewtwo")}
+        )
+
+        for _ in range(20):
+            result = simulator.result()
+            assert (result["winner"], result["opponent"]) == ("mewtwo", "pikachu")
+            assert (result["winner_total_stats"], result["opponent_total_stats"]) == (680, 320)
+
+
+class TestVectorizedBattleSimulator:
+    """Tests for the NumPy battle engine, which must follow the scalar simulator rules."""
+
+    def test_win_probabilities_match_scalar_rules(self, vectorized_battle_simulator, fighters_data):
+        simulator = vectorized_battle_simulator.VectorizedBattleSimulator(fighters_data=fighters_data)
+        probabilities = simulator.win_probabilities()
+
+        for i, name1 in enumerate(simulator.fighters):
+            for j, name2 in enumerate(simulator.fighters):
+                stats1 = sum(fighters_data[name1]["stats"].values())
+                stats2 = sum(fighters_data[name2]["stats"].values())
+                if min(stats1, stats2) >= max(stats1, stats2) * 0.8:
+                    expected = 0.5
+                else:
+                    expected = float(stats1 > stats2)
+                assert probabilities[i, j] == expected
+
+    def test_outcomes_are_reproducible_with_seed(self, vectorized_battle_simulator, fighters_data):
+        simulator = vectorized_battle_simulator.VectorizedBattleSimulator(fighters_data=fighters_data)
+
+        assert (simulator.outcomes(seed=42) == simulator.outcomes(seed=42)).all()
+
+    def test_outcomes_of_repeated_matchup(self, vectorized_battle_simulator, fighters_data):
+        simulator = vectorized_battle_simulator.VectorizedBattleSimulator(fighters_data=fighters_data)
+
+        assert simulator.outcomes(["mewtwo"] * 1000, ["pikachu"], seed=7).all()
+        assert abs(simulator.outcomes(["raichu"] * 10000, ["jolteon"], seed=7).mean() - 0.5) < 0.05
+
+    @pytest.mark.parametrize(
+        "total_stats1, total_stats2, expected",
+        [(680, 320, 1.0), (320, 680, 0.0), (485, 525, 0.5), (400, 500, 0.5), (399, 500, 0.0)],
+    )
+    def test_win_probability(self, vectorized_battle_simulator, total_stats1, total_stats2, expected):
+        assert vectorized_battle_simulator.win_probability(total_stats1, total_stats2) == expected
+
+    def test_results_have_scalar_format(self, vectorized_battle_simulator, fighters_data):
+        simulator = vectorized_battle_simulator.VectorizedBattleSimulator(fighters_data=fighters_data)
+        results = simulator.results(pairs=[("pikachu", "mewtwo"), ("raichu", "jolteon")], seed=1)
+
+        assert len(results) == 2
+        assert (results[0]["winner"], results[0]["opponent"]) == ("mewtwo", "pikachu")
+        assert {results[1]["winner"], results[1]["opponent"]} == {"raichu", "jolteon"}
+        assert set(results[0]) == {
+            "id",
+            "winner",
+            "opponent",
+            "timestamp",
+            "winner_total_stats",
+            "opponent_total_stats",
+        }
+
+    def test_unknown_fighter(self, vectorized_battle_simulator, battle_simulator, fighters_data):
+        simulator = vectorized_battle_simulator.VectorizedBattleSimulator(fighters_data=fighters_data)
+
+        with pytest.raises(battle_simulator.PokemonBattleSimulatorException):
+            simulator.results(pairs=[("pikachu", "charizard")])
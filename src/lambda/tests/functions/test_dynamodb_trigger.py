@@ -0,0 +1,183 @@
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("pynamodb")
+
+from pynamodb.exceptions import CancellationReason  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def handler(import_module_from_path):
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    sys.path.append(os.path.join(service_root, "src", "layers", "data_layer"))
+    handler_path = os.path.join(service_root, "src", "lambda", "functions", "dynamodb_trigger", "handler.py")
+
+    return import_module_from_path("dynamodb_trigger_handler", handler_path)
+
+
+def stream_record(battle_id, winner, opponent, event_name="INSERT"):
+    return {
+        "eventName": event_name,
+        "dynamodb": {
+            "SequenceNumber": f"seq-{battle_id}",
+            "NewImage": {
+                "id": {"S": battle_id},
+                "timestamp": {"N": "1723492530"},
+                "winner": {"S": winner},
+                "opponent": {"S": opponent},
+            },
+        },
+    }
+
+
+def test_parse_battle(handler):
+    battle = handler.parse_battle(stream_record("1", "pikachu", "eevee")["dynamodb"]["NewImage"])
+
+    assert battle == {"id": "1", "timestamp": 1723492530, "winner": "pikachu", "opponent": "eevee"}
+
+
+def test_new_battles_update_summaries_once_per_pokemon(handler):
+    event = {
+        "Records": [
+            stream_record("1", "pikachu", "eevee"),
+            stream_record("2", "eevee", "pikachu"),
+            stream_record("3", "ditto", "mew", event_name="REMOVE"),
+        ]
+    }
+
+    with mock.patch.object(handler, "add_battle_to_summaries", return_value=True) as add_battle:
+        result = handler.lambda_handler(event, None)
+
+    assert result == {"batchItemFailures": []}
+    assert [call.args[0]["id"] for call in add_battle.call_args_list] == ["1", "2"]
+
+
+def test_battles_added_before_are_skipped(handler):
+    event = {"Records": [stream_record("1", "pikachu", "eevee")]}
+
+    with mock.patch.object(handler, "add_battle_to_summaries", return_value=False) as add_battle:
+        result = handler.lambda_handler(event, None)
+
+    assert result == {"batchItemFailures": []}
+    add_battle.assert_called_once()
+
+
+def test_first_failed_record_is_reported(handler):
+    event = {
+        "Records": [
+            stream_record("1", "pikachu", "eevee"),
+            stream_record("2", "eevee", "pikachu"),
+            stream_record("3", "ditto", "mew"),
+        ]
+    }
+
+    with mock.patch.object(
+        handler, "add_battle_to_summaries", side_effect=[True, RuntimeError("throttled"), True]
+    ) as add_battle:
+        result = handler.lambda_handler(event, None)
+
+    # Records after the failed one are retried with it, so they are not processed
+    assert result == {"batchItemFailures": [{"itemIdentifier": "seq-2"}]}
+    assert add_battle.call_count == 2
+
+
+def test_summary_aggregates_include_win_rate(handler):
+    summary = SimpleNamespace(wins=2, losses=1, battles=3)
+
+    assert handler.summary_aggregates(summary, won=True) == {"wins": 3, "losses": 1, "battles": 4, "win_rate": 0.75}
+    assert handler.summary_aggregates(None, won=False) == {"wins": 0, "losses": 1, "battles": 1, "win_rate": 0.0}
+
+
+def transaction_cancelled(handler, *codes):
+    """Builds a cancelled transaction error with cancellation reasons in the order of the transaction items."""
+    error_class = type("CancelledTransaction", (handler.TransactWriteError,), {"cancellation_reasons": None})
+    error = error_class("Transaction cancelled")
+    error.cancellation_reasons = [CancellationReason(code=code) if code else None for code in codes]
+    return error
+
+
+class FakeTransactWrite:
+    """Emulates TransactWrite, records the updated items and fails with the given errors first."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.updates = []
+
+    def __call__(self, connection):
+        self.updates = []
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None and self.errors:
+            raise self.errors.pop(0)
+
+    def save(self, model, condition=None):
+        pass
+
+    def update(self, model, actions, condition=None):
+        self.updates.append((model.pokemon, {action.values[0].path[0]: action for action in actions}))
+
+
+def add_battle(handler, transaction, summaries=()):
+    battle = {"id": "1", "timestamp": 1723492530, "winner": "pikachu", "opponent": "eevee"}
+
+    with mock.patch.object(handler, "TransactWrite", transaction), mock.patch.object(
+        handler.PokemonSummaryModel, "batch_get", return_value=list(summaries)
+    ) as batch_get:
+        return handler.add_battle_to_summaries(battle), batch_get
+
+
+def test_battle_is_added_with_win_rate(handler):
+    transaction = FakeTransactWrite()
+    summary = handler.PokemonSummaryModel(pokemon="pikachu", wins=1, losses=1, battles=2, win_rate=0.5)
+
+    added, _ = add_battle(handler, transaction, summaries=[summary])
+
+    assert added is True
+    assert [pokemon for pokemon, _ in transaction.updates] == ["pikachu", "eevee"]
+    # The win rate is written in the same transaction as the counters
+    assert transaction.updates[0][1].keys() >= {"wins", "battles", "win_rate"}
+    assert transaction.updates[0][1]["win_rate"].values[1].value == {"N": "0.6667"}
+
+
+def test_battle_added_before_is_skipped(handler):
+    transaction = FakeTransactWrite(errors=[transaction_cancelled(handler, "ConditionalCheckFailed", None, None)])
+
+    added, batch_get = add_battle(handler, transaction)
+
+    assert added is False
+    batch_get.assert_called_once()
+
+
+def test_concurrently_changed_summaries_are_read_again(handler):
+    transaction = FakeTransactWrite(errors=[transaction_cancelled(handler, None, "ConditionalCheckFailed", None)])
+
+    added, batch_get = add_battle(handler, transaction)
+
+    assert added is True
+    assert batch_get.call_count == 2
+
+
+def test_summaries_changing_over_all_attempts_fail_the_battle(handler):
+    errors = [transaction_cancelled(handler, None, None, "TransactionConflict")] * handler.SUMMARY_UPDATE_ATTEMPTS
+    transaction = FakeTransactWrite(errors=errors)
+
+    with pytest.raises(handler.TransactWriteError):
+        add_battle(handler, transaction)
+
+
+def test_older_battle_keeps_the_last_battle(handler):
+    transaction = FakeTransactWrite()
+    summary = handler.PokemonSummaryModel(pokemon="pikachu", wins=1, losses=1, battles=2, last_battle_at=1723492600)
+
+    add_battle(handler, transaction, summaries=[summary])
+
+    assert "last_battle_at" not in transaction.updates[0][1]
+    assert "last_battle_at" in transaction.updates[1][1]
@@ -0,0 +1,167 @@
+import os
+import sys
+import base64
+import binascii
+from functools import partial
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def streaming(import_module_from_path):
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    api_file_upload_function_path = os.path.join(service_root, "src", "lambda", "functions", "api_file_upload")
+    sys.path.append(api_file_upload_function_path)
+
+    return import_module_from_path("streaming", os.path.join(api_file_upload_function_path, "streaming.py"))
+
+
+@pytest.fixture(scope="module")
+def form_data_handler(streaming, import_module_from_path):
+    pytest.importorskip("boto3")
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    handler_path = os.path.join(service_root, "src", "lambda", "functions", "api_file_upload", "form_data_handler.py")
+
+    with patch("boto3.client"):
+        return import_module_from_path("form_data_handler", handler_path)
+
+
+FILE_CONTENT = b"\x89PNG\r\n--not-a-boundary\r\n" + bytes(range(256)) * 4
+BODY = (
+    b"preamble\r\n"
+    b"--xyz\r\n"
+    b'Content-Disposition: form-data; name="description"\r\n\r\n'
+    b"A Pikachu\r\n"
+    b"--xyz\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="pikachu.png"\r\n'
+    b"Content-Type: image/png\r\n\r\n" + FILE_CONTENT + b"\r\n"
+    b"--xyz--\r\n"
+)
+
+
+def parse(streaming, chunks):
+    parser = streaming.MultipartParser.from_content_type('multipart/form-data; boundary="xyz"')
+    parts = []
+
+    for chunk in chunks:
+        for event, value in parser.feed(chunk):
+            if event == "part":
+                parts.append([value, b""])
+            elif event == "data":
+                parts[-1][1] += value
+
+    parser.close()
+    return parts
+
+
+class TestBase64Chunks:
+    def test_chunks_are_decoded(self, streaming):
+        body = base64.b64encode(FILE_CONTENT).decode()
+
+        assert b"".join(streaming.iter_base64_chunks(body, chunk_size=8)) == FILE_CONTENT
+
+    @pytest.mark.parametrize("separator", ["\n", "\r\n", " "])
+    def test_whitespace_is_ignored(self, streaming, separator):
+        encoded = base64.b64encode(FILE_CONTENT).decode()
+        # MIME base64 is split into lines of 76 characters
+        body = separator.join(encoded[start : start + 76] for start in range(0, len(encoded), 76))
+
+        assert b"".join(streaming.iter_base64_chunks(body, chunk_size=8)) == FILE_CONTENT
+
+    def test_invalid_base64(self, streaming):
+        with pytest.raises(binascii.Error):
+            list(streaming.iter_base64_chunks("aGVsbG8*d29ybGQ=", chunk_size=8))
+
+
+class TestMultipartParser:
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, len(BODY)])
+    def test_parts_are_parsed_from_any_chunks(self, streaming, chunk_size):
+        parts = parse(streaming, [BODY[start : start + chunk_size] for start in range(0, len(BODY), chunk_size)])
+
+        assert [content for _, content in parts] == [b"A Pikachu", FILE_CONTENT]
+        assert parts[1][0]["content-type"] == "image/png"
+
+    def test_content_type_without_boundary(self, streaming):
+        with pytest.raises(ValueError):
+            streaming.MultipartParser.from_content_type("application/json")
+
+    def test_incomplete_body(self, streaming):
+        with pytest.raises(ValueError):
+            parse(streaming, [BODY[:-12]])
+
+
+class TestS3StreamingUpload:
+    def test_small_file_is_put(self, streaming):
+        s3_client = MagicMock()
+        upload = streaming.S3StreamingUpload(s3_client, "bucket", "key.png", "image/png", part_size=1024)
+        upload.write(b"abc")
+
+        assert upload.complete() == 3
+        s3_client.put_object.assert_called_once_with(
+            Bucket="bucket", Key="key.png", Body=b"abc", ContentType="image/png"
+        )
+        s3_client.create_multipart_upload.assert_not_called()
+
+    def test_large_file_is_uploaded_in_parts(self, streaming):
+        s3_client = MagicMock()
+        s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        s3_client.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+        upload = streaming.S3StreamingUpload(s3_client, "bucket", "key.png", "image/png", part_size=4)
+
+        for chunk in (b"abc", b"defgh", b"ij"):
+            upload.write(chunk)
+        upload.complete()
+
+        assert [call.kwargs["Body"] for call in s3_client.upload_part.call_args_list] == [b"abcd", b"efgh", b"ij"]
+        s3_client.complete_multipart_upload.assert_called_once_with(
+            Bucket="bucket",
+            Key="key.png",
+            UploadId="upload-1",
+            MultipartUpload={
+                "Parts": [
+                    {"ETag": "etag-1", "PartNumber": 1},
+                    {"ETag": "etag-2", "PartNumber": 2},
+                    {"ETag": "etag-3", "PartNumber": 3},
+                ]
+            },
+        )
+        s3_client.put_object.assert_not_called()
+
+    def test_abort(self, streaming):
+        s3_client = MagicMock()
+        s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        upload = streaming.S3StreamingUpload(s3_client, "bucket", "key.png", "image/png", part_size=2)
+        upload.write(b"abc")
+        upload.abort()
+
+        s3_client.abort_multipart_upload.assert_called_once_with(Bucket="bucket", Key="key.png", UploadId="upload-1")
+
+
+class TestFormDataUpload:
+    def upload(self, form_data_handler, body):
+        form_data_handler.s3_client = MagicMock()
+        form_data_handler.s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        form_data_handler.s3_client.upload_part.return_value = {"ETag": "etag"}
+        # Small parts, so the file is uploaded with a multipart upload
+        upload_class = partial(form_data_handler.S3StreamingUpload, part_size=4)
+
+        with patch.object(form_data_handler, "S3StreamingUpload", upload_class):
+            return form_data_handler.upload_file_from_request_body(
+                content_type='multipart/form-data; boundary="xyz"', body=base64.b64encode(body).decode()
+            )
+
+    def test_file_is_uploaded(self, form_data_handler):
+        key, error_response = self.upload(form_data_handler, BODY)
+
+        assert error_response is None and key.endswith(".png")
+        form_data_handler.s3_client.complete_multipart_upload.assert_called_once()
+        form_data_handler.s3_client.abort_multipart_upload.assert_not_called()
+
+    def test_truncated_body_aborts_upload(self, form_data_handler):
+        # The file part ends, but the closing delimiter is missing
+        key, error_response = self.upload(form_data_handler, BODY[:-12])
+
+        assert key is None and error_response["statusCode"] == 400
+        form_data_handler.s3_client.complete_multipart_upload.assert_not_called()
+        form_data_handler.s3_client.abort_multipart_upload.assert_called_once()
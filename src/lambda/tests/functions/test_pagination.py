@@ -0,0 +1,111 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def pagination(import_module_from_path):
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    api_battle_function_path = os.path.join(service_root, "src", "lambda", "functions", "api_battle")
+    sys.path.append(api_battle_function_path)
+
+    return import_module_from_path("pagination", os.path.join(api_battle_function_path, "pagination.py"))
+
+
+class FakeResultIterator:
+    """Emulates PynamoDB ResultIterator, `last_evaluated_key` is the key of the last read item."""
+
+    def __init__(self, battles):
+        self.battles = battles
+        self.last_evaluated_key = None
+
+    def __iter__(self):
+        for index, battle in enumerate(self.battles):
+            is_last = index == len(self.battles) - 1
+            self.last_evaluated_key = None if is_last else {"id": {"S": battle.attribute_values["id"]}}
+            yield battle
+
+
+def build_battles(count):
+    return [
+        SimpleNamespace(attribute_values={"id": f"battle-{index}", "winner": "pikachu", "timestamp": index})
+        for index in range(count)
+    ]
+
+
+class TestPagination:
+    """Tests for the cursor-based pagination of battle searches."""
+
+    def test_next_token_round_trip(self, pagination):
+        key = {"id": {"S": "battle-1"}, "winner": {"S": "pikachu"}, "timestamp": {"N": "1"}}
+        next_token = pagination.encode_next_token("winner_timestamp_index", key)
+
+        assert pagination.decode_next_token(next_token, "winner_timestamp_index") == key
+        assert pagination.encode_next_token("winner_timestamp_index", None) is None
+
+    @pytest.mark.parametrize("next_token", ["not-base64!", "bm90IGpzb24"])
+    def test_malformed_next_token(self, pagination, next_token):
+        with pytest.raises(ValueError):
+            pagination.decode_next_token(next_token, "winner_timestamp_index")
+
+    def test_next_token_of_another_index(self, pagination):
+        next_token = pagination.encode_next_token("winner_opponent_index", {"id": {"S": "battle-1"}})
+
+        with pytest.raises(ValueError):
+            pagination.decode_next_token(next_token, "winner_timestamp_index")
+
+    def test_sharded_next_token_round_trip(self, pagination):
+        key = {"0": None, "3": {"id": {"S": "battle-1"}, "winner_shard": {"S": "pikachu#3"}, "timestamp": {"N": "1"}}}
+        next_token = pagination.encode_next_token("winner_shard_timestamp_index", key)
+
+        assert pagination.decode_next_token(
+            next_token, "winner_shard_timestamp_index", key_attributes={"id", "winner_shard", "timestamp"}, shards=8
+        ) == key
+
+    @pytest.mark.parametrize(
+        "key",
+        [
+            {"8": None},
+            {"x": None},
+            {"0": "battle-1"},
+            {"0": {"id": "battle-1", "winner_shard": {"S": "pikachu#0"}, "timestamp": {"N": "1"}}},
+            {"0": {"id": {"S": "battle-1"}, "winner_shard": {"S": "pikachu#0"}, "timestamp": {"N": "one"}}},
+            {"0": {"id": {"S": "battle-1"}, "winner_shard": {"S": "pikachu#0"}, "timestamp": {"N": 1}}},
+            {"0": {"id": {"S": "battle-1"}, "winner_shard": {"BOOL": True}, "timestamp": {"N": "1"}}},
+            {"0": {"id": {"S": "battle-1"}}},
+            ["0"],
+        ],
+    )
+    def test_next_token_with_invalid_key(self, pagination, key):
+        next_token = pagination.encode_next_token("winner_shard_timestamp_index", key)
+
+        with pytest.raises(ValueError):
+            pagination.decode_next_token(
+                next_token, "winner_shard_timestamp_index", key_attributes={"id", "winner_shard", "timestamp"}, shards=8
+            )
+
+    def test_page_stops_at_limit(self, pagination):
+        items, last_evaluated_key = pagination.paginate(FakeResultIterator(build_battles(5)), 2, 10_000)
+
+        assert [item["id"] for item in items] == ["battle-0", "battle-1"]
+        assert last_evaluated_key == {"id": {"S": "battle-1"}}
+
+    def test_last_page(self, pagination):
+        items, last_evaluated_key = pagination.paginate(FakeResultIterator(build_battles(3)), 10, 10_000)
+
+        assert len(items) == 3
+        assert last_evaluated_key is None
+
+    def test_page_stops_before_size_budget(self, pagination):
+        items, last_evaluated_key = pagination.paginate(FakeResultIterator(build_battles(5)), 10, 130)
+
+        # Every item is about 55 bytes, the third one would exceed the budget
+        assert [item["id"] for item in items] == ["battle-0", "battle-1"]
+        assert last_evaluated_key == {"id": {"S": "battle-1"}}
+
+    def test_projection(self, pagination):
+        items, _ = pagination.paginate(FakeResultIterator(build_battles(2)), 10, 10_000, attributes={"id"})
+
+        assert items == [{"id": "battle-0"}, {"id": "battle-1"}]
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("pynamodb")
+
+
+@pytest.fixture(scope="module")
+def handler(import_module_from_path):
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    sys.path.append(os.path.join(service_root, "src", "layers", "data_layer"))
+    handler_path = os.path.join(service_root, "src", "lambda", "functions", "sqs_trigger", "handler.py")
+
+    with mock.patch("boto3.client"):
+        return import_module_from_path("sqs_trigger_handler", handler_path)
+
+
+def sqs_record(message_id, battle_id):
+    battle_result = {
+        "id": battle_id,
+        "winner": "pikachu",
+        "opponent": "eevee",
+        "timestamp": 1723492530,
+        "winner_total_stats": 320,
+        "opponent_total_stats": 325,
+    }
+    return {"messageId": message_id, "body": json.dumps(battle_result)}
+
+
+class TestSqsTrigger:
+    """Tests for the write-behind consumer of battles from SQS."""
+
+    def test_battles_are_written_once(self, handler):
+        event = {"Records": [sqs_record("m1", "b1"), sqs_record("m2", "b2"), sqs_record("m3", "b1")]}
+        handler.dynamodb_client.batch_write_item = mock.Mock(return_value={"UnprocessedItems": {}})
+
+        result = handler.lambda_handler(event, None)
+
+        assert result == {"batchItemFailures": []}
+        write_requests = handler.dynamodb_client.batch_write_item.call_args.kwargs["RequestItems"]["ede-demo-battle"]
+        assert [request["PutRequest"]["Item"]["id"]["S"] for request in write_requests] == ["b1", "b2"]
+
+    def test_unprocessed_battles_are_reported(self, handler):
+        event = {"Records": [sqs_record("m1", "b1"), sqs_record("m2", "b2"), sqs_record("m3", "b2")]}
+
+        def batch_write_item(RequestItems):
+            write_requests = RequestItems["ede-demo-battle"]
+            unprocessed = [request for request in write_requests if request["PutRequest"]["Item"]["id"]["S"] == "b2"]
+            return {"UnprocessedItems": {"ede-demo-battle": unprocessed}}
+
+        handler.dynamodb_client.batch_write_item = mock.Mock(side_effect=batch_write_item)
+
+        with mock.patch.object(handler.time, "sleep"):
+            result = handler.lambda_handler(event, None)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m2"}, {"itemIdentifier": "m3"}]}
+        assert handler.dynamodb_client.batch_write_item.call_count == handler.MAX_BATCH_WRITE_ATTEMPTS
+
+    def test_invalid_messages_are_reported(self, handler):
+        event = {"Records": [{"messageId": "m1", "body": "not json"}, sqs_record("m2", "b2")]}
+        handler.dynamodb_client.batch_write_item = mock.Mock(return_value={})
+
+        result = handler.lambda_handler(event, None)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m1"}]}
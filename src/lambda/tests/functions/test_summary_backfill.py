@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("pynamodb")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("rediscluster")
+
+
+@pytest.fixture(scope="module")
+def backfill(import_module_from_path):
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    sys.path.append(os.path.join(service_root, "src", "layers", "data_layer"))
+    function_path = os.path.join(service_root, "src", "lambda", "functions", "dynamodb_trigger")
+
+    # The backfill imports the stream trigger as 'handler', as in the Lambda runtime
+    with mock.patch("boto3.client"), mock.patch("poke_cache_utils.get_cache_client"):
+        import_module_from_path("handler", os.path.join(function_path, "handler.py"))
+        return import_module_from_path("summary_backfill", os.path.join(function_path, "backfill.py"))
+
+
+class TestSummaryBackfill:
+    """Tests for the backfill of the summaries with battles created before the stream trigger."""
+
+    def test_only_battles_before_the_trigger_are_added(self, backfill):
+        add_battle = backfill.battle_adder(before=100)
+        battles = [
+            SimpleNamespace(id=battle_id, timestamp=timestamp, winner="pikachu", opponent="eevee")
+            for battle_id, timestamp in (("1", 99), ("2", 100))
+        ]
+
+        with mock.patch.object(backfill, "add_battle_to_summaries") as add_battle_to_summaries:
+            assert [add_battle(battle) for battle in battles] == [None, None]
+
+        add_battle_to_summaries.assert_called_once_with(
+            {"id": "1", "timestamp": 99, "winner": "pikachu", "opponent": "eevee"},
+            marker_ttl=None,
+            attempts=backfill.SUMMARY_UPDATE_ATTEMPTS,
+        )
+
+    def test_backfill_resumes_until_completed(self, backfill):
+        context = SimpleNamespace(get_remaining_time_in_millis=lambda: 900_000)
+        backfill.cache_cli.get.return_value = {"completed": False}
+        scan = mock.Mock(run=mock.Mock(return_value={"scanned": 10, "written": 0, "completed": True}))
+
+        with mock.patch.object(backfill, "ParallelScan", return_value=scan) as parallel_scan:
+            result = backfill.lambda_handler({"before": 1723492530}, context)
+
+        assert json.loads(result["body"])["completed"] is True
+        assert parallel_scan.call_args.kwargs["checkpoint_key"] == "backfill#summaries#1723492530"
+
+    def test_completed_backfill_is_not_run_again(self, backfill):
+        backfill.cache_cli.get.return_value = {"completed": True}
+
+        with mock.patch.object(backfill, "ParallelScan") as parallel_scan:
+            result = backfill.lambda_handler({"before": 1723492530}, None)
+
+        assert json.loads(result["body"]) == {"completed": True}
+        parallel_scan.assert_not_called()
+
+    def test_timestamp_is_required(self, backfill):
+        with mock.patch.object(backfill, "ParallelScan") as parallel_scan:
+            result = backfill.lambda_handler({}, None)
+
+        assert result["statusCode"] == 400
+        parallel_scan.assert_not_called()
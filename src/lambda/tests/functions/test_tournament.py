@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def tournament(import_module_from_path):
+    pytest.importorskip("numpy")
+    service_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+    api_battle_function_path = os.path.join(service_root, "src", "lambda", "functions", "api_battle")
+
+    # Add the directory containing the tournament module and simulators to sys.path
+    sys.path.append(api_battle_function_path)
+
+    return import_module_from_path("tournament", os.path.join(api_battle_function_path, "tournament.py"))
+
+
+@pytest.fixture
+def fighters_data():
+    return {
+        f"pokemon-{index}": {"name": f"pokemon-{index}", "stats": {"hp": 50 + index * 10, "attack": 50}}
+        for index in range(7)
+    }
+
+
+class TestTournament:
+    """Tests for the tournament simulation formats."""
+
+    def test_round_robin_pairs_everyone_once(self, tournament, fighters_data):
+        battles = list(tournament.Tournament(fighters_data, "round_robin", seed=1).battles())
+        pairs = {frozenset((battle["winner"], battle["opponent"])) for battle in battles}
+
+        assert len(battles) == len(pairs) == 7 * 6 // 2
+        assert max(battle["round"] for battle in battles) == 7
+
+    def test_single_elimination_has_one_champion(self, tournament, fighters_data):
+        simulation = tournament.Tournament(fighters_data, "single_elimination", seed=1)
+        battles = list(simulation.battles())
+        losers = {battle["opponent"] for battle in battles}
+
+        assert len(battles) == len(fighters_data) - 1
+        assert simulation.champion not in losers
+        assert losers | {simulation.champion} == set(fighters_data)
+
+    def test_swiss_rounds_with_bye(self, tournament, fighters_data):
+        simulation = tournament.Tournament(fighters_data, "swiss", rounds=3, seed=1)
+        battles = list(simulation.battles())
+
+        assert len(battles) == 3 * (len(fighters_data) // 2)
+        for round_number in (1, 2, 3):
+            round_fighters = [
+                pokemon_id
+                for battle in battles
+                if battle["round"] == round_number
+                for pokemon_id in (battle["winner"], battle["opponent"])
+            ]
+            # Every fighter battles at most once per round, one of them has a bye
+            assert len(round_fighters) == len(set(round_fighters)) == len(fighters_data) - 1
+
+    @pytest.mark.parametrize(
+        "tournament_format, rounds",
+        [("round_robin", None), ("single_elimination", None), ("swiss", None), ("swiss", 2)],
+    )
+    def test_count_battles(self, tournament, fighters_data, tournament_format, rounds):
+        battles = list(tournament.Tournament(fighters_data, tournament_format, rounds=rounds, seed=1).battles())
+
+        assert tournament.count_battles(len(fighters_data), tournament_format, rounds) == len(battles)
+
+    def test_write_ndjson_chunks_to_s3(self, tournament, fighters_data):
+        s3_client = MagicMock()
+        battles = tournament.Tournament(fighters_data, "round_robin", seed=1).battles()
+
+        keys = tournament.write_ndjson_chunks_to_s3(s3_client, "bucket", "tournaments/test", battles, chunk_size=10)
+
+        assert keys == [f"tournaments/test/part-{index:05d}.ndjson" for index in range(3)]
+        lines = b"".join(call.kwargs["Body"] for call in s3_client.put_object.call_args_list).splitlines()
+        assert len(lines) == 21
+        assert all("winner" in json.loads(line) for line in lines)
@@ -1,8 +1,46 @@
 from abc import ABC, abstractmethod
+from typing import Any, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    """
+    Cached value with an optional soft expiry, after which it is stale but still can be served
+    while it is being refreshed, until the hard TTL deletes it.
+
+    Attributes:
+        value (str or dict): The cached value.
+        soft_expires_at (float, optional): Epoch time of the soft expiry.
+        delta (float): Time in seconds it took to compute the value, used for early refresh.
+        etag (str, optional): The ETag of the value at its source, used to revalidate it.
+        last_modified (str, optional): The Last-Modified date of the value at its source, used to revalidate it.
+        expires_at (float, optional): Epoch time of the hard expiry, set by the cache when the entry is read.
+
+    """
+
+    value: Any
+    soft_expires_at: Optional[float] = None
+    delta: float = 0.0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires_at: Optional[float] = None
 
 
 class Cache(ABC):
 
+    @staticmethod
+    def split_entry(value):
+        """
+        Split a value to be stored into the value itself and its soft expiry metadata.
+
+        Args:
+            value (str or dict or CacheEntry): The value to be stored.
+
+        Returns:
+            CacheEntry: The value with its soft expiry, if it was provided.
+
+        """
+        return value if isinstance(value, CacheEntry) else CacheEntry(value=value)
+
     @abstractmethod
     def set(self, key, value, ttl=None):
         """
@@ -10,7 +48,7 @@ class Cache(ABC):
 
         Args:
             key (str): The cache key under which the value is stored.
-            value (str or dict): The value to be stored.
+            value (str or dict or CacheEntry): The value to be stored, optionally with a soft expiry.
             ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
                 the item will expire and be deleted after this duration.
 
@@ -29,3 +67,97 @@ class Cache(ABC):
             If the value was stored as a JSON string, it will be returned as a dict.
 
         """
+
+    def get_entry(self, key):
+        """
+        Retrieve a value from the cache together with its soft expiry.
+        Clients storing soft expiry should override it, by default the entry has no soft expiry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            CacheEntry: The retrieved entry, or None if the key does not exist.
+
+        """
+        value = self.get(key=key)
+        return CacheEntry(value=value) if value is not None else None
+
+    def get_many(self, keys):
+        """
+        Retrieve several values from the cache.
+        Clients should override it with a bulk operation of their database, by default every key is read one by one.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved values by their keys, keys that do not exist are omitted.
+
+        """
+        values = {}
+
+        for key in dict.fromkeys(keys):
+            value = self.get(key=key)
+
+            if value is not None:
+                values[key] = value
+
+        return values
+
+    def get_many_entries(self, keys):
+        """
+        Retrieve several values from the cache together with their soft expiry.
+        Clients storing soft expiry should override it, by default every key is read one by one.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved entries by their keys, keys that do not exist are omitted.
+
+        """
+        entries = {}
+
+        for key in dict.fromkeys(keys):
+            entry = self.get_entry(key=key)
+
+            if entry is not None:
+                entries[key] = entry
+
+        return entries
+
+    def set_many(self, mapping, ttl=None):
+        """
+        Save or overwrite several values in the cache with an optional TTL.
+        Clients should override it with a bulk operation of their database, by default every key is written one by one.
+
+        Args:
+            mapping (dict): The values (or CacheEntry) to be stored by their cache keys.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the items will expire and be deleted after this duration.
+
+        """
+        for key, value in mapping.items():
+            self.set(key=key, value=value, ttl=ttl)
+
+    def add(self, key, value, ttl=None):
+        """
+        Save a value in the cache only if the key does not exist (or has expired).
+        Clients should override it with an atomic operation of their database, by default it is not atomic.
+
+        Args:
+            key (str): The cache key under which the value is stored.
+            value (str or dict): The value to be stored.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the item will expire and be deleted after this duration.
+
+        Returns:
+            bool: True if the value was saved, False if the key already exists.
+
+        """
+        if self.get(key=key) is not None:
+            return False
+
+        self.set(key=key, value=value, ttl=ttl)
+        return True
@@ -1,10 +1,11 @@
-import json
 import time
 import boto3
 import logging
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from botocore.exceptions import ClientError
 
-from cache.abstract import Cache
+from cache.abstract import Cache, CacheEntry
+from cache.serializers import JSONSerializer
 
 
 class DynamoDBCacheClient(Cache):
@@ -13,38 +14,140 @@ class DynamoDBCacheClient(Cache):
 
     """
 
-    def __init__(self, table_name):
+    # Limit of keys per BatchGetItem request
+    batch_get_size = 100
+    # Number of attempts to read unprocessed keys of BatchGetItem request
+    batch_get_attempts = 5
+    # Limit of items per BatchWriteItem request
+    batch_write_size = 25
+    # Number of attempts to write unprocessed items of BatchWriteItem request
+    batch_write_attempts = 5
+
+    def __init__(self, table_name, serializer=None):
         """
         Initializes the DynamoDB client.
 
         Args:
             table_name (str): The name of the DynamoDB table.
+            serializer (Serializer, optional): The serializer of cached values, JSON by default.
 
         """
-        self.dynamodb = boto3.resource("dynamodb")
-        self.table = self.dynamodb.Table(table_name)
+        self.table_name = table_name
+        self.serializer = serializer or JSONSerializer()
+        # Clients are thread-safe (unlike resources), the cache is shared by concurrent fetches and refreshes
+        self.dynamodb = boto3.client("dynamodb")
+        self._type_serializer = TypeSerializer()
+        self._type_deserializer = TypeDeserializer()
 
         self.logger = logging.getLogger()
         self.logger.setLevel(logging.INFO)
 
+    def _build_item(self, key, value, ttl=None):
+        """
+        Build a DynamoDB item for a value to be stored, with its TTL and soft expiry.
+
+        Returns:
+            dict: The DynamoDB item.
+
+        """
+        entry = self.split_entry(value)
+        item = {"id": key, "value": self.serializer.dumps(entry.value)}
+
+        if ttl:
+            ttl_epoch = int(time.time()) + ttl
+            item["ttl"] = ttl_epoch
+
+        if entry.soft_expires_at:
+            item["soft_ttl"] = int(entry.soft_expires_at)
+            item["delta_ms"] = int(entry.delta * 1000)
+
+        if entry.etag:
+            item["etag"] = entry.etag
+        if entry.last_modified:
+            item["last_modified"] = entry.last_modified
+
+        return item
+
+    def _serialize_item(self, item):
+        """
+        Convert an item to DynamoDB attribute values, as expected by the low-level client.
+
+        """
+        return {name: self._type_serializer.serialize(value) for name, value in item.items()}
+
+    def _deserialize_item(self, item):
+        """
+        Convert DynamoDB attribute values returned by the low-level client to an item.
+
+        """
+        return {name: self._type_deserializer.deserialize(value) for name, value in item.items()}
+
+    def _parse_item(self, item):
+        """
+        Parse a DynamoDB item into a cache entry.
+
+        Returns:
+            CacheEntry: The cache entry, or None if the item has expired but is not deleted by DynamoDB yet.
+
+        """
+        if "ttl" in item and item["ttl"] < time.time():
+            return None
+
+        return CacheEntry(
+            # Binary values are read as boto3 Binary objects
+            value=self.serializer.loads(getattr(item["value"], "value", item["value"])),
+            soft_expires_at=int(item["soft_ttl"]) if "soft_ttl" in item else None,
+            delta=int(item.get("delta_ms", 0)) / 1000,
+            etag=item.get("etag"),
+            last_modified=item.get("last_modified"),
+            expires_at=int(item["ttl"]) if "ttl" in item else None,
+        )
+
     def set(self, key, value, ttl=None):
         """
         Save or overwrite a value in the cache with an optional TTL.
 
         Args:
             key (str): The cache key under which the value is stored.
-            value (str or dict): The value to be stored.
+            value (str or dict or CacheEntry): The value to be stored, optionally with a soft expiry.
             ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
                 the item will expire and be deleted after this duration.
 
         """
-        item = {"id": key, "value": json.dumps(value)}
+        item = self._build_item(key, value, ttl=ttl)
+        self.dynamodb.put_item(TableName=self.table_name, Item=self._serialize_item(item))
 
-        if ttl:
-            ttl_epoch = int(time.time()) + ttl
-            item["ttl"] = ttl_epoch
+    def add(self, key, value, ttl=None):
+        """
+        Save a value in the cache only if the key does not exist (or has expired), with a conditional write.
 
-        self.table.put_item(Item=item)
+        Args:
+            key (str): The cache key under which the value is stored.
+            value (str or dict): The value to be stored.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the item will expire and be deleted after this duration.
+
+        Returns:
+            bool: True if the value was saved, False if the key already exists.
+
+        """
+        now = int(time.time())
+        item = self._build_item(key, value, ttl=ttl)
+
+        try:
+            # DynamoDB deletes expired items with a delay, so they are checked explicitly
+            self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item=self._serialize_item(item),
+                ConditionExpression="attribute_not_exists(id) OR #ttl < :now",
+                ExpressionAttributeNames={"#ttl": "ttl"},
+                ExpressionAttributeValues={":now": {"N": str(now)}},
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
 
     def get(self, key, **kwargs):
         """
@@ -57,14 +160,131 @@ class DynamoDBCacheClient(Cache):
             The retrieved value, or None if the key does not exist.
             If the value was stored as a JSON string, it will be returned as a dict.
 
+        """
+        entry = self.get_entry(key)
+        return entry.value if entry else None
+
+    def get_entry(self, key):
+        """
+        Retrieve a value from the cache together with its soft expiry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            CacheEntry: The retrieved entry, or None if the key does not exist.
+
         """
         try:
-            response = self.table.get_item(Key={"id": key})
+            response = self.dynamodb.get_item(TableName=self.table_name, Key={"id": {"S": key}})
 
             if "Item" in response:
-                return json.loads(response["Item"]["value"])
+                return self._parse_item(self._deserialize_item(response["Item"]))
 
             return None
         except ClientError as e:
             self.logger.exception(e.response["Error"]["Message"])
             return None
+
+    def _batch_get(self, keys):
+        """
+        Read up to 100 items with BatchGetItem, retrying unprocessed keys with exponential backoff.
+
+        Args:
+            keys (list): The cache keys, at most 100 unique ones.
+
+        Returns:
+            list: The retrieved DynamoDB items.
+
+        """
+        items = []
+        request_items = {self.table_name: {"Keys": [{"id": {"S": key}} for key in keys]}}
+
+        for attempt in range(self.batch_get_attempts):
+            if attempt:
+                time.sleep(0.05 * 2**attempt)
+
+            response = self.dynamodb.batch_get_item(RequestItems=request_items)
+            items.extend(self._deserialize_item(item) for item in response["Responses"].get(self.table_name, []))
+            request_items = response.get("UnprocessedKeys")
+
+            if not request_items:
+                break
+        else:
+            unprocessed_count = len(request_items[self.table_name]["Keys"])
+            self.logger.error(f"BatchGetItem left {unprocessed_count} unprocessed keys.")
+
+        return items
+
+    def get_many(self, keys):
+        """
+        Retrieve several values from the cache with BatchGetItem requests of up to 100 keys.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved values by their keys, keys that do not exist are omitted.
+
+        """
+        return {key: entry.value for key, entry in self.get_many_entries(keys).items()}
+
+    def get_many_entries(self, keys):
+        """
+        Retrieve several values from the cache together with their soft expiry,
+        with BatchGetItem requests of up to 100 keys.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved entries by their keys, keys that do not exist are omitted.
+
+        """
+        keys = list(dict.fromkeys(keys))  # BatchGetItem rejects duplicate keys
+        entries = {}
+
+        try:
+            for index in range(0, len(keys), self.batch_get_size):
+                for item in self._batch_get(keys[index : index + self.batch_get_size]):
+                    entry = self._parse_item(item)
+
+                    if entry:
+                        entries[item["id"]] = entry
+        except ClientError as e:
+            self.logger.exception(e.response["Error"]["Message"])
+
+        return entries
+
+    def set_many(self, mapping, ttl=None):
+        """
+        Save or overwrite several values in the cache with an optional TTL.
+        Items are written with BatchWriteItem requests of up to 25 items, unprocessed items are resent
+        with exponential backoff.
+
+        Args:
+            mapping (dict): The values (or CacheEntry) to be stored by their cache keys.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the items will expire and be deleted after this duration.
+
+        """
+        write_requests = [
+            {"PutRequest": {"Item": self._serialize_item(self._build_item(key, value, ttl=ttl))}}
+            for key, value in mapping.items()
+        ]
+
+        for index in range(0, len(write_requests), self.batch_write_size):
+            request_items = {self.table_name: write_requests[index : index + self.batch_write_size]}
+
+            for attempt in range(self.batch_write_attempts):
+                if attempt:
+                    time.sleep(0.05 * 2**attempt)
+
+                response = self.dynamodb.batch_write_item(RequestItems=request_items)
+                request_items = response.get("UnprocessedItems")
+
+                if not request_items:
+                    break
+            else:
+                unprocessed_count = len(request_items[self.table_name])
+                self.logger.error(f"BatchWriteItem left {unprocessed_count} unprocessed items.")
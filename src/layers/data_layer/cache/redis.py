@@ -1,8 +1,10 @@
 import json
+import time
 
 from rediscluster import RedisCluster
 
-from cache.abstract import Cache
+from cache.abstract import Cache, CacheEntry
+from cache.serializers import JSONSerializer
 
 
 class RedisCacheClient(Cache):
@@ -11,40 +13,123 @@ class RedisCacheClient(Cache):
 
     """
 
-    def __init__(self, startup_nodes, password=None):
+    def __init__(self, startup_nodes, password=None, serializer=None):
         """
         Initializes the Redis cache client.
 
         Args:
             startup_nodes (list): List of nodes to connect to.
             password (str, optional): Password for the Redis cluster.
+            serializer (Serializer, optional): The serializer of cached values, JSON by default.
 
         """
+        self.serializer = serializer or JSONSerializer()
+        # Responses are not decoded, as values can be binary, the serializer decodes them
         self.client = RedisCluster(
             startup_nodes=startup_nodes,
-            decode_responses=True,
+            decode_responses=False,
             password=password,
             ssl=True,
             skip_full_coverage_check=True,
         )
 
+    @staticmethod
+    def _value_key(key):
+        """
+        Redis key of a value. The cache key is a hash tag, so the value and its '#meta' key
+        are in the same cluster slot and are written and read by the same node.
+
+        """
+        return f"{{{key}}}"
+
+    @classmethod
+    def _meta_key(cls, key):
+        """
+        Redis key of the soft expiry and validators of a value.
+
+        """
+        return f"{cls._value_key(key)}#meta"
+
+    def _decode(self, value):
+        """
+        Decode a value with the serializer, values stored as plain strings are returned as they are.
+
+        """
+        return self.serializer.loads(value) if value else None
+
+    def _parse_entry(self, value, meta, pttl):
+        """
+        Parse a value, its '<key>#meta' key and its remaining TTL in milliseconds into a cache entry.
+
+        Returns:
+            CacheEntry: The cache entry, or None if the key does not exist.
+
+        """
+        if not value:
+            return None
+
+        return CacheEntry(
+            value=self._decode(value),
+            **(json.loads(meta) if meta else {}),
+            # PTTL is negative if the key has no TTL (or has expired in the meantime)
+            expires_at=time.time() + pttl / 1000 if pttl and pttl > 0 else None,
+        )
+
+    def _stage_set(self, pipe, key, value, ttl=None):
+        """
+        Add commands saving a value to the pipeline. The soft expiry and validators are stored
+        next to the value, under the '<key>#meta' key with the same TTL, which is deleted
+        if the value has none of them, so that the metadata of a previous value is not kept.
+
+        """
+        entry = self.split_entry(value)
+        items = {self._value_key(key): self.serializer.dumps(entry.value)}
+        # The hard expiry is given by the TTL of the key
+        meta = {
+            name: field for name, field in entry._asdict().items() if name not in ("value", "expires_at") and field
+        }
+
+        if meta:
+            items[self._meta_key(key)] = json.dumps(meta)
+        else:
+            pipe.delete(self._meta_key(key))
+
+        for item_key, value_to_store in items.items():
+            if ttl:
+                pipe.setex(item_key, ttl, value_to_store)
+            else:
+                pipe.set(item_key, value_to_store)
+
     def set(self, key, value, ttl=None):
         """
         Save or overwrite a value in the cache with an optional TTL.
 
         Args:
             key (str): The cache key under which the value is stored.
-            value (str or dict): The value to be stored.
+            value (str or dict or CacheEntry): The value to be stored, optionally with a soft expiry.
             ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
                 the item will expire and be deleted after this duration.
 
         """
-        value_to_store = json.dumps(value) if isinstance(value, dict) else value
+        pipe = self.client.pipeline()
+        self._stage_set(pipe, key, value, ttl=ttl)
+        pipe.execute()
 
-        if ttl:
-            self.client.setex(key, ttl, value_to_store)
-        else:
-            self.client.set(key, value_to_store)
+    def add(self, key, value, ttl=None):
+        """
+        Save a value in the cache only if the key does not exist, with SET NX.
+
+        Args:
+            key (str): The cache key under which the value is stored.
+            value (str or dict): The value to be stored.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the item will expire and be deleted after this duration.
+
+        Returns:
+            bool: True if the value was saved, False if the key already exists.
+
+        """
+        return bool(self.client.set(self._value_key(key), self.serializer.dumps(value), ex=ttl, nx=True))
 
     def get(self, key):
         """
@@ -58,9 +143,92 @@ class RedisCacheClient(Cache):
             If the value was stored as a JSON string, it will be returned as a dict.
 
         """
-        value = self.client.get(key)
+        return self._decode(self.client.get(self._value_key(key)))
+
+    def get_entry(self, key):
+        """
+        Retrieve a value from the cache together with its soft expiry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            CacheEntry: The retrieved entry, or None if the key does not exist.
+
+        """
+        pipe = self.client.pipeline()
+        pipe.get(self._value_key(key))
+        pipe.get(self._meta_key(key))
+        pipe.pttl(self._value_key(key))
+
+        return self._parse_entry(*pipe.execute())
+
+    def get_many(self, keys):
+        """
+        Retrieve several values from the cache with a pipeline.
+        The cluster pipeline groups commands by the node serving their slot,
+        so there is a single round trip per node instead of one per key.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved values by their keys, keys that do not exist are omitted.
+            Values stored as JSON strings are returned as dicts.
+
+        """
+        keys = list(dict.fromkeys(keys))
+        pipe = self.client.pipeline()
+
+        for key in keys:
+            pipe.get(self._value_key(key))
+
+        return {key: self._decode(value) for key, value in zip(keys, pipe.execute()) if value}
+
+    def get_many_entries(self, keys):
+        """
+        Retrieve several values from the cache together with their soft expiry, with a pipeline
+        reading every key, its '<key>#meta' key and its TTL.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved entries by their keys, keys that do not exist are omitted.
+
+        """
+        keys = list(dict.fromkeys(keys))
+        pipe = self.client.pipeline()
+
+        for key in keys:
+            pipe.get(self._value_key(key))
+            pipe.get(self._meta_key(key))
+            pipe.pttl(self._value_key(key))
+
+        results = pipe.execute()
+        entries = {}
+
+        for key, value, meta, pttl in zip(keys, results[0::3], results[1::3], results[2::3]):
+            entry = self._parse_entry(value, meta, pttl)
+
+            if entry:
+                entries[key] = entry
+
+        return entries
+
+    def set_many(self, mapping, ttl=None):
+        """
+        Save or overwrite several values in the cache with an optional TTL, using a pipeline.
+
+        Args:
+            mapping (dict): The values (or CacheEntry) to be stored by their cache keys.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the items will expire and be deleted after this duration.
+
+        """
+        pipe = self.client.pipeline()
+
+        for key, value in mapping.items():
+            self._stage_set(pipe, key, value, ttl=ttl)
 
-        try:
-            return json.loads(value) if value else None
-        except json.JSONDecodeError:
-            return value
+        pipe.execute()
@@ -0,0 +1,102 @@
+import json
+import zlib
+from abc import ABC, abstractmethod
+
+try:
+    import msgpack
+except ImportError:  # msgpack is required only by MsgPackSerializer
+    msgpack = None
+
+# Binary values start with a format version byte, JSON (stored as text by previous versions) never does
+FORMAT_MSGPACK = 1
+FORMAT_MSGPACK_ZLIB = 2
+
+
+class Serializer(ABC):
+    """
+    Serializer of cached values. Every serializer writes its own format, but reads all of them,
+    so the format can be switched without invalidating existing cache entries.
+
+    """
+
+    @abstractmethod
+    def dumps(self, value):
+        """
+        Serialize a value to be stored in the cache.
+
+        Args:
+            value (str or dict): The value to be stored.
+
+        Returns:
+            str or bytes: The serialized value.
+
+        """
+
+    @staticmethod
+    def loads(data):
+        """
+        Deserialize a value read from the cache, in any of the supported formats.
+
+        Args:
+            data (str or bytes): The serialized value.
+
+        Returns:
+            The deserialized value. Strings, which are not valid JSON, are returned as they are.
+
+        """
+        if isinstance(data, (bytes, bytearray)) and data[:1] in (bytes([FORMAT_MSGPACK]), bytes([FORMAT_MSGPACK_ZLIB])):
+            if msgpack is None:
+                raise RuntimeError("msgpack is required to read binary cache values.")
+
+            payload = bytes(data[1:])
+
+            if data[0] == FORMAT_MSGPACK_ZLIB:
+                payload = zlib.decompress(payload)
+
+            return msgpack.unpackb(payload, raw=False)
+
+        try:
+            return json.loads(data)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return data.decode() if isinstance(data, (bytes, bytearray)) else data
+
+
+class JSONSerializer(Serializer):
+    """
+    Serializer storing values as JSON strings.
+
+    """
+
+    def dumps(self, value):
+        return json.dumps(value)
+
+
+class MsgPackSerializer(Serializer):
+    """
+    Serializer storing values in the compact binary MessagePack format, optionally compressed with zlib.
+
+    """
+
+    def __init__(self, compress=False, compress_min_size=1024):
+        """
+        Initializes the serializer.
+
+        Args:
+            compress (bool): Whether to compress values.
+            compress_min_size (int): Values smaller than this size in bytes are not compressed,
+                as compression does not pay off for them.
+
+        """
+        if msgpack is None:
+            raise RuntimeError("msgpack is required for MsgPackSerializer.")
+
+        self.compress = compress
+        self.compress_min_size = compress_min_size
+
+    def dumps(self, value):
+        payload = msgpack.packb(value, use_bin_type=True)
+
+        if self.compress and len(payload) >= self.compress_min_size:
+            return bytes([FORMAT_MSGPACK_ZLIB]) + zlib.compress(payload)
+
+        return bytes([FORMAT_MSGPACK]) + payload
@@ -0,0 +1,288 @@
+import sys
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+from cache.abstract import Cache
+
+
+def approximate_size(value):
+    """
+    Approximate the memory used by a value in bytes, including the values it contains.
+
+    Args:
+        value: A cached value, i.e. JSON-like data (dicts, lists, strings, numbers) or bytes.
+
+    Returns:
+        int: The approximate size in bytes.
+
+    """
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(approximate_size(key) + approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(approximate_size(item) for item in value)
+
+    return size
+
+
+class TieredCacheClient(Cache):
+    """
+    Two-level cache client: a bounded in-process LRU cache (L1) in front of any other cache client (L2).
+
+    The L1 cache lives as long as the Lambda container, so warm containers serve repeated keys
+    without a network round trip to DynamoDB or Redis. It is bounded by the approximate size of its entries,
+    as a Pokémon payload is much larger than e.g. an alias.
+
+    """
+
+    def __init__(self, backend, max_bytes=16 * 1024 * 1024, ttl=300):
+        """
+        Initializes the tiered cache client.
+
+        Args:
+            backend (Cache): The cache client used as the second level.
+            max_bytes (int): Maximum approximate size in bytes of the entries in the L1 cache,
+                the least recently used entries are evicted first. Larger values are not kept in the L1 cache.
+            ttl (int): Maximum time-to-live (TTL) in seconds of entries in the L1 cache.
+
+        """
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, size, CacheEntry)
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self):
+        """
+        Statistics of the L1 cache.
+
+        Returns:
+            dict: Number of entries, their approximate size in bytes, hits, misses, evictions and hit ratio.
+
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _pop_local(self, key):
+        """
+        Remove an entry from the L1 cache, the lock must be held.
+
+        """
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def _get_local(self, key):
+        """
+        Retrieve an entry from the L1 cache and count the hit or miss, expired entries are dropped.
+
+        Returns:
+            CacheEntry: The entry, or None if it is not found.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] <= time.monotonic():
+                self._pop_local(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def _set_local(self, key, value, ttl=None):
+        """
+        Save or overwrite a copy of the value in the L1 cache, evicting the least recently used entries
+        until the entries fit in the size budget. The entry is kept until its hard expiry in the backend
+        or its soft expiry (if they come first), so short-lived keys are read again from the backend.
+
+        """
+        cache_entry = copy.deepcopy(self.split_entry(value))
+        ttls = [self.ttl, ttl] if ttl else [self.ttl]
+        now = time.time()
+
+        if cache_entry.expires_at:
+            ttls.append(cache_entry.expires_at - now)
+        # An entry, which is already stale, is kept until it is refreshed
+        if cache_entry.soft_expires_at and cache_entry.soft_expires_at > now:
+            ttls.append(cache_entry.soft_expires_at - now)
+
+        ttl = min(ttls)
+        size = approximate_size(key) + approximate_size(cache_entry)
+
+        with self._lock:
+            if key in self._entries:
+                self._pop_local(key)
+
+            if size > self.max_bytes or ttl <= 0:
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, size, cache_entry)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                self._pop_local(next(iter(self._entries)))
+                self.evictions += 1
+
+    def set(self, key, value, ttl=None):
+        """
+        Save or overwrite a value in both cache levels with an optional TTL.
+
+        Args:
+            key (str): The cache key under which the value is stored.
+            value (str or dict or CacheEntry): The value to be stored, optionally with a soft expiry.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the item will expire and be deleted after this duration.
+
+        """
+        self.backend.set(key=key, value=value, ttl=ttl)
+        self._set_local(key, value, ttl=ttl)
+
+    def add(self, key, value, ttl=None):
+        """
+        Save a value in the backend only if the key does not exist, it is not kept in the L1 cache,
+        because the check must be done by the shared backend.
+
+        Args:
+            key (str): The cache key under which the value is stored.
+            value (str or dict): The value to be stored.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the item will expire and be deleted after this duration.
+
+        Returns:
+            bool: True if the value was saved, False if the key already exists.
+
+        """
+        return self.backend.add(key=key, value=value, ttl=ttl)
+
+    def get(self, key):
+        """
+        Retrieve a value from the L1 cache, falling back to the backend on a miss.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            The retrieved value, or None if the key does not exist.
+            If the value was stored as a JSON string, it will be returned as a dict.
+
+        """
+        entry = self.get_entry(key)
+        return entry.value if entry else None
+
+    def get_entry(self, key):
+        """
+        Retrieve an entry from the L1 cache, falling back to the backend on a miss.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            CacheEntry: The retrieved entry, or None if the key does not exist.
+
+        """
+        entry = self._get_local(key)
+
+        if entry is not None:
+            # Callers get their own copy, so they can't modify the cached value
+            return copy.deepcopy(entry)
+
+        entry = self.backend.get_entry(key=key)
+
+        if entry is not None:
+            self._set_local(key, entry)
+
+        return entry
+
+    def get_many(self, keys):
+        """
+        Retrieve several values from the L1 cache, reading only the missing ones from the backend at once.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved values by their keys, keys that do not exist are omitted.
+
+        """
+        return {key: entry.value for key, entry in self.get_many_entries(keys).items()}
+
+    def get_many_entries(self, keys):
+        """
+        Retrieve several entries from the L1 cache, reading only the missing ones from the backend at once.
+        Entries read from the backend are kept in the L1 cache with their soft expiry and validators.
+
+        Args:
+            keys (Iterable[str]): The cache keys.
+
+        Returns:
+            dict: The retrieved entries by their keys, keys that do not exist are omitted.
+
+        """
+        entries = {}
+        missing_keys = []
+
+        for key in dict.fromkeys(keys):
+            entry = self._get_local(key)
+
+            if entry is not None:
+                # Callers get their own copy, so they can't modify the cached value
+                entries[key] = copy.deepcopy(entry)
+            else:
+                missing_keys.append(key)
+
+        if missing_keys:
+            backend_entries = self.backend.get_many_entries(keys=missing_keys)
+
+            for key, entry in backend_entries.items():
+                self._set_local(key, entry)
+
+            entries.update(backend_entries)
+
+        return entries
+
+    def set_many(self, mapping, ttl=None):
+        """
+        Save or overwrite several values in both cache levels with an optional TTL.
+
+        Args:
+            mapping (dict): The values (or CacheEntry) to be stored by their cache keys.
+            ttl (int, optional): The time-to-live (TTL) in seconds. If provided,
+                the items will expire and be deleted after this duration.
+
+        """
+        self.backend.set_many(mapping=mapping, ttl=ttl)
+
+        for key, value in mapping.items():
+            self._set_local(key, value, ttl=ttl)
+
+    def clear(self):
+        """
+        Remove all entries from the L1 cache.
+
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
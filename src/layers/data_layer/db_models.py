@@ -5,14 +5,29 @@ But I added it to show that it is possible to use models when working with Dynam
 
 """
 
+import zlib
+from datetime import datetime, UTC
+from concurrent.futures import ThreadPoolExecutor
+
 from pynamodb.models import Model
-from pynamodb.attributes import UnicodeAttribute, NumberAttribute
+from pynamodb.attributes import UnicodeAttribute, NumberAttribute, TTLAttribute
 from pynamodb.indexes import GlobalSecondaryIndex, AllProjection
 
+# Partition key of all Pokémon summaries in the leaderboard indexes, sharded like the battle GSIs,
+# so the summary updates of every battle do not all land on a single GSI partition
+LEADERBOARD = "all"
+LEADERBOARD_SHARDS = 8
+# Number of shards of the battle GSIs per winner, changing it hides battles in the removed shards
+# (or requires a backfill of 'winner_shard')
+WINNER_SHARDS = 8
+# Number of shards of the battle GSI per day, battles of a day are read from it by the archive export
+DAY_SHARDS = 8
+
 
 class WinnerOpponentIndex(GlobalSecondaryIndex):
     """
     This class represents a global secondary index (GSI) for querying by 'winner' and 'opponent'.
+    Read until 'winner_shard' is backfilled, removed in the last stage of the migration to the sharded indexes.
 
     """
 
@@ -27,6 +42,7 @@ class WinnerOpponentIndex(GlobalSecondaryIndex):
 class WinnerTimestampIndex(GlobalSecondaryIndex):
     """
     This class represents a global secondary index (GSI) for querying by 'winner' and 'timestamp'.
+    Read until 'winner_shard' is backfilled, removed in the last stage of the migration to the sharded indexes.
 
     """
 
@@ -38,9 +54,284 @@ class WinnerTimestampIndex(GlobalSecondaryIndex):
     timestamp = NumberAttribute(range_key=True)
 
 
+class WinnerShardOpponentIndex(GlobalSecondaryIndex):
+    """
+    This class represents a global secondary index (GSI) for querying by 'winner_shard' and 'opponent'.
+
+    """
+
+    class Meta:
+        index_name = "winner_shard_opponent_index"
+        projection = AllProjection()
+
+    winner_shard = UnicodeAttribute(hash_key=True)
+    opponent = UnicodeAttribute(range_key=True)
+
+
+class WinnerShardTimestampIndex(GlobalSecondaryIndex):
+    """
+    This class represents a global secondary index (GSI) for querying by 'winner_shard' and 'timestamp'.
+
+    """
+
+    class Meta:
+        index_name = "winner_shard_timestamp_index"
+        projection = AllProjection()
+
+    winner_shard = UnicodeAttribute(hash_key=True)
+    timestamp = NumberAttribute(range_key=True)
+
+
+class DayShardTimestampIndex(GlobalSecondaryIndex):
+    """
+    This class represents a global secondary index (GSI) for querying by 'day_shard' and 'timestamp'.
+
+    """
+
+    class Meta:
+        index_name = "day_shard_timestamp_index"
+        projection = AllProjection()
+
+    day_shard = UnicodeAttribute(hash_key=True)
+    timestamp = NumberAttribute(range_key=True)
+
+
+def winner_shard_key(winner, battle_id):
+    """
+    Builds the sharded GSI key of a battle: battles of a winner are spread over WINNER_SHARDS partitions
+    by their ID, so a popular Pokémon does not concentrate writes and reads on a single partition.
+
+    Args:
+        winner (str): The winner name.
+        battle_id (str): The battle ID.
+
+    Returns:
+        str: The key '<winner>#<shard>'.
+    """
+    return f"{winner}#{zlib.crc32(battle_id.encode()) % WINNER_SHARDS}"
+
+
+def day_shard_key(timestamp, battle_id):
+    """
+    Builds the sharded day GSI key of a battle: battles of a day are spread over DAY_SHARDS partitions by their ID,
+    so writes of the current day do not concentrate on a single partition.
+
+    Args:
+        timestamp (int): The battle timestamp.
+        battle_id (str): The battle ID.
+
+    Returns:
+        str: The key '<YYYY-MM-DD>#<shard>' with the day in UTC.
+    """
+    day = datetime.fromtimestamp(timestamp, UTC).strftime("%Y-%m-%d")
+    return f"{day}#{zlib.crc32(battle_id.encode()) % DAY_SHARDS}"
+
+
+def leaderboard_shard_key(pokemon):
+    """
+    Builds the sharded leaderboard GSI key of a Pokémon summary: summaries are spread over LEADERBOARD_SHARDS
+    partitions by the Pokémon name, so a Pokémon always stays in the same shard.
+
+    Args:
+        pokemon (str): The Pokémon name.
+
+    Returns:
+        str: The key '<LEADERBOARD>#<shard>'.
+    """
+    return f"{LEADERBOARD}#{zlib.crc32(pokemon.encode()) % LEADERBOARD_SHARDS}"
+
+
+class MergedResultIterator:
+    """
+    Merges the results of the queries of all shards of an index into a single iterator ordered by the range key,
+    like the result iterator of a query of a non-sharded index. The first page of every shard is read concurrently,
+    next pages only when they are needed.
+
+    Its `last_evaluated_key` maps every shard with more items to the key, from which its query continues
+    (None if the shard was not read yet), so a query can be resumed from it.
+    """
+
+    def __init__(self, results, range_key, scan_index_forward=True, shard_keys=None):
+        """
+        Args:
+            results (dict): Result iterators of the shard queries, keyed by the shard.
+            range_key (str): The name of the range key of the index, by which the results are ordered.
+            scan_index_forward (bool): Whether the results are in ascending order.
+            shard_keys (dict, optional): Keys from which the shard queries start, keyed by the shard.
+        """
+        self.results = results
+        self.range_key = range_key
+        self.scan_index_forward = scan_index_forward
+        self.shard_keys = dict(shard_keys or dict.fromkeys(results))
+        # The next item of every shard with the key of the shard after the item, read ahead of the merge
+        self.heads = None
+
+    def _read_head(self, shard):
+        results = self.results[shard]
+
+        try:
+            item = next(results)
+        except StopIteration:
+            self.heads.pop(shard, None)
+
+            # The query of the shard can also stop at its limit, then it continues from the last returned item
+            if results.last_evaluated_key is None:
+                self.shard_keys.pop(shard, None)
+            return
+
+        self.heads[shard] = (item, results.last_evaluated_key)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.heads is None:
+            self.heads = {}
+
+            with ThreadPoolExecutor(max_workers=len(self.results) or 1) as executor:
+                list(executor.map(self._read_head, list(self.results)))
+
+        if not self.heads:
+            raise StopIteration
+
+        choose = min if self.scan_index_forward else max
+        shard = choose(self.heads, key=lambda shard: getattr(self.heads[shard][0], self.range_key))
+        item, shard_key = self.heads.pop(shard)
+
+        if shard_key is None:
+            self.shard_keys.pop(shard, None)
+        else:
+            self.shard_keys[shard] = shard_key
+
+        self._read_head(shard)
+        return item
+
+    @property
+    def last_evaluated_key(self):
+        if not self.shard_keys:
+            return None
+
+        return {str(shard): shard_key for shard, shard_key in self.shard_keys.items()}
+
+
+class ShardedIndex:
+    """
+    Scatter-gather access to a GSI with a sharded hash key ('<key>#<shard>', e.g. 'winner_shard'): a query by
+    the key (e.g. the winner name) queries all shards and merges their results, so callers use it like the index
+    of a non-sharded key.
+
+    """
+
+    def __init__(self, index, range_key, shards=None):
+        """
+        Args:
+            index (GlobalSecondaryIndex): The index with the sharded hash key.
+            range_key (str): The name of the range key of the index.
+            shards (int, optional): The number of shards, WINNER_SHARDS by default.
+        """
+        self.index = index
+        self.range_key = range_key
+        self.shards = shards or WINNER_SHARDS
+        self.Meta = index.Meta
+
+    @property
+    def hash_key_name(self):
+        """The name of the hash key attribute of the index."""
+        return self.index._hash_key_attribute().attr_name
+
+    def shard_key(self, hash_key, shard):
+        """
+        Builds the hash key of a shard.
+
+        Args:
+            hash_key (str): The key without the shard.
+            shard (int): The shard.
+
+        Returns:
+            str: The key '<hash_key>#<shard>'.
+        """
+        return f"{hash_key}#{shard}"
+
+    def query(
+        self,
+        hash_key,
+        range_key_condition=None,
+        filter_condition=None,
+        scan_index_forward=None,
+        limit=None,
+        last_evaluated_key=None,
+        attributes_to_get=None,
+    ):
+        """
+        Queries all shards of the index for a key.
+
+        Args:
+            hash_key (str): The key without the shard, e.g. the winner name.
+            last_evaluated_key (dict, optional): The `last_evaluated_key` of a previous query, from which it continues.
+            Other arguments are passed to the query of every shard.
+
+        Returns:
+            MergedResultIterator: The merged results, ordered by the range key.
+
+        Raises:
+            ValueError: If the last evaluated key is not a key of a previous query.
+        """
+        if last_evaluated_key is None:
+            shard_keys = dict.fromkeys(range(self.shards))
+        else:
+            try:
+                shard_keys = {int(shard): shard_key for shard, shard_key in last_evaluated_key.items()}
+            except (AttributeError, TypeError, ValueError) as e:
+                raise ValueError("Invalid last evaluated key of a sharded query.") from e
+
+        results = {
+            shard: self.index.query(
+                self.shard_key(hash_key, shard),
+                range_key_condition,
+                filter_condition=filter_condition,
+                scan_index_forward=scan_index_forward,
+                limit=limit,
+                last_evaluated_key=shard_key,
+                attributes_to_get=attributes_to_get,
+            )
+            for shard, shard_key in shard_keys.items()
+        }
+
+        return MergedResultIterator(
+            results=results,
+            range_key=self.range_key,
+            scan_index_forward=scan_index_forward is not False,
+            shard_keys=shard_keys,
+        )
+
+
+class UnshardedIndex(ShardedIndex):
+    """
+    Access to a GSI with a non-sharded hash key through the interface of `ShardedIndex`, so the indexes
+    can be switched by configuration while the sharded key is backfilled.
+
+    """
+
+    def __init__(self, index, range_key):
+        """
+        Args:
+            index (GlobalSecondaryIndex): The index with the non-sharded hash key.
+            range_key (str): The name of the range key of the index.
+        """
+        super().__init__(index, range_key, shards=1)
+
+    def shard_key(self, hash_key, shard):
+        return hash_key
+
+
 class BattleModel(Model):
     """
     Model 'Battle' for the DynamoDB table.
+    The GSIs are keyed by the sharded 'winner_shard' attribute, which is set from 'winner' and 'id'
+    when a battle is created, and queried by the winner name through `ShardedIndex`.
+    The day GSI is keyed by the sharded 'day_shard' attribute, set from 'timestamp' and 'id' as well.
+    Battles created before the sharded GSIs get the keys from the backfill (the 'battle_backfill' function),
+    until then they are read from the legacy GSIs keyed by 'winner'.
 
     """
 
@@ -54,7 +345,89 @@ class BattleModel(Model):
     opponent = UnicodeAttribute()
     winner_total_stats = NumberAttribute()
     opponent_total_stats = NumberAttribute()
+    winner_shard = UnicodeAttribute(null=True)
+    day_shard = UnicodeAttribute(null=True)
 
     # GSIs
-    winner_opponent_index = WinnerOpponentIndex()
-    winner_timestamp_index = WinnerTimestampIndex()
+    winner_shard_opponent_index = WinnerShardOpponentIndex()
+    winner_shard_timestamp_index = WinnerShardTimestampIndex()
+    legacy_winner_opponent_index = WinnerOpponentIndex()
+    legacy_winner_timestamp_index = WinnerTimestampIndex()
+    day_shard_timestamp_index = DayShardTimestampIndex()
+
+    # Sharded access to the GSIs by the winner name
+    winner_opponent_index = ShardedIndex(winner_shard_opponent_index, range_key="opponent")
+    winner_timestamp_index = ShardedIndex(winner_shard_timestamp_index, range_key="timestamp")
+    # Access to the legacy GSIs by the winner name, through the same interface
+    unsharded_winner_opponent_index = UnshardedIndex(legacy_winner_opponent_index, range_key="opponent")
+    unsharded_winner_timestamp_index = UnshardedIndex(legacy_winner_timestamp_index, range_key="timestamp")
+
+    def __init__(self, hash_key=None, range_key=None, _user_instantiated=True, **attributes):
+        super().__init__(hash_key, range_key, _user_instantiated=_user_instantiated, **attributes)
+
+        # Battles read from the table already have the keys
+        if _user_instantiated and self.winner_shard is None and self.id and self.winner:
+            self.winner_shard = winner_shard_key(self.winner, self.id)
+
+        if _user_instantiated and self.day_shard is None and self.id and self.timestamp is not None:
+            self.day_shard = day_shard_key(self.timestamp, self.id)
+
+
+class LeaderboardWinsIndex(GlobalSecondaryIndex):
+    """
+    This class represents a global secondary index (GSI) for querying the leaderboard by 'wins'.
+
+    """
+
+    class Meta:
+        index_name = "leaderboard_wins_index"
+        projection = AllProjection()
+
+    board = UnicodeAttribute(hash_key=True)
+    wins = NumberAttribute(range_key=True)
+
+
+class LeaderboardWinRateIndex(GlobalSecondaryIndex):
+    """
+    This class represents a global secondary index (GSI) for querying the leaderboard by 'win_rate'.
+
+    """
+
+    class Meta:
+        index_name = "leaderboard_win_rate_index"
+        projection = AllProjection()
+
+    board = UnicodeAttribute(hash_key=True)
+    win_rate = NumberAttribute(range_key=True)
+
+
+class PokemonSummaryModel(Model):
+    """
+    Model 'Pokémon summary' for the DynamoDB table with win/loss aggregates of every Pokémon,
+    maintained from the stream of the battle table. The leaderboard GSIs are keyed by the sharded 'board'
+    attribute (see `leaderboard_shard_key`) and queried through `ShardedIndex`.
+    Battles already added to the aggregates are marked with items with the 'battle#<id>' key and a TTL.
+
+    """
+
+    class Meta:
+        table_name = "ede-demo-battle-summary"
+
+    # Table attributes
+    pokemon = UnicodeAttribute(hash_key=True)
+    board = UnicodeAttribute(null=True)
+    wins = NumberAttribute(null=True)
+    losses = NumberAttribute(null=True)
+    battles = NumberAttribute(null=True)
+    win_rate = NumberAttribute(null=True)
+    last_battle_at = NumberAttribute(null=True)
+    last_battle_id = UnicodeAttribute(null=True)
+    ttl = TTLAttribute(null=True)
+
+    # GSIs
+    leaderboard_wins_index = LeaderboardWinsIndex()
+    leaderboard_win_rate_index = LeaderboardWinRateIndex()
+
+    # Sharded access to the GSIs by LEADERBOARD
+    leaderboard_wins = ShardedIndex(leaderboard_wins_index, range_key="wins", shards=LEADERBOARD_SHARDS)
+    leaderboard_win_rate = ShardedIndex(leaderboard_win_rate_index, range_key="win_rate", shards=LEADERBOARD_SHARDS)
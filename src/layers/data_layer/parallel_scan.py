@@ -0,0 +1,410 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Error codes of DynamoDB requests rejected for exceeding the capacity of the table
+THROTTLING_ERROR_CODES = {"ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded"}
+# Maximum number of items in a BatchWriteItem request
+BATCH_WRITE_SIZE = 25
+
+
+class AdaptiveCapacityLimiter:
+    """
+    Rate limiter of consumed capacity units shared by the workers of a scan. Units are paid after a request,
+    when its consumed capacity is known, and the next request waits until the debt is paid off at the current rate.
+    The rate adapts to the table (additive increase, multiplicative decrease): it grows after every successful
+    request and is cut when DynamoDB throttles a request.
+    """
+
+    def __init__(self, rate, min_rate=1.0, max_rate=None, increase=1.0, decrease=0.5):
+        """
+        Initializes the rate limiter.
+
+        Args:
+            rate (float): The initial number of capacity units consumed per second.
+            min_rate (float): The minimum rate, to which throttling cuts it.
+            max_rate (float, optional): The maximum rate, the initial rate by default.
+            increase (float): The number of units per second added to the rate after a successful request.
+            decrease (float): The factor, by which the rate is multiplied when a request is throttled.
+        """
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate
+        self.increase = increase
+        self.decrease = decrease
+
+        self.tokens = 0.0
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+        self.consumed = 0.0
+        self.throttled = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait(self):
+        """Waits until the capacity consumed by previous requests is paid off."""
+        with self.lock:
+            self._refill()
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        time.sleep(wait)
+
+    def consume(self, units):
+        """
+        Pays the capacity consumed by a successful request.
+
+        Args:
+            units (float): The consumed capacity units.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= units
+            self.consumed += units
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def throttle(self):
+        """Cuts the rate after a throttled request."""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.throttled += 1
+
+    @property
+    def metrics(self):
+        """
+        Metrics of the rate limiter.
+
+        Returns:
+            dict: The current rate, consumed capacity units and number of throttled requests.
+        """
+        return {"rate": round(self.rate, 2), "consumed": round(self.consumed, 2), "throttled": self.throttled}
+
+
+class ParallelScan:
+    """
+    Parallel scan/transform/write engine for full-table work on a PynamoDB model: backfills of attributes,
+    recomputation of derived values, copies to a new table (e.g. with another key schema).
+
+    The table is scanned in `total_segments` segments (DynamoDB Segment/TotalSegments), each by its own worker.
+    Segments can also be read with queries, e.g. of the shards of a GSI, when only a part of the table is needed.
+    Every scanned item is passed to the transform, items it returns are written (put) to the target table,
+    or passed to the writer (e.g. written to S3).
+    All reads and writes share an adaptive capacity limiter. The progress of every segment is checkpointed
+    in the cache table, so an interrupted run resumes where it stopped. Items can be processed again after
+    an interruption (since the last checkpoint), so transforms must be idempotent.
+    """
+
+    def __init__(
+        self,
+        model,
+        transform,
+        target_model=None,
+        total_segments=4,
+        page_size=500,
+        rate_limiter=None,
+        cache_cli=None,
+        checkpoint_key=None,
+        checkpoint_ttl=7 * 86400,
+        checkpoint_interval=5,
+        max_attempts=10,
+        query=None,
+        writer=None,
+        part_size=None,
+    ):
+        """
+        Initializes the scan.
+
+        Args:
+            model (Type[Model]): The PynamoDB model of the scanned table.
+            transform (callable): Called with every scanned item (a model instance), returns the item to write
+                (an instance of the target model) or None to skip it.
+            target_model (Type[Model], optional): The model of the table written to, the scanned model by default.
+            total_segments (int): The number of segments, i.e. of concurrent workers.
+            page_size (int): The maximum number of items read by a Scan request.
+            rate_limiter (AdaptiveCapacityLimiter, optional): The limiter of consumed capacity, unlimited by default.
+            cache_cli (Cache, optional): The cache client, in which the checkpoint is stored.
+            checkpoint_key (str, optional): The cache key of the checkpoint, the run is not resumable without it.
+            checkpoint_ttl (int): Time in seconds the checkpoint is kept.
+            checkpoint_interval (float): Minimum time in seconds between checkpoints of a running scan.
+            max_attempts (int): The maximum number of attempts of a throttled request.
+            query (callable, optional): Called with a segment, returns the parameters of the Query, which reads
+                the segment instead of a Scan segment (IndexName, KeyConditionExpression, ExpressionAttributeValues).
+            writer (callable, optional): Called with a segment, the number of the part and the transformed items
+                of a page, writes them instead of the target table. The number of parts is checkpointed
+                with the segment, so a page read again after an interruption is written as the same part.
+            part_size (int, optional): The minimum number of items of a part written by the writer, pages are
+                buffered until they fill a part. Every page is a part by default.
+        """
+        self.model = model
+        self.transform = transform
+        self.target_model = target_model or model
+        self.total_segments = total_segments
+        self.page_size = page_size
+        self.rate_limiter = rate_limiter
+        self.cache_cli = cache_cli
+        self.checkpoint_key = checkpoint_key
+        self.checkpoint_ttl = checkpoint_ttl
+        self.checkpoint_interval = checkpoint_interval
+        self.max_attempts = max_attempts
+        self.query = query
+        self.writer = writer
+        self.part_size = part_size
+
+        self.client = boto3.client("dynamodb")
+        self.checkpoint = None
+        self.checkpoint_saved_at = 0.0
+        self.lock = threading.Lock()
+        self.failed = threading.Event()
+
+        self.scanned = 0
+        self.written = 0
+
+        self.logger = logging.getLogger()
+
+    def _load_checkpoint(self):
+        """
+        Reads the checkpoint of a previous run, or starts a new one if there is none or the previous run completed.
+
+        Raises:
+            ValueError: If the checkpoint has another number of segments.
+        """
+        checkpoint = None
+
+        if self.cache_cli is not None and self.checkpoint_key:
+            checkpoint = self.cache_cli.get(key=self.checkpoint_key)
+
+        if checkpoint and not checkpoint["completed"]:
+            if checkpoint["total_segments"] != self.total_segments:
+                raise ValueError(
+                    f"Checkpoint has {checkpoint['total_segments']} segments, scan has {self.total_segments}."
+                )
+
+            self.logger.info(f"Resuming scan of {self.model.Meta.table_name} from checkpoint: {self.checkpoint_key}")
+            return checkpoint
+
+        return {
+            "total_segments": self.total_segments,
+            "segments": {
+                str(segment): {"last_evaluated_key": None, "parts": 0, "completed": False}
+                for segment in range(self.total_segments)
+            },
+            "completed": False,
+        }
+
+    def _save_checkpoint(self, force=False):
+        if self.cache_cli is None or not self.checkpoint_key:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+
+            if not force and now - self.checkpoint_saved_at < self.checkpoint_interval:
+                return
+
+            self.checkpoint_saved_at = now
+            self.cache_cli.set(key=self.checkpoint_key, value=self.checkpoint, ttl=self.checkpoint_ttl)
+
+    def _request(self, operation, **kwargs):
+        """
+        Sends a request within the capacity limit, retrying it with backoff while it is throttled.
+
+        Returns:
+            dict: The response.
+        """
+        for attempt in range(self.max_attempts):
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait()
+
+            try:
+                response = operation(ReturnConsumedCapacity="TOTAL", **kwargs)
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in THROTTLING_ERROR_CODES or attempt == self.max_attempts - 1:
+                    raise
+
+                if self.rate_limiter is not None:
+                    self.rate_limiter.throttle()
+
+                time.sleep(min(2**attempt * 0.05, 5))
+                continue
+
+            if self.rate_limiter is not None:
+                consumed_capacity = response.get("ConsumedCapacity", [])
+
+                if isinstance(consumed_capacity, dict):
+                    consumed_capacity = [consumed_capacity]
+
+                self.rate_limiter.consume(sum(capacity.get("CapacityUnits", 0) for capacity in consumed_capacity))
+
+            return response
+
+    def _write(self, items):
+        """
+        Puts items to the target table with BatchWriteItem requests, until all of them are processed.
+
+        Args:
+            items (list): Instances of the target model.
+        """
+        table_name = self.target_model.Meta.table_name
+
+        for start in range(0, len(items), BATCH_WRITE_SIZE):
+            write_requests = [
+                {"PutRequest": {"Item": item.serialize()}} for item in items[start : start + BATCH_WRITE_SIZE]
+            ]
+
+            for attempt in range(self.max_attempts):
+                response = self._request(self.client.batch_write_item, RequestItems={table_name: write_requests})
+                write_requests = response.get("UnprocessedItems", {}).get(table_name, [])
+
+                if not write_requests:
+                    break
+
+                # Unprocessed items are a sign of throttling as well
+                if self.rate_limiter is not None:
+                    self.rate_limiter.throttle()
+
+                time.sleep(min(2**attempt * 0.05, 5))
+            else:
+                raise RuntimeError(f"Items could not be written to {table_name}: {len(write_requests)} unprocessed.")
+
+    def _write_part(self, segment, state, items, last_evaluated_key):
+        """
+        Writes the buffered items of a segment as its next part with the writer, then moves the checkpointed key
+        of the segment after them.
+
+        Args:
+            segment (int): The segment.
+            state (dict): The checkpointed state of the segment.
+            items (list): The buffered items.
+            last_evaluated_key (dict): The key after the last buffered item, None at the end of the segment.
+        """
+        self.writer(segment, state.get("parts", 0), items)
+
+        with self.lock:
+            self.written += len(items)
+            state["parts"] = state.get("parts", 0) + 1
+            state["last_evaluated_key"] = last_evaluated_key
+            state["completed"] = last_evaluated_key is None
+
+    def scan_segment(self, segment, should_stop):
+        """
+        Scans, transforms and writes the items of a segment, from its checkpointed key.
+        Items for the writer are buffered until they fill a part, the checkpointed key is the key after
+        the last written part, so a part is read again after an interruption and written as the same part.
+
+        Returns:
+            bool: True if the segment was processed completely, False if it stopped.
+        """
+        state = self.checkpoint["segments"][str(segment)]
+        # The key, from which the next page is read, is ahead of the checkpointed key while items are buffered
+        start_key = state["last_evaluated_key"]
+        buffered_items = []
+
+        while not state["completed"]:
+            # Workers also stop when another one failed, the run is resumed from the checkpoint
+            if self.failed.is_set():
+                return False
+
+            if should_stop():
+                # The buffered items are written as a smaller part, so they are not read again by the next run
+                if buffered_items:
+                    try:
+                        self._write_part(segment, state, buffered_items, start_key)
+                    except Exception:
+                        self.failed.set()
+                        raise
+
+                return False
+
+            kwargs = {"ExclusiveStartKey": start_key} if start_key else {}
+
+            if self.query is not None:
+                kwargs.update(self.query(segment))
+            else:
+                kwargs.update(Segment=segment, TotalSegments=self.total_segments)
+
+            try:
+                response = self._request(
+                    self.client.query if self.query is not None else self.client.scan,
+                    TableName=self.model.Meta.table_name,
+                    Limit=self.page_size,
+                    **kwargs,
+                )
+                items = [self.model.from_raw_data(item) for item in response.get("Items", [])]
+                transformed_items = [item for item in map(self.transform, items) if item is not None]
+                start_key = response.get("LastEvaluatedKey")
+
+                if self.writer is not None:
+                    buffered_items.extend(transformed_items)
+                elif transformed_items:
+                    self._write(transformed_items)
+
+                # Every page is a part, unless parts have a minimum size, the last part of a segment can be smaller
+                if buffered_items and (start_key is None or len(buffered_items) >= (self.part_size or 1)):
+                    self._write_part(segment, state, buffered_items, start_key)
+                    buffered_items = []
+            except Exception:
+                self.failed.set()
+                raise
+
+            with self.lock:
+                self.scanned += len(items)
+
+                if self.writer is None:
+                    self.written += len(transformed_items)
+
+                # Without buffered items, the page ends at a part boundary
+                if not buffered_items:
+                    state["last_evaluated_key"] = start_key
+                    state["completed"] = start_key is None
+
+            self._save_checkpoint()
+
+        return True
+
+    def run(self, should_stop=None):
+        """
+        Runs the scan in all segments concurrently, resuming from the checkpoint of an interrupted run.
+
+        Args:
+            should_stop (callable, optional): Returns True when the scan has to stop, e.g. before a Lambda timeout.
+                It is checked before every page.
+
+        Returns:
+            dict: Numbers of scanned and written items, whether the scan completed and metrics of the rate limiter.
+        """
+        should_stop = should_stop or (lambda: False)
+        self.checkpoint = self._load_checkpoint()
+        self.failed.clear()
+        started_at = time.monotonic()
+
+        completed = False
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.total_segments) as executor:
+                segments = range(self.total_segments)
+                completed = all(list(executor.map(self.scan_segment, segments, [should_stop] * len(segments))))
+        finally:
+            # Progress of the segments is kept even if one of them failed
+            self.checkpoint["completed"] = completed
+            self._save_checkpoint(force=True)
+
+        elapsed = time.monotonic() - started_at
+        self.logger.info(
+            f"Scanned {self.scanned} items of {self.model.Meta.table_name} in {elapsed:.1f}s, "
+            f"written: {self.written}, completed: {completed}"
+        )
+
+        return {
+            "scanned": self.scanned,
+            "written": self.written,
+            "elapsed_seconds": round(elapsed, 1),
+            "completed": completed,
+            "capacity": self.rate_limiter.metrics if self.rate_limiter is not None else None,
+        }
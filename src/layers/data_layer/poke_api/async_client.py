@@ -0,0 +1,144 @@
+import asyncio
+
+import httpx
+
+from poke_api.client import BasePokeAPIClient
+
+
+class AsyncPokeAPIClient(BasePokeAPIClient):
+    """Asynchronous client for Poke API, with a connection pool shared by concurrent requests."""
+
+    retry_status_codes = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        jitter_type="balanced",
+        total_retries=3,
+        backoff_factor=0.5,
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=30.0,
+        http2=False,
+        timeout=10.0,
+    ):
+        """
+        Initializes the client.
+
+        Args:
+            jitter_type (str): The jitter type of the retry backoff: 'none', 'balanced', 'aggressive' or 'conservative'.
+            total_retries (int): The number of retries of failed requests (429 and 5xx responses or network errors).
+            backoff_factor (float): The base of the exponential retry backoff in seconds.
+            max_connections (int): The maximum number of connections in the pool.
+            max_keepalive_connections (int): The maximum number of idle connections kept alive in the pool.
+            keepalive_expiry (float): Time in seconds after which idle connections are closed.
+            http2 (bool): Whether to use HTTP/2, which multiplexes concurrent requests over a single connection.
+                Requires the 'h2' package.
+            timeout (float): The timeout of requests in seconds.
+        """
+        super().__init__(jitter_type=jitter_type, total_retries=total_retries, backoff_factor=backoff_factor)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Creates a persistent HTTP client with a connection pool on first use.
+
+        Returns:
+            httpx.AsyncClient: A configured HTTP client.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, http2=self.http2, timeout=self.timeout, verify=False)
+        return self._client
+
+    async def close(self):
+        """Closes all connections of the pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _get(self, url):
+        """
+        Sends a GET request, retrying 429 and 5xx responses and network errors with exponential backoff and jitter.
+
+        Args:
+            url (str): The URL of the request.
+
+        Returns:
+            httpx.Response: The last response.
+        """
+        for attempt in range(self.total_retries + 1):
+            is_last_attempt = attempt == self.total_retries
+
+            try:
+                response = await self.client.get(url)
+
+                if response.status_code not in self.retry_status_codes or is_last_attempt:
+                    return response
+            except httpx.TransportError:
+                if is_last_attempt:
+                    raise
+
+            await asyncio.sleep(self.backoff_factor * 2**attempt * self.jitter_coefficient)
+
+    async def fetch_pokemon_data(self, pokemon_id, battle_data=True):
+        """
+        Fetches data for a given Pokemon by its ID or name from PokeAPI.
+
+        Args:
+            pokemon_id (str or int): The Pokemon ID or name.
+            battle_data (bool): Whether to extract battle data from the full Pokemon data.
+
+        Returns:
+            dict: Pokemon data relevant for battles, including name and stats, or
+                  None if the data could not be fetched.
+        """
+        url = f"{self.mirror_url or self.base_url}{pokemon_id}"
+
+        try:
+            response = await self._get(url)
+
+            if response.status_code == 200:
+                pokemon_data = response.json()
+                return self.extract_battle_data(pokemon_data=pokemon_data) if battle_data else pokemon_data
+            elif response.status_code == 404:
+                return None
+            else:
+                self.logger.error(f"HTTP Error: {response.status_code}.")
+        except httpx.HTTPError as e:
+            self.logger.exception(f"Request failed: {str(e)}")
+            return None
+
+    async def fetch_many(self, pokemon_ids, concurrency=10, battle_data=True):
+        """
+        Fetches data for several Pokemon concurrently.
+
+        Args:
+            pokemon_ids (Iterable[str or int]): The Pokemon IDs or names, duplicates are fetched once.
+            concurrency (int): The maximum number of requests in flight.
+            battle_data (bool): Whether to extract battle data from the full Pokemon data.
+
+        Returns:
+            dict: Pokemon data by the requested IDs, with None for Pokemon which could not be fetched.
+        """
+        pokemon_ids = list(dict.fromkeys(pokemon_ids))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(pokemon_id):
+            async with semaphore:
+                return await self.fetch_pokemon_data(pokemon_id=pokemon_id, battle_data=battle_data)
+
+        results = await asyncio.gather(*(fetch(pokemon_id) for pokemon_id in pokemon_ids))
+        return dict(zip(pokemon_ids, results))
@@ -1,14 +1,35 @@
 import random
 import logging
 from functools import cached_property
+from typing import NamedTuple, Optional
 
 import requests
 from requests import Session
 from requests.adapters import HTTPAdapter, Retry
 
+from poke_api.streaming import ijson, extract_battle_data_from_chunks
+from poke_api.resilience import PokeAPIUnavailableError
 
-class PokeAPIClient:
-    """Client for Poke API."""
+
+class PokemonDataResponse(NamedTuple):
+    """
+    Pokemon data fetched with a conditional request, together with its validators.
+
+    Attributes:
+        data (dict): The Pokemon data, or None if it was not modified or could not be fetched.
+        not_modified (bool): Whether PokeAPI responded with 304 Not Modified, so the cached data is still valid.
+        etag (str, optional): The ETag of the Pokemon data, sent back as If-None-Match.
+        last_modified (str, optional): The Last-Modified date of the Pokemon data, sent back as If-Modified-Since.
+    """
+
+    data: Optional[dict] = None
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class BasePokeAPIClient:
+    """Settings and data processing shared by the Poke API clients."""
 
     base_url = "https://pokeapi.co/api/v2/pokemon/"
     mirror_url = None
@@ -38,27 +59,6 @@ class PokeAPIClient:
         jitter_coefficient_range = settings.get(self.jitter_type, (0.75, 1.25))
         return random.uniform(*jitter_coefficient_range)
 
-    @cached_property
-    def session(self) -> Session:
-        """
-        Creates a persistent requests session with a retry policy for API requests.
-
-        Returns:
-            Session: A configured requests' session.
-        """
-        retry_strategy = Retry(
-            total=self.total_retries,
-            backoff_factor=self.backoff_factor,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET"],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session = Session()
-        session.mount("https://", adapter)
-        session.mount("http://", adapter)
-        session.verify = False
-        return session
-
     @staticmethod
     def extract_battle_data(pokemon_data):
         """
@@ -84,6 +84,112 @@ class PokeAPIClient:
             "pokemon_image": pokemon_data["sprites"]["front_default"],
         }
 
+
+class PokeAPIClient(BasePokeAPIClient):
+    """Client for Poke API."""
+
+    # Size of chunks in which responses are read, when battle data is extracted from a stream
+    stream_chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        jitter_type="balanced",
+        total_retries=3,
+        backoff_factor=0.5,
+        rate_limiter=None,
+        circuit_breaker=None,
+    ):
+        """
+        Initializes the client.
+
+        Args:
+            jitter_type (str): The jitter type of the retry backoff: 'none', 'balanced', 'aggressive' or 'conservative'.
+            total_retries (int): The number of retries of failed requests (429 and 5xx responses or network errors).
+            backoff_factor (float): The base of the exponential retry backoff in seconds.
+            rate_limiter (TokenBucket, optional): The rate limiter of requests to PokeAPI.
+            circuit_breaker (CircuitBreaker, optional): The circuit breaker of requests to PokeAPI.
+        """
+        super().__init__(jitter_type=jitter_type, total_retries=total_retries, backoff_factor=backoff_factor)
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+
+    @property
+    def metrics(self):
+        """
+        Metrics of the rate limiter and circuit breaker of the client.
+
+        Returns:
+            dict: Metrics by component, empty if the client has neither of them.
+        """
+        metrics = {}
+
+        if self.rate_limiter is not None:
+            metrics["rate_limiter"] = self.rate_limiter.metrics
+        if self.circuit_breaker is not None:
+            metrics["circuit_breaker"] = self.circuit_breaker.metrics
+
+        return metrics
+
+    def before_request(self):
+        """
+        Checks the circuit breaker and takes a token of the rate limiter before a request is sent.
+
+        Raises:
+            PokeAPIUnavailableError: If the circuit breaker is open or the rate limit is exceeded,
+                so that the request fails fast.
+        """
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+            raise PokeAPIUnavailableError("PokeAPI circuit breaker is open.")
+
+        if self.rate_limiter is not None and not self.rate_limiter.acquire():
+            self.cancel_request()
+            raise PokeAPIUnavailableError("PokeAPI rate limit is exceeded.")
+
+    def cancel_request(self):
+        """
+        Returns the trial request to the circuit breaker if the request was not sent or failed
+        before its outcome was recorded, so that the breaker does not stay half-open.
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.cancel_trial()
+
+    def after_request(self, status_code=None):
+        """
+        Records the outcome of a request in the circuit breaker. Responses with 429 and 5xx status codes
+        and requests without a response are failures of PokeAPI, other responses are successes.
+
+        Args:
+            status_code (int, optional): The status code of the response, None if the request failed.
+        """
+        if self.circuit_breaker is None:
+            return
+
+        if status_code is None or status_code == 429 or status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    @cached_property
+    def session(self) -> Session:
+        """
+        Creates a persistent requests session with a retry policy for API requests.
+
+        Returns:
+            Session: A configured requests' session.
+        """
+        retry_strategy = Retry(
+            total=self.total_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy)
+        session = Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.verify = False
+        return session
+
     def fetch_pokemon_data(self, pokemon_id, battle_data=True):
         """
         Fetches data for a given Pokemon by its ID or name from PokeAPI.
@@ -96,18 +202,107 @@ class PokeAPIClient:
             dict: Pokemon data relevant for battles, including name and stats, or
                   None if the data could not be fetched.
         """
+        return self.fetch_pokemon_data_if_modified(pokemon_id=pokemon_id, battle_data=battle_data).data
+
+    def fetch_pokemon_data_if_modified(self, pokemon_id, etag=None, last_modified=None, battle_data=True):
+        """
+        Fetches data for a given Pokemon by its ID or name from PokeAPI with a conditional request.
+        If validators of previously fetched data are provided and the data has not changed,
+        PokeAPI responds with 304 Not Modified without a body, so nothing is downloaded or parsed.
+        Battle data is extracted from the response while it is streamed (if ijson is installed),
+        without loading the full document, most of which is the 'moves' array, into memory.
+
+        Args:
+            pokemon_id (str or int): The Pokemon ID or name.
+            etag (str, optional): The ETag of previously fetched data.
+            last_modified (str, optional): The Last-Modified date of previously fetched data.
+            battle_data (bool): Whether to extract battle data from the full Pokemon data.
+
+        Returns:
+            PokemonDataResponse: Pokemon data with its validators, without data if it was not modified
+                                 or could not be fetched.
+
+        Raises:
+            PokeAPIUnavailableError: If the circuit breaker is open or the rate limit is exceeded.
+        """
         url = f"{self.mirror_url or self.base_url}{pokemon_id}"
+        headers = {}
+
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        stream = battle_data and ijson is not None
+        self.before_request()
+
+        try:
+            with self.session.get(url, headers=headers, stream=stream) as response:
+                self.after_request(response.status_code)
+
+                if response.status_code == 304:
+                    return PokemonDataResponse(
+                        not_modified=True,
+                        etag=response.headers.get("ETag", etag),
+                        last_modified=response.headers.get("Last-Modified", last_modified),
+                    )
+                elif response.status_code == 200:
+                    if stream:
+                        pokemon_data = extract_battle_data_from_chunks(
+                            response.iter_content(chunk_size=self.stream_chunk_size)
+                        )
+                    else:
+                        pokemon_data = response.json()
+
+                        if battle_data:
+                            pokemon_data = self.extract_battle_data(pokemon_data=pokemon_data)
+
+                    return PokemonDataResponse(
+                        data=pokemon_data,
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                    )
+                elif response.status_code != 404:
+                    self.logger.error(f"HTTP Error: {response.status_code}.")
+        except requests.exceptions.RequestException as e:
+            self.after_request()
+            self.logger.exception(f"Request failed: {str(e)}")
+        except ValueError as e:
+            self.logger.exception(f"Invalid Pokemon document: {str(e)}")
+        except BaseException:
+            self.cancel_request()
+            raise
+
+        return PokemonDataResponse()
+
+    def list_pokemon(self, limit=100, offset=0):
+        """
+        Fetches a page of the Pokemon list from PokeAPI.
+
+        Args:
+            limit (int): The number of Pokemon per page.
+            offset (int): The number of Pokemon to skip.
+
+        Returns:
+            dict: The page with the total 'count', URL of the 'next' page (or None if it is the last page)
+                  and 'results' with Pokemon names and URLs, or None if the page could not be fetched.
+        """
+        # The mirror API serves single Pokemon only, so the list is always fetched from PokeAPI
+        url = f"{self.base_url}?limit={limit}&offset={offset}"
+        self.before_request()
 
         try:
             response = self.session.get(url)
+            self.after_request(response.status_code)
 
             if response.status_code == 200:
-                pokemon_data = response.json()
-                return self.extract_battle_data(pokemon_data=pokemon_data) if battle_data else pokemon_data
-            elif response.status_code == 404:
-                return None
+                return response.json()
             else:
                 self.logger.error(f"HTTP Error: {response.status_code}.")
         except requests.exceptions.RequestException as e:
+            self.after_request()
             self.logger.exception(f"Request failed: {str(e)}")
             return None
+        except BaseException:
+            self.cancel_request()
+            raise
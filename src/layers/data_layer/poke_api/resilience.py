@@ -0,0 +1,206 @@
+import time
+import logging
+import threading
+
+
+class PokeAPIUnavailableError(Exception):
+    """Raised instead of sending a request to PokeAPI, when the circuit breaker is open or the rate limit is hit."""
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared by the threads of a client. Tokens are added at a constant rate
+    up to the capacity, which allows short bursts, and every request takes one.
+    """
+
+    def __init__(self, rate, capacity=None, max_wait=1.0):
+        """
+        Initializes the rate limiter.
+
+        Args:
+            rate (float): The number of tokens added per second, i.e. the sustained rate of requests.
+            capacity (int, optional): The maximum number of tokens, i.e. the size of a burst, the rate by default.
+            max_wait (float): The maximum time in seconds to wait for a token, before the request is rejected.
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.max_wait = max_wait
+
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+        self.throttled = 0
+        self.rejected = 0
+
+    def acquire(self):
+        """
+        Takes a token, waiting for it at most `max_wait` seconds.
+
+        Returns:
+            bool: True if a token was taken, False if the request is rejected.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+
+            if wait > self.max_wait:
+                self.rejected += 1
+                return False
+
+            # The token is reserved now, so threads waiting at the same time don't take the same one
+            self.tokens -= 1
+
+            if wait:
+                self.throttled += 1
+
+        time.sleep(wait)
+        return True
+
+    @property
+    def metrics(self):
+        """
+        Metrics of the rate limiter.
+
+        Returns:
+            dict: Available tokens, numbers of throttled (delayed) and rejected requests.
+        """
+        return {"tokens": round(max(self.tokens, 0.0), 2), "throttled": self.throttled, "rejected": self.rejected}
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker stopping requests to an unavailable upstream, so they fail fast instead of retrying until
+    the Lambda timeout. It opens after consecutive failures, and after the recovery timeout lets a single trial
+    request through (half-open state), which closes it on success or opens it again on failure.
+
+    The open state can be shared by all containers through a cache client, so that containers, which have not
+    seen the failures yet, fail fast as well. The shared state expires with the recovery timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30, cache_cli=None, shared_state_interval=5):
+        """
+        Initializes the circuit breaker.
+
+        Args:
+            name (str): The name of the upstream, used in the cache key of the shared state.
+            failure_threshold (int): The number of consecutive failures, which opens the breaker.
+            recovery_timeout (int): Time in seconds the breaker stays open before a trial request.
+            cache_cli (Cache, optional): The cache client sharing the open state between containers.
+            shared_state_interval (float): Time in seconds between reads of the shared state.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.cache_cli = cache_cli
+        self.shared_state_interval = shared_state_interval
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.shared_state_read_at = 0.0
+        self.lock = threading.Lock()
+
+        self.opened = 0
+        self.rejected = 0
+
+        self.logger = logging.getLogger()
+
+    @property
+    def cache_key(self):
+        return f"circuit#{self.name}"
+
+    def _read_shared_state(self):
+        """
+        Opens the breaker if another container has opened it, reading the shared state at most once per interval.
+        """
+        now = time.time()
+
+        if self.cache_cli is None or now - self.shared_state_read_at < self.shared_state_interval:
+            return
+
+        self.shared_state_read_at = now
+
+        try:
+            shared_state = self.cache_cli.get(key=self.cache_key)
+        except Exception as e:
+            self.logger.exception(f"Circuit breaker state could not be read: {str(e)}")
+            return
+
+        if shared_state and now - shared_state["opened_at"] < self.recovery_timeout:
+            self.state = self.OPEN
+            self.opened_at = shared_state["opened_at"]
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.opened += 1
+        self.logger.warning(f"Circuit breaker of {self.name} is open for {self.recovery_timeout}s.")
+
+        if self.cache_cli is not None:
+            try:
+                self.cache_cli.set(key=self.cache_key, value={"opened_at": self.opened_at}, ttl=self.recovery_timeout)
+            except Exception as e:
+                self.logger.exception(f"Circuit breaker state could not be shared: {str(e)}")
+
+    def allow_request(self):
+        """
+        Checks whether a request can be sent.
+
+        Returns:
+            bool: True if the request can be sent, False if it must fail fast.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                self._read_shared_state()
+
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                return True
+
+            if self.state != self.CLOSED:
+                # Only one trial request is sent while the breaker is half-open
+                self.rejected += 1
+                return False
+
+            return True
+
+    def record_success(self):
+        """Closes the breaker after a successful request."""
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def cancel_trial(self):
+        """
+        Opens the half-open breaker again if the trial request was not sent, so that the next request is the trial.
+        The breaker is not affected in other states.
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        """Counts a failed request, opening the breaker after too many consecutive failures or a failed trial."""
+        with self.lock:
+            self.failures += 1
+
+            # Requests sent before the breaker opened don't open it again
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self._open()
+
+    @property
+    def metrics(self):
+        """
+        Metrics of the circuit breaker.
+
+        Returns:
+            dict: The state, number of consecutive failures, times it was opened and rejected requests.
+        """
+        return {"state": self.state, "failures": self.failures, "opened": self.opened, "rejected": self.rejected}
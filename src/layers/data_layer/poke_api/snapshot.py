@@ -0,0 +1,298 @@
+import os
+import mmap
+import struct
+import asyncio
+import logging
+import argparse
+
+MAGIC = b"PKDX"
+VERSION = 1
+# Base stats are stored in a fixed order, the order of PokeAPI documents
+STAT_NAMES = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+# Index of a missing string, e.g. a Pokemon without a sprite
+NO_STRING = 0xFFFFFFFF
+
+HEADER = struct.Struct("<4sHIII")
+# ID, name, image, base stats, types start and count, abilities start and count
+RECORD = struct.Struct(f"<III{len(STAT_NAMES)}HIHIH")
+UINT32 = struct.Struct("<I")
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pokedex.bin")
+
+logger = logging.getLogger()
+
+
+def write_snapshot(path, pokemon_data):
+    """
+    Writes battle data of Pokemon to a snapshot file, with the layout (little-endian):
+        header        magic, version, number of records, list items and strings
+        records       fixed-size records sorted by Pokemon ID: ID, name, image, base stats, types and abilities
+        name index    record indices sorted by Pokemon name
+        lists         string indices of types and abilities, referenced by records
+        strings       string offsets followed by the UTF-8 encoded strings
+
+    Args:
+        path (str): The path of the snapshot file.
+        pokemon_data (Iterable[dict]): Battle data of Pokemon, as returned by `extract_battle_data`.
+
+    Returns:
+        int: The number of Pokemon in the snapshot.
+    """
+    pokemon_data = sorted({data["id"]: data for data in pokemon_data}.values(), key=lambda data: data["id"])
+    strings = {}
+    lists = []
+
+    def string_index(value):
+        if value is None:
+            return NO_STRING
+
+        return strings.setdefault(value, len(strings))
+
+    def list_slice(values):
+        start = len(lists)
+        lists.extend(string_index(value) for value in values)
+        return start, len(values)
+
+    records = bytearray()
+
+    for data in pokemon_data:
+        records += RECORD.pack(
+            data["id"],
+            string_index(data["name"]),
+            string_index(data["pokemon_image"]),
+            *(data["stats"].get(stat_name, 0) for stat_name in STAT_NAMES),
+            *list_slice(data["types"]),
+            *list_slice(data["abilities"]),
+        )
+
+    name_index = sorted(range(len(pokemon_data)), key=lambda index: pokemon_data[index]["name"].encode())
+    encoded_strings = [value.encode() for value in strings]
+    string_offsets = [0]
+
+    for encoded_string in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded_string))
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(pokemon_data), len(lists), len(strings)))
+        file.write(records)
+        file.write(struct.pack(f"<{len(name_index)}I", *name_index))
+        file.write(struct.pack(f"<{len(lists)}I", *lists))
+        file.write(struct.pack(f"<{len(string_offsets)}I", *string_offsets))
+        file.write(b"".join(encoded_strings))
+
+    return len(pokemon_data)
+
+
+class PokedexSnapshot:
+    """
+    Offline Pokedex snapshot: battle data of all Pokemon in a compact binary file, which is shipped
+    in the Data Layer, so Pokemon are resolved without network requests. It has the lookup interface
+    of the PokeAPI clients. The file is memory-mapped, so only the pages of looked up Pokemon are read,
+    and lookups are binary searches.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        """
+        Opens the snapshot file.
+
+        Args:
+            path (str): The path of the snapshot file.
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version.
+        """
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.record_count, list_length, string_count = HEADER.unpack_from(self.buffer, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported Pokedex snapshot: {path}")
+
+        self.records_offset = HEADER.size
+        self.name_index_offset = self.records_offset + self.record_count * RECORD.size
+        self.lists_offset = self.name_index_offset + self.record_count * UINT32.size
+        self.string_offsets_offset = self.lists_offset + list_length * UINT32.size
+        self.strings_offset = self.string_offsets_offset + (string_count + 1) * UINT32.size
+
+    def __len__(self):
+        return self.record_count
+
+    def __contains__(self, pokemon_id):
+        return self._find(str(pokemon_id)) is not None
+
+    def close(self):
+        self.buffer.close()
+
+    def _uint32(self, offset, index):
+        return UINT32.unpack_from(self.buffer, offset + index * UINT32.size)[0]
+
+    def _string_bytes(self, index):
+        start = self._uint32(self.string_offsets_offset, index)
+        end = self._uint32(self.string_offsets_offset, index + 1)
+        return self.buffer[self.strings_offset + start : self.strings_offset + end]
+
+    def _string(self, index):
+        return None if index == NO_STRING else self._string_bytes(index).decode()
+
+    def _record(self, index):
+        return RECORD.unpack_from(self.buffer, self.records_offset + index * RECORD.size)
+
+    def _bisect(self, key, target):
+        """
+        Finds the first position in [0, record_count), whose key is not less than the target.
+
+        """
+        low, high = 0, self.record_count
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def _id_at(self, index):
+        return self._record(index)[0]
+
+    def _name_index(self, position):
+        return self._uint32(self.name_index_offset, position)
+
+    def _name_at(self, position):
+        return self._string_bytes(self._record(self._name_index(position))[1])
+
+    def _find(self, pokemon_id):
+        """
+        Finds the record of a Pokemon by its ID, with a binary search over the records,
+        or by its name, with a binary search over the name index.
+
+        Returns:
+            int: The index of the record, or None if the Pokemon is not in the snapshot.
+        """
+        # Only ASCII digits are IDs, str.isdigit() is also true for e.g. '²', which int() rejects
+        if pokemon_id.isascii() and pokemon_id.isdecimal():
+            target = int(pokemon_id)
+            index = self._bisect(self._id_at, target)
+
+            if index < self.record_count and self._id_at(index) == target:
+                return index
+
+            return None
+
+        target = pokemon_id.lower().encode()
+        position = self._bisect(self._name_at, target)
+
+        if position < self.record_count and self._name_at(position) == target:
+            return self._name_index(position)
+
+        return None
+
+    def fetch_pokemon_data(self, pokemon_id, battle_data=True):
+        """
+        Looks up battle data of a given Pokemon by its ID or name.
+
+        Args:
+            pokemon_id (str or int): The Pokemon ID or name.
+            battle_data (bool): The snapshot has battle data only, full Pokemon data is never found.
+
+        Returns:
+            dict: Pokemon data relevant for battles, including name and stats, or
+                  None if the Pokemon is not in the snapshot.
+        """
+        index = self._find(str(pokemon_id)) if battle_data else None
+
+        if index is None:
+            return None
+
+        record = self._record(index)
+        pokemon_id, name, image, *stats, types_start, types_count, abilities_start, abilities_count = record
+
+        return {
+            "id": pokemon_id,
+            "name": self._string(name),
+            "stats": dict(zip(STAT_NAMES, stats)),
+            "abilities": [
+                self._string(self._uint32(self.lists_offset, abilities_start + offset))
+                for offset in range(abilities_count)
+            ],
+            "types": [
+                self._string(self._uint32(self.lists_offset, types_start + offset)) for offset in range(types_count)
+            ],
+            "pokemon_image": self._string(image),
+        }
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """
+    Opens the snapshot shipped in the Data Layer, if it was built.
+
+    Args:
+        path (str): The path of the snapshot file.
+
+    Returns:
+        PokedexSnapshot: The snapshot, or None if the file does not exist or is not a valid snapshot.
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return PokedexSnapshot(path=path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.exception(f"Pokedex snapshot could not be opened: {str(e)}")
+        return None
+
+
+async def fetch_all_pokemon_data(concurrency):
+    """
+    Fetches battle data of all Pokemon from PokeAPI.
+
+    Args:
+        concurrency (int): The maximum number of requests in flight.
+
+    Returns:
+        list: Battle data of the Pokemon, which could be fetched.
+    """
+    from poke_api.client import PokeAPIClient
+    from poke_api.async_client import AsyncPokeAPIClient
+
+    page = PokeAPIClient().list_pokemon(limit=100_000)
+
+    if page is None:
+        raise RuntimeError("Pokemon list could not be fetched.")
+
+    names = [pokemon["name"] for pokemon in page["results"]]
+
+    async with AsyncPokeAPIClient() as poke_cli:
+        pokemon_data = await poke_cli.fetch_many(names, concurrency=concurrency)
+
+    missing_names = [name for name, data in pokemon_data.items() if data is None]
+
+    if missing_names:
+        logger.warning(f"Pokemon data could not be fetched for: {', '.join(missing_names)}")
+
+    return [data for data in pokemon_data.values() if data is not None]
+
+
+def main():
+    """
+    Builds the snapshot from PokeAPI:
+
+        python -m poke_api.snapshot [--output PATH] [--concurrency N]
+    """
+    parser = argparse.ArgumentParser(description="Builds the offline Pokedex snapshot from PokeAPI.")
+    parser.add_argument("--output", default=SNAPSHOT_PATH, help="The path of the snapshot file.")
+    parser.add_argument("--concurrency", type=int, default=20, help="The maximum number of requests in flight.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pokemon_data = asyncio.run(fetch_all_pokemon_data(concurrency=args.concurrency))
+    count = write_snapshot(args.output, pokemon_data)
+    size = os.path.getsize(args.output)
+    logger.info(f"Pokedex snapshot with {count} Pokemon written to {args.output} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
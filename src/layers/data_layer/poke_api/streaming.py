@@ -0,0 +1,94 @@
+try:
+    import ijson
+except ImportError:  # ijson is required only by the streaming extraction of battle data
+    ijson = None
+
+
+class BattleDataBuilder:
+    """
+    Builds battle data of a Pokemon from the events of an incremental JSON parser, keeping only the fields
+    returned by `BasePokeAPIClient.extract_battle_data`. Everything else, e.g. the huge 'moves' array,
+    is parsed and dropped on the fly, so the full document is never materialized.
+    """
+
+    def __init__(self):
+        self.battle_data = {"stats": {}, "abilities": [], "types": []}
+        self._stat = {}
+
+    def feed(self, prefix, event, value):
+        """
+        Handles a single parser event.
+
+        Args:
+            prefix (str): The path of the event in the document, e.g. 'stats.item.base_stat'.
+            event (str): The event type, e.g. 'start_map', 'number' or 'string'.
+            value: The parsed value of scalar events.
+        """
+        if prefix in ("id", "name", "sprites.front_default") and event not in ("start_map", "start_array"):
+            self.battle_data["pokemon_image" if prefix == "sprites.front_default" else prefix] = value
+        elif prefix == "stats.item.base_stat":
+            self._stat["base_stat"] = value
+        elif prefix == "stats.item.stat.name":
+            self._stat["name"] = value
+        elif prefix == "stats.item" and event == "end_map":
+            self.battle_data["stats"][self._stat["name"]] = self._stat["base_stat"]
+            self._stat = {}
+        elif prefix == "abilities.item.ability.name":
+            self.battle_data["abilities"].append(value)
+        elif prefix == "types.item.type.name":
+            self.battle_data["types"].append(value)
+
+    def result(self):
+        """
+        Returns the battle data, with keys in the order of `BasePokeAPIClient.extract_battle_data`.
+
+        Returns:
+            dict: Battle data of the Pokemon.
+
+        Raises:
+            ValueError: If the document misses the ID or name of the Pokemon.
+        """
+        if "id" not in self.battle_data or "name" not in self.battle_data:
+            raise ValueError("Pokemon document misses 'id' or 'name'.")
+
+        keys = ("id", "name", "stats", "abilities", "types", "pokemon_image")
+        return {key: self.battle_data.get(key) for key in keys}
+
+
+def extract_battle_data_from_chunks(chunks):
+    """
+    Extracts battle data from a Pokemon document read in chunks, e.g. from a streamed HTTP response,
+    so that memory used by a fetch does not depend on the size of the document.
+
+    Args:
+        chunks (Iterable[bytes]): Consecutive chunks of the JSON document.
+
+    Returns:
+        dict: Battle data of the Pokemon, the same as `BasePokeAPIClient.extract_battle_data` returns.
+
+    Raises:
+        ValueError: If the document is not valid JSON or misses the ID or name of the Pokemon.
+    """
+    if ijson is None:
+        raise RuntimeError("ijson is required to extract battle data from a stream.")
+
+    builder = BattleDataBuilder()
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events)
+
+    try:
+        for chunk in chunks:
+            parser.send(chunk)
+
+            for event in events:
+                builder.feed(*event)
+            del events[:]
+
+        parser.close()
+    except ijson.JSONError as e:
+        raise ValueError(f"Pokemon document is not valid JSON: {str(e)}") from e
+
+    for event in events:
+        builder.feed(*event)
+
+    return builder.result()
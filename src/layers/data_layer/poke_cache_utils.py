@@ -1,58 +1,434 @@
+import math
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from aws_lambda_powertools.event_handler.exceptions import NotFoundError
 
+from cache.abstract import CacheEntry
 from cache.redis import RedisCacheClient
 from cache.dynamodb import DynamoDBCacheClient
+from cache.tiered import TieredCacheClient
+from poke_api.resilience import PokeAPIUnavailableError
+
+# Soft TTL of cached Pokémon data, after which it is stale and refreshed in the background
+POKEMON_DATA_TTL = 3600
+# How long stale Pokémon data can be served while it is being refreshed, before the hard TTL deletes it
+POKEMON_DATA_STALE_TTL = 3600
+# XFetch beta of the probabilistic early refresh, values above 1 favour earlier refreshes
+EARLY_REFRESH_BETA = 1.0
+# A lease stops other containers from fetching the same Pokémon from the primary source at the same time
+LEASE_TTL = 10
+# How long to wait for the lease holder to cache Pokémon data, before fetching it anyway
+LEASE_WAIT_TIMEOUT = 2
+LEASE_POLL_INTERVAL = 0.1
+
+# In-flight fetches from the primary source in this process, by Pokémon ID
+_in_flight_fetches = {}
+_in_flight_fetches_lock = threading.Lock()
+# Background refreshes of stale Pokémon data in this process. Lambda freezes the container between invocations,
+# so a refresh started just before a response is returned may finish during the next invocation
+_refresh_executor = ThreadPoolExecutor(max_workers=2)
+_refreshing_ids = set()
+_refreshing_ids_lock = threading.Lock()
+
+# Pokémon IDs resolved to their names, which are the canonical cache keys of Pokémon data
+_pokemon_aliases = {}
 
+logger = logging.getLogger()
 
-def get_cache_client(db_type):
+
+def get_cache_client(db_type, l1_cache=False, l1_max_bytes=16 * 1024 * 1024, l1_ttl=300, serializer=None):
     """
     Factory method for creating cache client instances based on the database type.
 
     Args:
         db_type (str): The type of database for which to create a cache client.
             Supported databases: 'dynamodb' and 'redis'.
+        l1_cache (bool): Whether to put a bounded in-process LRU cache in front of the database.
+        l1_max_bytes (int): Maximum approximate size in bytes of the entries in the in-process cache.
+        l1_ttl (int): Maximum time-to-live (TTL) in seconds of entries in the in-process cache.
+        serializer (Serializer, optional): The serializer of cached values, JSON by default.
 
     Returns:
         An instance of a cache client, either DynamoDBCacheClient or RedisCacheClient,
-        configured for the specified database type.
+        configured for the specified database type, wrapped into TieredCacheClient if `l1_cache` is set.
 
     Raises:
         NotImplemented: If a cache client for the specified database type is not implemented.
 
     """
     if db_type == "dynamodb":
-        return DynamoDBCacheClient(table_name="ede-demo-pokemon")
+        cache_cli = DynamoDBCacheClient(table_name="ede-demo-pokemon", serializer=serializer)
     elif db_type == "redis":
-        return RedisCacheClient(startup_nodes=[{"host": "{RedisHost}", "port": "6379"}], password="{RedisPassword}")
+        cache_cli = RedisCacheClient(
+            startup_nodes=[{"host": "{RedisHost}", "port": "6379"}],
+            password="{RedisPassword}",
+            serializer=serializer,
+        )
     else:
         raise NotImplemented(f"Cache client not implemented for {db_type}")
 
+    if l1_cache:
+        return TieredCacheClient(backend=cache_cli, max_bytes=l1_max_bytes, ttl=l1_ttl)
+
+    return cache_cli
+
+
+def single_flight(key, fetch):
+    """
+    Runs `fetch` once for concurrent calls with the same key in this process,
+    the other callers wait for the in-flight call and share its result (or exception).
+
+    Args:
+        key (str): The key identifying the fetched resource.
+        fetch (Callable): The function fetching the resource.
+
+    Returns:
+        The result of `fetch`.
+
+    """
+    with _in_flight_fetches_lock:
+        future = _in_flight_fetches.get(key)
+        is_leader = future is None
+
+        if is_leader:
+            future = _in_flight_fetches[key] = Future()
+
+    if not is_leader:
+        return future.result()
+
+    try:
+        result = fetch()
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_fetches_lock:
+            del _in_flight_fetches[key]
+
+
+def should_refresh(entry, beta=EARLY_REFRESH_BETA):
+    """
+    Decides whether a cache entry should be refreshed, using probabilistic early expiration (XFetch).
+    The closer the entry is to its soft expiry and the longer it took to compute, the more likely
+    it is refreshed, so refreshes of popular entries are spread out instead of all happening at expiry.
+    Entries past their soft expiry are always refreshed.
+
+    Args:
+        entry (CacheEntry): The cache entry.
+        beta (float): Values above 1 favour earlier refreshes, below 1 later ones.
+
+    Returns:
+        bool: True if the entry should be refreshed.
+
+    """
+    if entry.soft_expires_at is None:
+        return False
+
+    return time.time() - entry.delta * beta * math.log(1.0 - random.random()) >= entry.soft_expires_at
+
+
+def fetch_pokemon_cache_entry(poke_cli, pokemon_id, cached_entry=None):
+    """
+    Fetches Pokémon data from the primary source as a cache entry with a soft expiry.
+    If a cached entry with validators (ETag/Last-Modified) is provided, the data is revalidated
+    with a conditional request, and if it has not changed, the cached entry is returned with a new soft expiry.
+
+    Args:
+        poke_cli: The Pokémon client instance used for fetching data.
+        pokemon_id (str): The unique identifier of the Pokémon.
+        cached_entry (CacheEntry, optional): The cached Pokémon data to revalidate.
+
+    Returns:
+        CacheEntry: The Pokémon data with the time it took to fetch it and its validators,
+            or None if it cannot be found.
+
+    """
+    started_at = time.monotonic()
+    response = poke_cli.fetch_pokemon_data_if_modified(
+        pokemon_id=pokemon_id,
+        etag=cached_entry.etag if cached_entry else None,
+        last_modified=cached_entry.last_modified if cached_entry else None,
+    )
+
+    if response.not_modified and cached_entry is not None:
+        pokemon_data = cached_entry.value
+    elif response.data:
+        pokemon_data = response.data
+    else:
+        return None
+
+    return CacheEntry(
+        value=pokemon_data,
+        soft_expires_at=time.time() + POKEMON_DATA_TTL,
+        delta=time.monotonic() - started_at,
+        etag=response.etag,
+        last_modified=response.last_modified,
+    )
+
+
+def resolve_pokemon_keys(cache_cli, pokemon_ids):
+    """
+    Resolves Pokémon IDs/names to canonical cache keys, so that e.g. '25' and 'pikachu' share one cache entry.
+    Names are canonical keys, IDs are resolved to names with the alias index, kept in memory
+    and persisted in the cache. IDs missing in the alias index are returned as they are.
+
+    Args:
+        cache_cli: The cache client instance where the alias index is persisted.
+        pokemon_ids (Iterable[str]): The unique identifiers (IDs or names) of the Pokémon.
+
+    Returns:
+        dict: A dictionary with the requested Pokémon IDs as keys and their canonical cache keys as values.
+
+    """
+    keys = {}
+    unresolved_ids = []
+
+    for pokemon_id in pokemon_ids:
+        # Only ASCII digits are IDs, str.isdigit() is also true for e.g. '²'
+        if not (pokemon_id.isascii() and pokemon_id.isdecimal()):
+            keys[pokemon_id] = pokemon_id
+        elif pokemon_id in _pokemon_aliases:
+            keys[pokemon_id] = _pokemon_aliases[pokemon_id]
+        else:
+            unresolved_ids.append(pokemon_id)
+
+    if unresolved_ids:
+        names = cache_cli.get_many(keys=[f"alias#{pokemon_id}" for pokemon_id in unresolved_ids])
+
+        for pokemon_id in unresolved_ids:
+            name = names.get(f"alias#{pokemon_id}")
+
+            if name:
+                _pokemon_aliases[pokemon_id] = name
+
+            keys[pokemon_id] = name or pokemon_id
+
+    return keys
+
+
+def cache_pokemon_entries(cache_cli, entries):
+    """
+    Caches Pokémon data under canonical keys (names) with a TTL and adds new IDs to the alias index.
+
+    Args:
+        cache_cli: The cache client instance.
+        entries (Iterable[CacheEntry]): Pokémon data with soft expiry, as returned by `fetch_pokemon_cache_entry`.
+
+    """
+    entries = {entry.value["name"]: entry for entry in entries}
+
+    if not entries:
+        return
 
-def fetch_pokemon_data_with_caching(cache_cli, poke_cli, pokemon_id):
+    cache_cli.set_many(mapping=entries, ttl=POKEMON_DATA_TTL + POKEMON_DATA_STALE_TTL)  # Cache with TTL
+
+    new_aliases = {
+        str(entry.value["id"]): name
+        for name, entry in entries.items()
+        if _pokemon_aliases.get(str(entry.value["id"])) != name
+    }
+
+    if new_aliases:
+        # IDs never change their names, so the alias index has no TTL
+        cache_cli.set_many(mapping={f"alias#{pokemon_id}": name for pokemon_id, name in new_aliases.items()})
+        _pokemon_aliases.update(new_aliases)
+
+
+def _fetch_pokemon_data_with_lease(cache_cli, poke_cli, pokemon_id):
+    """
+    Fetches Pokémon data from the primary source and caches it, holding a short lease in the cache,
+    so that only one container fetches it at a time. If another container holds the lease,
+    waits for it to cache the data and fetches it only if that does not happen in time.
+
+    Returns:
+        The Pokémon data, or None if it cannot be found.
+
+    """
+    # A fetch which finished after the cache miss (in this process or another container) could have cached it
+    pokemon_data = cache_cli.get(key=pokemon_id)
+
+    if pokemon_data is not None:
+        return pokemon_data
+
+    if not cache_cli.add(key=f"lease#{pokemon_id}", value="1", ttl=LEASE_TTL):
+        deadline = time.monotonic() + LEASE_WAIT_TIMEOUT
+
+        while time.monotonic() < deadline:
+            time.sleep(LEASE_POLL_INTERVAL)
+            # The lease holder could have added the ID to the alias index meanwhile
+            pokemon_data = cache_cli.get(key=resolve_pokemon_keys(cache_cli, [pokemon_id])[pokemon_id])
+
+            if pokemon_data is not None:
+                return pokemon_data
+
+    entry = fetch_pokemon_cache_entry(poke_cli=poke_cli, pokemon_id=pokemon_id)
+
+    if entry is None:
+        return None
+
+    cache_pokemon_entries(cache_cli=cache_cli, entries=[entry])
+    return entry.value
+
+
+def _fetch_missing_pokemon_data(cache_cli, poke_cli, key):
+    """
+    Fetches Pokémon data missing in the cache from the primary source and caches it. Concurrent misses
+    for the same Pokémon in this process share a single fetch, and containers take turns with a lease.
+
+    Returns:
+        The Pokémon data, or None if it cannot be found.
+
+    """
+    return single_flight(
+        key=key,
+        fetch=lambda: _fetch_pokemon_data_with_lease(cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id=key),
+    )
+
+
+def _refresh_in_background(cache_cli, poke_cli, pokemon_id, entry):
+    """
+    Refreshes cached Pokémon data in a background thread, unless it is already being refreshed
+    in this process or another container holds the lease for it. The cached entry is revalidated,
+    so unchanged data is not downloaded again.
+
+    """
+    with _refreshing_ids_lock:
+        if pokemon_id in _refreshing_ids:
+            return
+
+        _refreshing_ids.add(pokemon_id)
+
+    def refresh():
+        try:
+            if cache_cli.add(key=f"lease#{pokemon_id}", value="1", ttl=LEASE_TTL):
+                new_entry = fetch_pokemon_cache_entry(poke_cli=poke_cli, pokemon_id=pokemon_id, cached_entry=entry)
+
+                if new_entry is not None:
+                    cache_pokemon_entries(cache_cli=cache_cli, entries=[new_entry])
+        except PokeAPIUnavailableError as e:
+            # Stale data is served until PokeAPI is available again
+            logger.warning(f"Refresh of Pokemon data skipped for ID: {pokemon_id}, {str(e)}")
+        except Exception as e:
+            logger.exception(f"Refresh of Pokemon data failed for ID: {pokemon_id}, error: {str(e)}")
+        finally:
+            with _refreshing_ids_lock:
+                _refreshing_ids.discard(pokemon_id)
+
+    _refresh_executor.submit(refresh)
+
+
+def fetch_pokemon_data_with_caching(cache_cli, poke_cli, pokemon_id, snapshot=None):
     """
     Retrieves Pokémon data, prioritizing cache with a lazy loading strategy. If data is not found
     in the cache, it fetches from the primary source and updates the cache with a TTL.
+    Concurrent cache misses for the same Pokémon share a single fetch from the primary source.
+    Stale (or soon to be stale) data is returned immediately and refreshed in the background.
+    If an offline Pokédex snapshot is provided, Pokémon found in it are neither cached nor fetched.
 
     Args:
         cache_cli: The cache client instance to use for attempting to retrieve Pokémon data.
         poke_cli: The Pokémon client instance used for fetching data directly if not in cache.
         pokemon_id (str): The unique identifier for the Pokémon to retrieve.
+        snapshot (PokedexSnapshot, optional): The offline Pokédex snapshot, looked up before the cache.
 
     Returns:
         The Pokémon data either from the cache or directly fetched.
 
     Raises:
         ResourceNotFoundError: If Pokémon data cannot be found in both cache and primary source.
+        PokeAPIUnavailableError: If Pokémon data is not cached and PokeAPI is unavailable.
 
     """
-    pokemon_data = cache_cli.get(key=pokemon_id)  # Attempt to get pokemon data from cache
+    pokemon_data = snapshot.fetch_pokemon_data(pokemon_id=pokemon_id) if snapshot is not None else None
 
-    if pokemon_data is None:  # If not in cache, fetch from primary source and cache the result
-        pokemon_data = poke_cli.fetch_pokemon_data(pokemon_id=pokemon_id)
+    if pokemon_data is not None:
+        return pokemon_data
 
-        if pokemon_data:
-            cache_cli.set(key=pokemon_id, value=pokemon_data, ttl=3600)  # Cache with TTL
-        else:
-            raise NotFoundError(f"Pokemon data not found for ID: {pokemon_id}")
+    key = resolve_pokemon_keys(cache_cli, [pokemon_id])[pokemon_id]
+    entry = cache_cli.get_entry(key=key)  # Attempt to get pokemon data from cache
+
+    if entry is not None:
+        if should_refresh(entry):
+            _refresh_in_background(cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id=key, entry=entry)
+
+        return entry.value
+
+    # If not in cache, fetch from primary source and cache the result
+    pokemon_data = _fetch_missing_pokemon_data(cache_cli=cache_cli, poke_cli=poke_cli, key=key)
+
+    if not pokemon_data:
+        raise NotFoundError(f"Pokemon data not found for ID: {pokemon_id}")
+
+    return pokemon_data
+
+
+def fetch_many_pokemon_data_with_caching(cache_cli, poke_cli, pokemon_ids, max_workers=8, snapshot=None):
+    """
+    Retrieves data for several Pokémon, reading all of them from cache in bulk. Pokémon not found
+    in the cache are fetched from the primary source concurrently, so that the latency on a cold cache
+    is close to a single fetch instead of the sum of all of them, and cached with a TTL.
+    Like single reads, concurrent cache misses for the same Pokémon share a single fetch from the primary source,
+    and stale (or soon to be stale) data is returned immediately and revalidated in the background
+    with a conditional request.
+    If an offline Pokédex snapshot is provided, Pokémon found in it are neither cached nor fetched.
+
+    Args:
+        cache_cli: The cache client instance to use for attempting to retrieve Pokémon data.
+        poke_cli: The Pokémon client instance used for fetching data directly if not in cache.
+        pokemon_ids (Iterable[str]): The unique identifiers of the Pokémon to retrieve, duplicates are fetched once.
+        max_workers (int): The maximum number of concurrent fetches.
+        snapshot (PokedexSnapshot, optional): The offline Pokédex snapshot, looked up before the cache.
+
+    Returns:
+        dict: A dictionary with the requested Pokémon IDs as keys and their data as values.
+
+    Raises:
+        ResourceNotFoundError: If data of any requested Pokémon cannot be found, after all fetches are done,
+            so that data of the found ones is still cached.
+
+    """
+    pokemon_ids = list(dict.fromkeys(pokemon_ids))
+    pokemon_data = {}
+
+    if snapshot is not None:
+        snapshot_data = {pokemon_id: snapshot.fetch_pokemon_data(pokemon_id=pokemon_id) for pokemon_id in pokemon_ids}
+        pokemon_data = {pokemon_id: data for pokemon_id, data in snapshot_data.items() if data is not None}
+
+        if len(pokemon_data) == len(pokemon_ids):
+            return pokemon_data
+
+    keys = resolve_pokemon_keys(cache_cli, [pokemon_id for pokemon_id in pokemon_ids if pokemon_id not in pokemon_data])
+    # Attempt to get all pokemon data from cache at once
+    cached_entries = cache_cli.get_many_entries(keys=keys.values())
+
+    for key, entry in cached_entries.items():
+        if should_refresh(entry):
+            _refresh_in_background(cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id=key, entry=entry)
+
+    pokemon_data.update(
+        {pokemon_id: cached_entries[key].value for pokemon_id, key in keys.items() if key in cached_entries}
+    )
+    missing_ids = [pokemon_id for pokemon_id in keys if pokemon_id not in pokemon_data]
+
+    if not missing_ids:
+        return pokemon_data
+
+    def fetch_missing(pokemon_id):
+        return _fetch_missing_pokemon_data(cache_cli=cache_cli, poke_cli=poke_cli, key=keys[pokemon_id])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing_ids)))) as executor:
+        fetched_data = dict(zip(missing_ids, executor.map(fetch_missing, missing_ids)))
+
+    pokemon_data.update({pokemon_id: data for pokemon_id, data in fetched_data.items() if data})
+    not_found_ids = [pokemon_id for pokemon_id in missing_ids if pokemon_id not in pokemon_data]
+
+    if not_found_ids:
+        raise NotFoundError(f"Pokemon data not found for ID: {', '.join(not_found_ids)}")
 
     return pokemon_data
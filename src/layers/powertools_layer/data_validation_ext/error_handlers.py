@@ -59,3 +59,23 @@ class ExceptionHandlers:
             content_type=content_types.APPLICATION_JSON,
             body={"error": "ResourceNotFound"},
         )
+
+    def service_unavailable(self, exc):
+        """
+        Handles exceptions of unavailable upstream services (e.g. an open circuit breaker)
+            by logging the error and returning a custom Response.
+
+        Args:
+            exc (Exception): The exception object.
+
+        Returns:
+            Response: A custom response with a status code of 503,
+                indicating that the request can be retried later.
+        """
+        self.logger.warning(f"Upstream service unavailable: {str(exc)}", extra={"path": self.app.current_event.path})
+
+        return Response(
+            status_code=503,
+            content_type=content_types.APPLICATION_JSON,
+            body={"error": "ServiceUnavailable"},
+        )
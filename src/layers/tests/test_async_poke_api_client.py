@@ -0,0 +1,72 @@
+import os
+import sys
+import asyncio
+
+import pytest
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+
+def build_pokemon_document(pokemon_id, name):
+    """Builds a minimal PokeAPI document of a Pokemon."""
+    return {
+        "id": pokemon_id,
+        "name": name,
+        "stats": [{"stat": {"name": "hp"}, "base_stat": 35}, {"stat": {"name": "speed"}, "base_stat": 90}],
+        "abilities": [{"ability": {"name": "static"}}],
+        "types": [{"type": {"name": "electric"}}],
+        "sprites": {"front_default": f"https://example.com/{pokemon_id}.png"},
+        "moves": [],
+    }
+
+
+@pytest.fixture
+def async_poke_cli():
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("requests")
+    from poke_api.async_client import AsyncPokeAPIClient
+
+    documents = {"pikachu": build_pokemon_document(25, "pikachu"), "raichu": build_pokemon_document(26, "raichu")}
+    attempts = {}
+
+    def handler(request):
+        name = request.url.path.rsplit("/", 1)[-1]
+        attempts[name] = attempts.get(name, 0) + 1
+
+        if name == "flaky" and attempts[name] == 1:
+            return httpx.Response(503)
+        if name == "flaky":
+            return httpx.Response(200, json=build_pokemon_document(0, "flaky"))
+        if name in documents:
+            return httpx.Response(200, json=documents[name])
+        return httpx.Response(404)
+
+    poke_cli = AsyncPokeAPIClient(jitter_type="none", backoff_factor=0)
+    poke_cli._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return poke_cli
+
+
+class TestAsyncPokeAPIClient:
+    """Tests for the asynchronous PokeAPI client."""
+
+    def test_fetch_pokemon_data(self, async_poke_cli):
+        pokemon_data = asyncio.run(async_poke_cli.fetch_pokemon_data("pikachu"))
+
+        assert pokemon_data == {
+            "id": 25,
+            "name": "pikachu",
+            "stats": {"hp": 35, "speed": 90},
+            "abilities": ["static"],
+            "types": ["electric"],
+            "pokemon_image": "https://example.com/25.png",
+        }
+
+    def test_fetch_many(self, async_poke_cli):
+        pokemon_ids = ["pikachu", "raichu", "missingno", "flaky"]
+        pokemon_data = asyncio.run(async_poke_cli.fetch_many(pokemon_ids, concurrency=2))
+
+        assert pokemon_data["pikachu"]["id"] == 25
+        assert pokemon_data["raichu"]["id"] == 26
+        assert pokemon_data["missingno"] is None
+        assert pokemon_data["flaky"]["name"] == "flaky"  # Retried after 503 response
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from cache.serializers import JSONSerializer, MsgPackSerializer, Serializer  # noqa: E402
+
+POKEMON_DATA = {
+    "id": 25,
+    "name": "pikachu",
+    "stats": {"hp": 35, "attack": 55, "defense": 40, "special-attack": 50, "special-defense": 50, "speed": 90},
+    "abilities": ["static", "lightning-rod"],
+    "types": ["electric"],
+    "pokemon_image": "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/25.png",
+}
+
+
+class TestSerializers:
+    """Tests for the serializers of cached values."""
+
+    def test_json_round_trip(self):
+        serializer = JSONSerializer()
+
+        assert serializer.loads(serializer.dumps(POKEMON_DATA)) == POKEMON_DATA
+
+    @pytest.mark.parametrize("data", ["pikachu", b"pikachu"])
+    def test_plain_strings_are_returned_as_they_are(self, data):
+        assert Serializer.loads(data) == "pikachu"
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_msgpack_round_trip(self, compress):
+        pytest.importorskip("msgpack")
+        serializer = MsgPackSerializer(compress=compress, compress_min_size=0)
+        data = serializer.dumps(POKEMON_DATA)
+
+        assert isinstance(data, bytes)
+        assert len(data) < len(JSONSerializer().dumps(POKEMON_DATA))
+        assert serializer.loads(data) == POKEMON_DATA
+
+    def test_msgpack_serializer_reads_json_entries(self):
+        pytest.importorskip("msgpack")
+        json_data = JSONSerializer().dumps(POKEMON_DATA)
+
+        assert MsgPackSerializer().loads(json_data) == POKEMON_DATA
+        assert MsgPackSerializer().loads(json_data.encode()) == POKEMON_DATA
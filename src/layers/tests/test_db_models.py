@@ -0,0 +1,135 @@
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("pynamodb")
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from db_models import (  # noqa: E402
+    LEADERBOARD,
+    LEADERBOARD_SHARDS,
+    WINNER_SHARDS,
+    BattleModel,
+    MergedResultIterator,
+    PokemonSummaryModel,
+    ShardedIndex,
+    UnshardedIndex,
+    leaderboard_shard_key,
+    winner_shard_key,
+)
+
+
+class FakeResultIterator:
+    """Emulates PynamoDB ResultIterator, `last_evaluated_key` is the key of the last read item."""
+
+    def __init__(self, timestamps, limit=None):
+        self.items = [SimpleNamespace(timestamp=timestamp) for timestamp in timestamps]
+        self.limit = limit
+        self.read = 0
+        self.last_evaluated_key = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.read >= len(self.items) or self.read == self.limit:
+            raise StopIteration
+
+        item = self.items[self.read]
+        self.read += 1
+        is_last = self.read == len(self.items)
+        self.last_evaluated_key = None if is_last else {"timestamp": {"N": str(item.timestamp)}}
+        return item
+
+
+class FakeIndex:
+    """Emulates a GSI with the sharded hash key, its queries return fixed results per shard."""
+
+    Meta = SimpleNamespace(index_name="winner_shard_timestamp_index")
+
+    def __init__(self, timestamps_by_shard):
+        self.timestamps_by_shard = timestamps_by_shard
+        self.queries = []
+
+    def query(self, hash_key, range_key_condition=None, last_evaluated_key=None, limit=None, **kwargs):
+        self.queries.append((hash_key, last_evaluated_key))
+        timestamps = self.timestamps_by_shard.get(int(hash_key.rsplit("#", 1)[1]), [])
+
+        if last_evaluated_key is not None:
+            timestamps = [ts for ts in timestamps if ts > int(last_evaluated_key["timestamp"]["N"])]
+
+        return FakeResultIterator(timestamps, limit=limit)
+
+
+def test_winner_shard_key_is_stable():
+    key = winner_shard_key("pikachu", "battle-1")
+
+    assert key == winner_shard_key("pikachu", "battle-1")
+    assert key.startswith("pikachu#")
+    assert 0 <= int(key.rsplit("#", 1)[1]) < WINNER_SHARDS
+
+
+def test_new_battle_has_winner_shard():
+    battle = BattleModel(id="battle-1", winner="pikachu", opponent="eevee", timestamp=1)
+
+    assert battle.winner_shard == winner_shard_key("pikachu", "battle-1")
+
+
+def test_leaderboard_shard_key_is_stable_per_pokemon():
+    keys = {leaderboard_shard_key(f"pokemon-{index}") for index in range(100)}
+
+    assert leaderboard_shard_key("pikachu") == leaderboard_shard_key("pikachu")
+    assert keys == {f"{LEADERBOARD}#{shard}" for shard in range(LEADERBOARD_SHARDS)}
+    assert PokemonSummaryModel.leaderboard_wins.shards == LEADERBOARD_SHARDS
+
+
+def test_merged_results_are_ordered():
+    results = {0: FakeResultIterator([1, 4, 6]), 1: FakeResultIterator([2, 3]), 2: FakeResultIterator([])}
+    merged = MergedResultIterator(results=results, range_key="timestamp")
+
+    assert [item.timestamp for item in merged] == [1, 2, 3, 4, 6]
+    assert merged.last_evaluated_key is None
+
+
+def test_merged_results_in_descending_order():
+    results = {0: FakeResultIterator([6, 4, 1]), 1: FakeResultIterator([3, 2])}
+    merged = MergedResultIterator(results=results, range_key="timestamp", scan_index_forward=False)
+
+    assert [item.timestamp for item in merged] == [6, 4, 3, 2, 1]
+
+
+def test_sharded_query_resumes_from_last_returned_item():
+    index = ShardedIndex(FakeIndex({0: [1, 4, 6], 1: [2, 3, 5]}), range_key="timestamp", shards=3)
+    first_page = index.query("pikachu", limit=3)
+
+    assert [next(first_page).timestamp for _ in range(3)] == [1, 2, 3]
+    # The head of shard 0 (4) was read ahead, but not returned, so shard 0 continues after 1
+    assert first_page.last_evaluated_key == {"0": {"timestamp": {"N": "1"}}, "1": {"timestamp": {"N": "3"}}}
+
+    second_page = index.query("pikachu", limit=3, last_evaluated_key=first_page.last_evaluated_key)
+
+    assert [item.timestamp for item in second_page] == [4, 5, 6]
+    assert second_page.last_evaluated_key is None
+
+
+def test_sharded_query_rejects_invalid_key():
+    index = ShardedIndex(FakeIndex({}), range_key="timestamp", shards=2)
+
+    with pytest.raises(ValueError):
+        index.query("pikachu", last_evaluated_key={"shard": None})
+
+
+def test_unsharded_query_reads_the_key_as_is():
+    fake_index = mock.Mock(return_value=None)
+    fake_index.query.return_value = FakeResultIterator([1, 2])
+    index = UnshardedIndex(fake_index, range_key="timestamp")
+
+    assert [item.timestamp for item in index.query("pikachu")] == [1, 2]
+    assert fake_index.query.call_args.args[0] == "pikachu"
+    assert BattleModel.unsharded_winner_timestamp_index.hash_key_name == "winner"
+    assert BattleModel.winner_timestamp_index.hash_key_name == "winner_shard"
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("boto3")
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from cache.abstract import CacheEntry  # noqa: E402
+from cache.dynamodb import DynamoDBCacheClient  # noqa: E402
+from cache.serializers import MsgPackSerializer  # noqa: E402
+
+POKEMON_DATA = {"id": 25, "name": "pikachu", "stats": {"hp": 35, "attack": 55}}
+
+
+class FakeDynamoDBClient:
+    """Emulates the low-level DynamoDB client, items are kept as attribute values."""
+
+    def __init__(self, unprocessed_writes=0):
+        self.items = {}
+        self.unprocessed_writes = unprocessed_writes
+        self.batch_write_calls = 0
+
+    def put_item(self, TableName, Item, **kwargs):
+        self.items[Item["id"]["S"]] = Item
+
+    def get_item(self, TableName, Key):
+        item = self.items.get(Key["id"]["S"])
+        return {"Item": item} if item else {}
+
+    def batch_get_item(self, RequestItems):
+        keys = [key["id"]["S"] for key in RequestItems["ddb-cache"]["Keys"]]
+        return {"Responses": {"ddb-cache": [self.items[key] for key in keys if key in self.items]}}
+
+    def batch_write_item(self, RequestItems):
+        self.batch_write_calls += 1
+        requests = RequestItems["ddb-cache"]
+        # The last items of the first requests are left unprocessed
+        unprocessed, self.unprocessed_writes = requests[len(requests) - self.unprocessed_writes :], 0
+
+        for request in requests[: len(requests) - len(unprocessed)]:
+            self.put_item("ddb-cache", request["PutRequest"]["Item"])
+
+        return {"UnprocessedItems": {"ddb-cache": unprocessed} if unprocessed else {}}
+
+
+def cache_client(client, serializer=None):
+    with patch("cache.dynamodb.boto3.client", return_value=client):
+        return DynamoDBCacheClient(table_name="ddb-cache", serializer=serializer)
+
+
+class TestDynamoDBCacheClient:
+    """Tests for the DynamoDB cache client on top of the low-level (thread-safe) client."""
+
+    @pytest.mark.parametrize("serializer", [None, MsgPackSerializer(compress=True)])
+    def test_entry_round_trip(self, serializer):
+        client = FakeDynamoDBClient()
+        cache = cache_client(client, serializer=serializer)
+        entry = CacheEntry(value=POKEMON_DATA, soft_expires_at=int(time.time()) + 60, delta=0.25, etag='"v1"')
+
+        cache.set(key="pikachu", value=entry, ttl=120)
+        # The hard expiry is read from the TTL of the item
+        entry = entry._replace(expires_at=int(client.items["pikachu"]["ttl"]["N"]))
+
+        assert cache.get_entry(key="pikachu") == entry
+        assert cache.get_many_entries(keys=["pikachu", "eevee"]) == {"pikachu": entry}
+
+    def test_expired_items_are_not_returned(self):
+        client = FakeDynamoDBClient()
+        cache = cache_client(client)
+        cache.set(key="pikachu", value=POKEMON_DATA)
+        client.items["pikachu"]["ttl"] = {"N": str(int(time.time()) - 1)}
+
+        assert cache.get(key="pikachu") is None
+
+    def test_set_many_resends_unprocessed_items(self):
+        client = FakeDynamoDBClient(unprocessed_writes=2)
+        cache = cache_client(client)
+
+        with patch("cache.dynamodb.time.sleep"):
+            cache.set_many(mapping={f"pokemon-{index}": {"index": index} for index in range(30)}, ttl=60)
+
+        assert cache.get_many(keys=["pokemon-0", "pokemon-24", "pokemon-29"]) == {
+            "pokemon-0": {"index": 0},
+            "pokemon-24": {"index": 24},
+            "pokemon-29": {"index": 29},
+        }
+        assert len(client.items) == 30 and client.batch_write_calls == 3
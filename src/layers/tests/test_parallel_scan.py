@@ -0,0 +1,198 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("boto3")
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from parallel_scan import AdaptiveCapacityLimiter, ParallelScan  # noqa: E402
+
+
+class FakeItem:
+    def __init__(self, data):
+        self.data = data
+
+    def serialize(self):
+        return self.data
+
+
+class FakeModel:
+    Meta = SimpleNamespace(table_name="battles")
+
+    @classmethod
+    def from_raw_data(cls, data):
+        return FakeItem(data)
+
+
+class FakeDynamoDBClient:
+    """Emulates Scan and BatchWriteItem of a table with 2 items per segment, 1 item per page."""
+
+    def __init__(self, throttled_scans=0):
+        self.throttled_scans = throttled_scans
+        self.scans = []
+        self.written = []
+        self.lock = threading.Lock()
+
+    def scan(self, TableName, Segment, TotalSegments, Limit, ReturnConsumedCapacity, ExclusiveStartKey=None):
+        with self.lock:
+            self.scans.append((Segment, ExclusiveStartKey))
+
+            if self.throttled_scans:
+                self.throttled_scans -= 1
+                raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "Scan")
+
+        index = 1 if ExclusiveStartKey else 0
+        item = {"id": {"S": f"{Segment}-{index}"}}
+        last_evaluated_key = item if index == 0 else None
+        response = {"Items": [item], "ConsumedCapacity": {"TableName": TableName, "CapacityUnits": 0.5}}
+
+        if last_evaluated_key:
+            response["LastEvaluatedKey"] = last_evaluated_key
+
+        return response
+
+    def batch_write_item(self, RequestItems, ReturnConsumedCapacity):
+        with self.lock:
+            self.written.extend(request["PutRequest"]["Item"]["id"]["S"] for request in RequestItems["battles"])
+
+        return {"UnprocessedItems": {}, "ConsumedCapacity": [{"TableName": "battles", "CapacityUnits": 1.0}]}
+
+
+class FakeCache:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = {**value, "segments": {k: dict(v) for k, v in value["segments"].items()}}
+
+
+def parallel_scan(client, **kwargs):
+    with patch("parallel_scan.boto3.client", return_value=client):
+        return ParallelScan(model=FakeModel, checkpoint_key="scan#checkpoint", **kwargs)
+
+
+def test_scan_transforms_and_writes_all_segments():
+    client = FakeDynamoDBClient()
+    cache = FakeCache()
+    # Only items of the first page of every segment are written
+    scan = parallel_scan(
+        client,
+        transform=lambda item: item if item.data["id"]["S"].endswith("-0") else None,
+        total_segments=3,
+        cache_cli=cache,
+    )
+
+    result = scan.run()
+
+    assert result["completed"]
+    assert result["scanned"] == 6 and result["written"] == 3
+    assert sorted(client.written) == ["0-0", "1-0", "2-0"]
+    assert cache.values["scan#checkpoint"]["completed"]
+
+
+def test_scan_resumes_from_checkpoint():
+    client = FakeDynamoDBClient()
+    checkpoint = {
+        "total_segments": 2,
+        "segments": {
+            "0": {"last_evaluated_key": {"id": {"S": "0-0"}}, "completed": False},
+            "1": {"last_evaluated_key": None, "completed": True},
+        },
+        "completed": False,
+    }
+    cache = FakeCache({"scan#checkpoint": checkpoint})
+    scan = parallel_scan(client, transform=lambda item: item, total_segments=2, cache_cli=cache)
+
+    result = scan.run()
+
+    assert result["completed"]
+    assert client.scans == [(0, {"id": {"S": "0-0"}})]
+    assert client.written == ["0-1"]
+
+
+def test_scan_stops_and_keeps_progress():
+    client = FakeDynamoDBClient()
+    cache = FakeCache()
+    pages = iter([False, True])
+    scan = parallel_scan(client, transform=lambda item: item, total_segments=1, cache_cli=cache)
+
+    result = scan.run(should_stop=lambda: next(pages))
+
+    assert not result["completed"]
+    assert cache.values["scan#checkpoint"]["segments"]["0"] == {
+        "last_evaluated_key": {"id": {"S": "0-0"}},
+        "parts": 0,
+        "completed": False,
+    }
+
+
+def test_writer_receives_numbered_parts():
+    client = FakeDynamoDBClient()
+    parts = []
+    scan = parallel_scan(
+        client,
+        transform=lambda item: item,
+        total_segments=2,
+        cache_cli=FakeCache(),
+        writer=lambda segment, part, items: parts.append((segment, part, [item.data["id"]["S"] for item in items])),
+    )
+
+    result = scan.run()
+
+    assert result["completed"] and result["written"] == 4
+    assert sorted(parts) == [(0, 0, ["0-0"]), (0, 1, ["0-1"]), (1, 0, ["1-0"]), (1, 1, ["1-1"])]
+    # Items are written by the writer instead of the target table
+    assert client.written == []
+
+
+def test_writer_parts_are_filled_from_several_pages():
+    client = FakeDynamoDBClient()
+    cache = FakeCache()
+    parts = []
+    scan = parallel_scan(
+        client,
+        transform=lambda item: item,
+        total_segments=2,
+        cache_cli=cache,
+        writer=lambda segment, part, items: parts.append((segment, part, [item.data["id"]["S"] for item in items])),
+        part_size=2,
+    )
+
+    result = scan.run()
+
+    assert result["completed"] and result["written"] == 4
+    assert sorted(parts) == [(0, 0, ["0-0", "0-1"]), (1, 0, ["1-0", "1-1"])]
+    assert cache.values["scan#checkpoint"]["segments"]["0"]["parts"] == 1
+
+
+def test_throttled_scan_is_retried_at_lower_rate():
+    client = FakeDynamoDBClient(throttled_scans=1)
+    rate_limiter = AdaptiveCapacityLimiter(rate=100, min_rate=10, increase=0)
+    scan = parallel_scan(client, transform=lambda item: None, total_segments=1, rate_limiter=rate_limiter)
+
+    with patch("parallel_scan.time.sleep"):
+        result = scan.run()
+
+    assert result["completed"] and result["scanned"] == 2
+    assert result["capacity"] == {"rate": 50, "consumed": 1.0, "throttled": 1}
+
+
+def test_capacity_limiter_waits_for_consumed_units():
+    rate_limiter = AdaptiveCapacityLimiter(rate=10, increase=0)
+    rate_limiter.consume(5)
+
+    with patch("parallel_scan.time.sleep") as sleep:
+        rate_limiter.wait()
+
+    assert sleep.call_args.args[0] == pytest.approx(0.5, abs=0.01)
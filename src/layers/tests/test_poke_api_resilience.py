@@ -0,0 +1,118 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from poke_api.client import PokeAPIClient  # noqa: E402
+from poke_api.resilience import CircuitBreaker, PokeAPIUnavailableError, TokenBucket  # noqa: E402
+
+
+class TestTokenBucket:
+    """Tests for the token bucket rate limiter."""
+
+    def test_burst_up_to_capacity(self):
+        rate_limiter = TokenBucket(rate=1, capacity=3, max_wait=0)
+
+        assert [rate_limiter.acquire() for _ in range(4)] == [True, True, True, False]
+        assert rate_limiter.metrics["rejected"] == 1
+
+    def test_waits_for_token(self):
+        rate_limiter = TokenBucket(rate=100, capacity=1, max_wait=1)
+
+        with patch("poke_api.resilience.time.sleep") as sleep:
+            assert rate_limiter.acquire()
+            assert rate_limiter.acquire()
+
+        assert 0 < sleep.call_args_list[-1].args[0] <= 0.01
+        assert rate_limiter.metrics["throttled"] == 1
+
+
+class TestCircuitBreaker:
+    """Tests for the circuit breaker."""
+
+    def test_opens_after_consecutive_failures(self):
+        circuit_breaker = CircuitBreaker(name="test", failure_threshold=2, recovery_timeout=30)
+
+        circuit_breaker.record_failure()
+        circuit_breaker.record_success()
+        circuit_breaker.record_failure()
+        assert circuit_breaker.allow_request()
+
+        circuit_breaker.record_failure()
+        assert not circuit_breaker.allow_request()
+        assert circuit_breaker.metrics == {"state": "open", "failures": 2, "opened": 1, "rejected": 1}
+
+    @pytest.mark.parametrize("trial_succeeds, state", [(True, "closed"), (False, "open")])
+    def test_half_open_trial_request(self, trial_succeeds, state):
+        circuit_breaker = CircuitBreaker(name="test", failure_threshold=1, recovery_timeout=0)
+        circuit_breaker.record_failure()
+
+        assert circuit_breaker.allow_request()  # The trial request
+        assert not circuit_breaker.allow_request()
+
+        if trial_succeeds:
+            circuit_breaker.record_success()
+        else:
+            circuit_breaker.record_failure()
+        assert circuit_breaker.state == state
+
+    def test_open_state_is_shared_through_cache(self):
+        cache = {}
+        cache_cli = MagicMock()
+        cache_cli.get.side_effect = lambda key: cache.get(key)
+        cache_cli.set.side_effect = lambda key, value, ttl: cache.update({key: value})
+        circuit_breaker = CircuitBreaker(name="test", failure_threshold=1, cache_cli=cache_cli)
+        other_circuit_breaker = CircuitBreaker(name="test", failure_threshold=1, cache_cli=cache_cli)
+
+        circuit_breaker.record_failure()
+
+        assert not other_circuit_breaker.allow_request()
+        cache_cli.set.assert_called_once_with(
+            key="circuit#test", value={"opened_at": circuit_breaker.opened_at}, ttl=30
+        )
+
+    def test_cancelled_trial_request(self):
+        circuit_breaker = CircuitBreaker(name="test", failure_threshold=1, recovery_timeout=0)
+        circuit_breaker.record_failure()
+
+        assert circuit_breaker.allow_request()
+        circuit_breaker.cancel_trial()
+
+        assert circuit_breaker.state == "open"
+        assert circuit_breaker.allow_request()  # The next request is the trial
+
+
+class TestPokeAPIClientResilience:
+    """Tests for the circuit breaker and rate limiter of the PokeAPI client."""
+
+    @pytest.fixture
+    def circuit_breaker(self):
+        circuit_breaker = CircuitBreaker(name="test", failure_threshold=1, recovery_timeout=0)
+        circuit_breaker.record_failure()
+        return circuit_breaker
+
+    def test_trial_request_rejected_by_rate_limiter(self, circuit_breaker):
+        rate_limiter = TokenBucket(rate=1, capacity=1, max_wait=0)
+        rate_limiter.acquire()
+        client = PokeAPIClient(rate_limiter=rate_limiter, circuit_breaker=circuit_breaker)
+
+        with pytest.raises(PokeAPIUnavailableError, match="rate limit"):
+            client.list_pokemon()
+
+        assert circuit_breaker.state == "open"
+        assert circuit_breaker.allow_request()
+
+    def test_trial_request_failed_unexpectedly(self, circuit_breaker):
+        client = PokeAPIClient(circuit_breaker=circuit_breaker)
+        client.session = MagicMock()
+        client.session.get.side_effect = RuntimeError("Unexpected error")
+
+        with pytest.raises(RuntimeError):
+            client.fetch_pokemon_data_if_modified(pokemon_id=1)
+
+        assert circuit_breaker.state == "open"
+        assert circuit_breaker.allow_request()
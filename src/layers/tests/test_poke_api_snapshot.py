@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from poke_api.snapshot import PokedexSnapshot, load_snapshot, write_snapshot  # noqa: E402
+
+
+def build_battle_data(pokemon_id, name, types, abilities, pokemon_image=None):
+    """Builds battle data of a Pokemon, as returned by `extract_battle_data`."""
+    return {
+        "id": pokemon_id,
+        "name": name,
+        "stats": {
+            "hp": pokemon_id,
+            "attack": 50,
+            "defense": 40,
+            "special-attack": 50,
+            "special-defense": 50,
+            "speed": 90,
+        },
+        "abilities": abilities,
+        "types": types,
+        "pokemon_image": pokemon_image,
+    }
+
+
+@pytest.fixture
+def pokemon_data():
+    return [
+        build_battle_data(133, "eevee", ["normal"], ["run-away", "adaptability", "anticipation"], "133.png"),
+        build_battle_data(25, "pikachu", ["electric"], ["static", "lightning-rod"], "25.png"),
+        build_battle_data(10001, "deoxys-attack", ["psychic"], ["pressure"]),
+        build_battle_data(6, "charizard", ["fire", "flying"], ["blaze", "solar-power"], "6.png"),
+    ]
+
+
+@pytest.fixture
+def snapshot(tmp_path, pokemon_data):
+    path = tmp_path / "pokedex.bin"
+    write_snapshot(path, pokemon_data)
+    snapshot = PokedexSnapshot(path=path)
+    yield snapshot
+    snapshot.close()
+
+
+class TestPokedexSnapshot:
+    """Tests for the offline Pokedex snapshot."""
+
+    def test_lookup_by_id_and_name(self, snapshot, pokemon_data):
+        assert len(snapshot) == 4
+
+        for data in pokemon_data:
+            assert snapshot.fetch_pokemon_data(pokemon_id=data["id"]) == data
+            assert snapshot.fetch_pokemon_data(pokemon_id=str(data["id"])) == data
+            assert snapshot.fetch_pokemon_data(pokemon_id=data["name"].upper()) == data
+
+    @pytest.mark.parametrize("pokemon_id", ["0", "26", "99999", "missingno", "zubat", "a", "²", "١٣٣"])
+    def test_missing_pokemon(self, snapshot, pokemon_id):
+        assert snapshot.fetch_pokemon_data(pokemon_id=pokemon_id) is None
+        assert pokemon_id not in snapshot
+
+    def test_full_pokemon_data_is_not_found(self, snapshot):
+        assert snapshot.fetch_pokemon_data(pokemon_id="pikachu", battle_data=False) is None
+
+    def test_load_snapshot(self, tmp_path, pokemon_data):
+        assert load_snapshot(path=tmp_path / "missing.bin") is None
+
+        (tmp_path / "invalid.bin").write_bytes(b"not a snapshot")
+        assert load_snapshot(path=tmp_path / "invalid.bin") is None
+
+        write_snapshot(tmp_path / "pokedex.bin", pokemon_data)
+        assert "pikachu" in load_snapshot(path=tmp_path / "pokedex.bin")
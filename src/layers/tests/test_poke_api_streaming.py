@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+
+def build_pokemon_document():
+    """Builds a PokeAPI document of a Pokemon, with the fields irrelevant for battles."""
+    return {
+        "abilities": [{"ability": {"name": "static", "url": ""}, "is_hidden": False, "slot": 1}],
+        "id": 25,
+        "moves": [{"move": {"name": f"move-{index}", "url": ""}, "version_group_details": []} for index in range(500)],
+        "name": "pikachu",
+        "sprites": {"back_default": "back.png", "front_default": "front.png", "other": {"home": {}}},
+        "stats": [
+            {"base_stat": 35, "effort": 0, "stat": {"name": "hp", "url": ""}},
+            {"base_stat": 90, "effort": 2, "stat": {"name": "speed", "url": ""}},
+        ],
+        "types": [{"slot": 1, "type": {"name": "electric", "url": ""}}],
+        "weight": 60,
+    }
+
+
+@pytest.fixture(scope="module")
+def streaming():
+    pytest.importorskip("ijson")
+    pytest.importorskip("requests")
+
+    from poke_api import streaming
+
+    return streaming
+
+
+class TestExtractBattleDataFromChunks:
+    """Tests for the streaming extraction of battle data."""
+
+    @pytest.mark.parametrize("chunk_size", [7, 1024, 1 << 20])
+    def test_matches_extract_battle_data(self, streaming, chunk_size):
+        from poke_api.client import BasePokeAPIClient
+
+        document = build_pokemon_document()
+        content = json.dumps(document).encode()
+        chunks = (content[index : index + chunk_size] for index in range(0, len(content), chunk_size))
+
+        assert streaming.extract_battle_data_from_chunks(chunks) == BasePokeAPIClient.extract_battle_data(document)
+
+    def test_invalid_document(self, streaming):
+        with pytest.raises(ValueError):
+            streaming.extract_battle_data_from_chunks([b'{"id": 25, "name": "pika'])
+
+        with pytest.raises(ValueError):
+            streaming.extract_battle_data_from_chunks([b'{"id": 25}'])
@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+
+@pytest.fixture(scope="module")
+def poke_cache_utils():
+    for module_name in ("aws_lambda_powertools", "boto3", "rediscluster", "requests"):
+        pytest.importorskip(module_name)
+
+    import poke_cache_utils
+
+    return poke_cache_utils
+
+
+
+@pytest.fixture
+def cache_cli():
+    cache_cli = MagicMock()
+    cache_cli.get.return_value = None
+    cache_cli.get_entry.return_value = None
+    cache_cli.add.return_value = True
+    return cache_cli
+
+
+class TestFetchPokemonDataWithCaching:
+    """Tests for coalescing of cache misses."""
+
+    def test_concurrent_misses_share_one_fetch(self, poke_cache_utils, cache_cli):
+        from poke_api.client import PokemonDataResponse
+
+        fetch_started = threading.Event()
+        release_fetch = threading.Event()
+        poke_cli = MagicMock()
+
+        def fetch_pokemon_data_if_modified(pokemon_id, etag, last_modified):
+            fetch_started.set()
+            release_fetch.wait(timeout=5)
+            return PokemonDataResponse(data={"id": 25, "name": pokemon_id})
+
+        poke_cli.fetch_pokemon_data_if_modified.side_effect = fetch_pokemon_data_if_modified
+        # Callers which miss the in-flight fetch find data in the cache
+        cached_items = {}
+        cache_cli.get_entry.side_effect = lambda key: cached_items.get(key)
+        cache_cli.set_many.side_effect = lambda mapping, ttl=None: cached_items.update(mapping)
+        results = []
+
+        def fetch():
+            results.append(poke_cache_utils.fetch_pokemon_data_with_caching(cache_cli, poke_cli, "pikachu"))
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        threads[0].start()
+        fetch_started.wait(timeout=5)
+        for thread in threads[1:]:
+            thread.start()
+        release_fetch.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == [{"id": 25, "name": "pikachu"}] * 5
+        poke_cli.fetch_pokemon_data_if_modified.assert_called_once_with(
+            pokemon_id="pikachu", etag=None, last_modified=None
+        )
+        assert [call.kwargs["mapping"].keys() for call in cache_cli.set_many.call_args_list].count({"pikachu"}) == 1
+
+    def test_concurrent_batch_misses_share_one_fetch(self, poke_cache_utils, cache_cli):
+        from poke_api.client import PokemonDataResponse
+
+        fetch_started = threading.Event()
+        release_fetch = threading.Event()
+        poke_cli = MagicMock()
+
+        def fetch_pokemon_data_if_modified(pokemon_id, etag, last_modified):
+            fetch_started.set()
+            release_fetch.wait(timeout=5)
+            return PokemonDataResponse(data={"id": 135, "name": pokemon_id})
+
+        poke_cli.fetch_pokemon_data_if_modified.side_effect = fetch_pokemon_data_if_modified
+        # Callers which miss the in-flight fetch find data in the cache
+        cached_items = {}
+        cache_cli.get.side_effect = lambda key: getattr(cached_items.get(key), "value", None)
+        cache_cli.get_entry.side_effect = lambda key: cached_items.get(key)
+        cache_cli.get_many.side_effect = lambda keys: {key: cached_items[key] for key in keys if key in cached_items}
+        cache_cli.get_many_entries.side_effect = lambda keys: {
+            key: cached_items[key] for key in keys if key in cached_items
+        }
+        cache_cli.set_many.side_effect = lambda mapping, ttl=None: cached_items.update(mapping)
+        results = []
+
+        def fetch_many():
+            pokemon_data = poke_cache_utils.fetch_many_pokemon_data_with_caching(cache_cli, poke_cli, ["jolteon"])
+            results.append(pokemon_data["jolteon"])
+
+        def fetch():
+            results.append(poke_cache_utils.fetch_pokemon_data_with_caching(cache_cli, poke_cli, "jolteon"))
+
+        # Batch reads share the fetch with each other and with single reads
+        threads = [threading.Thread(target=target) for target in [fetch_many] * 4 + [fetch]]
+        threads[0].start()
+        fetch_started.wait(timeout=5)
+        for thread in threads[1:]:
+            thread.start()
+        release_fetch.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert results == [{"id": 135, "name": "jolteon"}] * 5
+        poke_cli.fetch_pokemon_data_if_modified.assert_called_once_with(
+            pokemon_id="jolteon", etag=None, last_modified=None
+        )
+        cache_cli.add.assert_called_once_with(key="lease#jolteon", value="1", ttl=poke_cache_utils.LEASE_TTL)
+
+    def test_waits_for_lease_holder_to_cache_data(self, poke_cache_utils, cache_cli, monkeypatch):
+        monkeypatch.setattr(poke_cache_utils, "LEASE_POLL_INTERVAL", 0)
+        cache_cli.add.return_value = False  # Another container holds the lease
+        cache_cli.get.side_effect = [None, None, {"id": 25, "name": "pikachu"}]
+        poke_cli = MagicMock()
+
+        pokemon_data = poke_cache_utils.fetch_pokemon_data_with_caching(cache_cli, poke_cli, "pikachu")
+
+        assert pokemon_data == {"id": 25, "name": "pikachu"}
+        poke_cli.fetch_pokemon_data_if_modified.assert_not_called()
+
+    def test_not_found(self, poke_cache_utils, cache_cli):
+        from aws_lambda_powertools.event_handler.exceptions import NotFoundError
+        from poke_api.client import PokemonDataResponse
+
+        poke_cli = MagicMock()
+        poke_cli.fetch_pokemon_data_if_modified.return_value = PokemonDataResponse()
+
+        with pytest.raises(NotFoundError):
+            poke_cache_utils.fetch_pokemon_data_with_caching(cache_cli, poke_cli, "missingno")
+        cache_cli.set.assert_not_called()
+
+    def test_stale_data_is_returned_and_refreshed_in_background(self, poke_cache_utils, cache_cli, monkeypatch):
+        from cache.abstract import CacheEntry
+
+        refresh_in_background = MagicMock()
+        monkeypatch.setattr(poke_cache_utils, "_refresh_in_background", refresh_in_background)
+        entry = CacheEntry(value={"id": 25, "name": "pikachu"}, soft_expires_at=1)
+        cache_cli.get_entry.return_value = entry
+        poke_cli = MagicMock()
+
+        pokemon_data = poke_cache_utils.fetch_pokemon_data_with_caching(cache_cli, poke_cli, "pikachu")
+
+        assert pokemon_data == {"id": 25, "name": "pikachu"}
+        poke_cli.fetch_pokemon_data_if_modified.assert_not_called()
+        refresh_in_background.assert_called_once_with(
+            cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id="pikachu", entry=entry
+        )
+
+    def test_stale_batch_data_is_returned_and_refreshed_in_background(self, poke_cache_utils, cache_cli, monkeypatch):
+        from cache.abstract import CacheEntry
+
+        refresh_in_background = MagicMock()
+        monkeypatch.setattr(poke_cache_utils, "_refresh_in_background", refresh_in_background)
+        stale_entry = CacheEntry(value={"id": 25, "name": "pikachu"}, soft_expires_at=1)
+        fresh_entry = CacheEntry(value={"id": 133, "name": "eevee"}, soft_expires_at=time.time() + 3600)
+        cache_cli.get_many_entries.return_value = {"pikachu": stale_entry, "eevee": fresh_entry}
+        poke_cli = MagicMock()
+
+        pokemon_data = poke_cache_utils.fetch_many_pokemon_data_with_caching(cache_cli, poke_cli, ["pikachu", "eevee"])
+
+        assert pokemon_data == {"pikachu": stale_entry.value, "eevee": fresh_entry.value}
+        poke_cli.fetch_pokemon_data_if_modified.assert_not_called()
+        refresh_in_background.assert_called_once_with(
+            cache_cli=cache_cli, poke_cli=poke_cli, pokemon_id="pikachu", entry=stale_entry
+        )
+
+    def test_stale_batch_data_is_revalidated(self, poke_cache_utils, cache_cli, monkeypatch):
+        from cache.abstract import CacheEntry
+        from poke_api.client import PokemonDataResponse
+
+        # Background refreshes run synchronously
+        monkeypatch.setattr(poke_cache_utils, "_refresh_executor", MagicMock(submit=lambda refresh: refresh()))
+        stale_entry = CacheEntry(value={"id": 25, "name": "pikachu"}, soft_expires_at=1, etag='"v1"')
+        cache_cli.get_many_entries.return_value = {"pikachu": stale_entry}
+        poke_cli = MagicMock()
+        poke_cli.fetch_pokemon_data_if_modified.return_value = PokemonDataResponse(not_modified=True, etag='"v1"')
+
+        pokemon_data = poke_cache_utils.fetch_many_pokemon_data_with_caching(cache_cli, poke_cli, ["pikachu"])
+
+        assert pokemon_data == {"pikachu": stale_entry.value}
+        poke_cli.fetch_pokemon_data_if_modified.assert_called_once_with(
+            pokemon_id="pikachu", etag='"v1"', last_modified=None
+        )
+        refreshed_entry = cache_cli.set_many.call_args_list[0].kwargs["mapping"]["pikachu"]
+        assert refreshed_entry.value == stale_entry.value and refreshed_entry.soft_expires_at > time.time()
+
+
+class TestFetchPokemonCacheEntry:
+    """Tests for the revalidation of cached Pokémon data with conditional requests."""
+
+    def test_validators_are_stored_with_fetched_data(self, poke_cache_utils):
+        from poke_api.client import PokemonDataResponse
+
+        poke_cli = MagicMock()
+        poke_cli.fetch_pokemon_data_if_modified.return_value = PokemonDataResponse(
+            data={"id": 25, "name": "pikachu"}, etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"
+        )
+
+        entry = poke_cache_utils.fetch_pokemon_cache_entry(poke_cli, "pikachu")
+
+        assert entry.value == {"id": 25, "name": "pikachu"}
+        assert entry.etag == '"v1"'
+        assert entry.last_modified == "Mon, 01 Jan 2024 00:00:00 GMT"
+        assert entry.soft_expires_at > time.time()
+
+    def test_not_modified_data_gets_new_soft_expiry(self, poke_cache_utils):
+        from cache.abstract import CacheEntry
+        from poke_api.client import PokemonDataResponse
+
+        cached_entry = CacheEntry(value={"id": 25, "name": "pikachu"}, soft_expires_at=1, etag='"v1"')
+        poke_cli = MagicMock()
+        poke_cli.fetch_pokemon_data_if_modified.return_value = PokemonDataResponse(not_modified=True, etag='"v1"')
+
+        entry = poke_cache_utils.fetch_pokemon_cache_entry(poke_cli, "pikachu", cached_entry=cached_entry)
+
+        poke_cli.fetch_pokemon_data_if_modified.assert_called_once_with(
+            pokemon_id="pikachu", etag='"v1"', last_modified=None
+        )
+        assert entry.value == cached_entry.value
+        assert entry.etag == '"v1"'
+        assert entry.soft_expires_at > time.time()
+
+
+class TestPokemonAliases:
+    """Tests for the alias index resolving Pokémon IDs to names."""
+
+    def test_id_and_name_share_one_cache_entry(self, poke_cache_utils, cache_cli):
+        from poke_api.client import PokemonDataResponse
+
+        cache_cli.get_many.return_value = {}
+        poke_cli = MagicMock()
+        poke_cli.fetch_pokemon_data_if_modified.return_value = PokemonDataResponse(data={"id": 133, "name": "eevee"})
+
+        poke_cache_utils.fetch_pokemon_data_with_caching(cache_cli, poke_cli, "133")
+
+        data_mapping = cache_cli.set_many.call_args_list[0].kwargs["mapping"]
+        alias_mapping = cache_cli.set_many.call_args_list[1].kwargs["mapping"]
+        assert list(data_mapping) == ["eevee"]
+        assert alias_mapping == {"alias#133": "eevee"}
+        assert poke_cache_utils.resolve_pokemon_keys(cache_cli, ["133", "eevee"]) == {"133": "eevee", "eevee": "eevee"}
+
+    def test_alias_is_read_from_cache(self, poke_cache_utils, cache_cli):
+        cache_cli.get_many.return_value = {"alias#150": "mewtwo"}
+
+        assert poke_cache_utils.resolve_pokemon_keys(cache_cli, ["150"]) == {"150": "mewtwo"}
+
+    @pytest.mark.parametrize("pokemon_id", ["²", "١٥٠"])
+    def test_non_ascii_digits_are_not_ids(self, poke_cache_utils, cache_cli, pokemon_id):
+        assert poke_cache_utils.resolve_pokemon_keys(cache_cli, [pokemon_id]) == {pokemon_id: pokemon_id}
+        cache_cli.get_many.assert_not_called()
+
+
+class TestShouldRefresh:
+    """Tests for the probabilistic early refresh of cache entries."""
+
+    def test_entries_without_soft_expiry_are_not_refreshed(self, poke_cache_utils):
+        from cache.abstract import CacheEntry
+
+        assert not poke_cache_utils.should_refresh(CacheEntry(value={}))
+
+    def test_fresh_entries_are_refreshed_only_close_to_soft_expiry(self, poke_cache_utils):
+        from cache.abstract import CacheEntry
+
+        now = time.time()
+
+        assert not poke_cache_utils.should_refresh(CacheEntry(value={}, soft_expires_at=now + 3600, delta=0.1))
+        assert poke_cache_utils.should_refresh(CacheEntry(value={}, soft_expires_at=now - 1, delta=0.1))
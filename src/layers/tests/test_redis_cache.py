@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("rediscluster")
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from rediscluster.nodemanager import NodeManager  # noqa: E402
+
+from cache.abstract import CacheEntry  # noqa: E402
+from cache.redis import RedisCacheClient  # noqa: E402
+
+POKEMON_DATA = {"id": 25, "name": "pikachu", "stats": {"hp": 35, "attack": 55}}
+
+
+class FakeRedisCluster:
+    """Emulates the Redis cluster client, its pipelines send the queued commands on execute."""
+
+    def __init__(self):
+        self.items = {}
+        self.expires_at = {}
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.items:
+            return None
+
+        self.items[key] = value
+        self.expires_at.pop(key, None)
+        if ex:
+            self.expires_at[key] = time.time() + ex
+        return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value, ex=ttl)
+
+    def get(self, key):
+        return self.items.get(key)
+
+    def delete(self, key):
+        self.expires_at.pop(key, None)
+        return int(self.items.pop(key, None) is not None)
+
+    def pttl(self, key):
+        if key not in self.items:
+            return -2
+        return int((self.expires_at[key] - time.time()) * 1000) if key in self.expires_at else -1
+
+    def pipeline(self):
+        client = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+            def execute(self):
+                return [getattr(client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+        return Pipeline()
+
+
+@pytest.fixture
+def client():
+    return FakeRedisCluster()
+
+
+@pytest.fixture
+def cache(client):
+    with patch("cache.redis.RedisCluster", return_value=client):
+        return RedisCacheClient(startup_nodes=[{"host": "localhost", "port": "6379"}])
+
+
+class TestRedisCacheClient:
+    """Tests for the Redis cache client, which stores the metadata of values under '<key>#meta' keys."""
+
+    def test_entry_round_trip(self, cache):
+        entry = CacheEntry(value=POKEMON_DATA, soft_expires_at=int(time.time()) + 60, delta=0.25, etag='"v1"')
+
+        cache.set(key="pikachu", value=entry, ttl=120)
+        read_entry = cache.get_entry(key="pikachu")
+
+        assert read_entry._replace(expires_at=None) == entry
+        assert 0 < read_entry.expires_at - time.time() <= 120
+        assert cache.get_many_entries(keys=["pikachu", "eevee"]).keys() == {"pikachu"}
+
+    def test_value_and_meta_keys_are_in_the_same_slot(self, cache, client):
+        cache.set(key="pokemon#pikachu", value=CacheEntry(value=POKEMON_DATA, etag='"v1"'), ttl=120)
+
+        node_manager = NodeManager(startup_nodes=[{"host": "localhost", "port": "6379"}])
+        assert len(client.items) == 2
+        assert len({node_manager.keyslot(key) for key in client.items}) == 1
+
+    def test_meta_of_previous_value_is_deleted(self, cache, client):
+        cache.set(key="pikachu", value=CacheEntry(value=POKEMON_DATA, soft_expires_at=1000.0, etag='"v1"'))
+        cache.set(key="pikachu", value=POKEMON_DATA)
+
+        assert cache.get_entry(key="pikachu") == CacheEntry(value=POKEMON_DATA)
+        assert len(client.items) == 1
@@ -0,0 +1,161 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+# Add the Data Layer to sys.path, as it is available in the Lambda runtime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_layer")))
+
+from cache.abstract import Cache, CacheEntry  # noqa: E402
+from cache.tiered import TieredCacheClient, approximate_size  # noqa: E402
+
+
+class InMemoryCache(Cache):
+    """Minimal cache backend, which counts its calls."""
+
+    def __init__(self):
+        self.items = {}
+        self.get_calls = 0
+
+    def set(self, key, value, ttl=None):
+        self.items[key] = value
+
+    def get(self, key):
+        self.get_calls += 1
+        return self.items.get(key)
+
+
+@pytest.fixture
+def backend():
+    return InMemoryCache()
+
+
+class TestTieredCacheClient:
+    """Tests for the in-process LRU cache in front of another cache client."""
+
+    def test_hit_does_not_call_backend(self, backend):
+        backend.set("pikachu", {"name": "pikachu"})
+        cache_cli = TieredCacheClient(backend=backend)
+
+        assert cache_cli.get("pikachu") == {"name": "pikachu"}
+        assert cache_cli.get("pikachu") == {"name": "pikachu"}
+        assert backend.get_calls == 1
+        assert (cache_cli.stats["hits"], cache_cli.stats["misses"]) == (1, 1)
+
+    def test_set_writes_through(self, backend):
+        cache_cli = TieredCacheClient(backend=backend)
+        cache_cli.set("pikachu", {"name": "pikachu"}, ttl=3600)
+
+        assert backend.items["pikachu"] == {"name": "pikachu"}
+        assert cache_cli.get("pikachu") == {"name": "pikachu"}
+        assert backend.get_calls == 0
+
+    def test_least_recently_used_entry_is_evicted(self, backend):
+        entry_size = approximate_size("bulbasaur") + approximate_size(CacheEntry(value={"name": "bulbasaur"}))
+        # Only two of the entries fit in the L1 cache
+        cache_cli = TieredCacheClient(backend=backend, max_bytes=2 * entry_size)
+        for key in ("bulbasaur", "ivysaur"):
+            cache_cli.set(key, {"name": key})
+
+        cache_cli.get("bulbasaur")  # 'ivysaur' becomes the least recently used
+        cache_cli.set("venusaur", {"name": "venusaur"})
+
+        assert cache_cli.stats["evictions"] == 1
+        cache_cli.get("ivysaur")
+        assert backend.get_calls == 1
+
+    def test_entries_are_evicted_by_size(self, backend):
+        small_value = {"name": "pikachu"}
+        large_value = {"name": "mewtwo", "moves": ["psychic"] * 4}
+        small_size = approximate_size("pokemon-0") + approximate_size(CacheEntry(value=small_value))
+        cache_cli = TieredCacheClient(backend=backend, max_bytes=3 * small_size)
+
+        for index in range(3):
+            cache_cli.set(f"pokemon-{index}", small_value)
+        cache_cli.set("mewtwo", large_value)
+
+        # The large value takes the place of the two least recently used small ones
+        assert cache_cli.stats["evictions"] == 2
+        assert cache_cli.stats["entries"] == 2 and cache_cli.stats["bytes"] <= 3 * small_size
+        assert cache_cli.get("mewtwo") == large_value and cache_cli.get("pokemon-2") == small_value
+        assert backend.get_calls == 0
+
+    def test_value_larger_than_budget_is_not_kept(self, backend):
+        cache_cli = TieredCacheClient(backend=backend, max_bytes=100)
+        cache_cli.set("mewtwo", {"name": "mewtwo", "moves": ["psychic"] * 20})
+
+        assert cache_cli.stats["entries"] == 0
+        assert cache_cli.get("mewtwo") is not None and backend.get_calls == 1
+
+    def test_expired_entry_is_fetched_from_backend(self, backend):
+        cache_cli = TieredCacheClient(backend=backend, ttl=60)
+
+        with patch("cache.tiered.time.monotonic", return_value=1000.0) as monotonic:
+            cache_cli.set("pikachu", {"name": "pikachu"}, ttl=3600)
+            monotonic.return_value = 1061.0
+
+            assert cache_cli.get("pikachu") == {"name": "pikachu"}
+            assert backend.get_calls == 1
+
+    def test_cached_value_can_not_be_modified_by_caller(self, backend):
+        cache_cli = TieredCacheClient(backend=backend)
+        cache_cli.set("pikachu", {"name": "pikachu"})
+
+        cache_cli.get("pikachu")["name"] = "raichu"
+
+        assert cache_cli.get("pikachu") == {"name": "pikachu"}
+
+    def test_get_many_reads_only_missing_keys_from_backend(self, backend):
+        backend.set("ivysaur", {"name": "ivysaur"})
+        cache_cli = TieredCacheClient(backend=backend)
+        cache_cli.set("bulbasaur", {"name": "bulbasaur"})
+
+        values = cache_cli.get_many(["bulbasaur", "ivysaur", "venusaur"])
+
+        assert values == {"bulbasaur": {"name": "bulbasaur"}, "ivysaur": {"name": "ivysaur"}}
+        assert backend.get_calls == 2  # Default get_many of the backend reads 'ivysaur' and 'venusaur'
+        assert cache_cli.get_many(["ivysaur"]) == {"ivysaur": {"name": "ivysaur"}}
+        assert backend.get_calls == 2
+
+    def test_soft_expiry_is_kept_in_l1_cache(self, backend):
+        cache_cli = TieredCacheClient(backend=backend)
+        cache_cli.set("pikachu", CacheEntry(value={"name": "pikachu"}, soft_expires_at=1000.0, delta=0.5))
+
+        assert cache_cli.get("pikachu") == {"name": "pikachu"}
+        assert cache_cli.get_entry("pikachu") == CacheEntry({"name": "pikachu"}, 1000.0, 0.5)
+        assert backend.get_calls == 0
+
+    def test_get_many_keeps_soft_expiry_of_backend_entries(self, backend):
+        entry = CacheEntry(value={"name": "pikachu"}, soft_expires_at=1000.0, delta=0.5, etag='"v1"')
+        backend.get_entry = lambda key: entry if key == "pikachu" else None
+        cache_cli = TieredCacheClient(backend=backend)
+
+        assert cache_cli.get_many(["pikachu", "eevee"]) == {"pikachu": {"name": "pikachu"}}
+        # The L1 hit still has the soft expiry and validators, so it can trigger a refresh
+        assert cache_cli.get_many_entries(["pikachu"]) == {"pikachu": entry}
+        assert cache_cli.stats["hits"] == 1
+
+    def test_short_lived_backend_entry_expires_with_backend(self, backend):
+        backend.get_entry = lambda key: CacheEntry(value={"state": "open"}, expires_at=time.time() + 30)
+        cache_cli = TieredCacheClient(backend=backend, ttl=300)
+
+        with patch("cache.tiered.time.monotonic", return_value=1000.0) as monotonic:
+            assert cache_cli.get("circuit#pokeapi") == {"state": "open"}
+            monotonic.return_value = 1031.0
+
+            assert cache_cli.get_entry("circuit#pokeapi") is not None
+            assert cache_cli.stats["misses"] == 2
+
+    def test_fresh_backend_entry_expires_at_soft_expiry(self, backend):
+        entry = CacheEntry(value={"name": "pikachu"}, soft_expires_at=time.time() + 60)
+        backend.get_entry = lambda key: entry
+        cache_cli = TieredCacheClient(backend=backend, ttl=300)
+
+        with patch("cache.tiered.time.monotonic", return_value=1000.0) as monotonic:
+            cache_cli.get("pikachu")
+            monotonic.return_value = 1061.0
+            cache_cli.get("pikachu")
+
+        assert cache_cli.stats["misses"] == 2